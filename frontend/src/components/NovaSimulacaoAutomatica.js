@@ -12,6 +12,10 @@ const NovaSimulacaoAutomatica = () => {
   const [aplicacaoInicial, setAplicacaoInicial] = useState('');
   const [aplicacaoMensal, setAplicacaoMensal] = useState('');
   const [moedaBase, setMoedaBase] = useState('BRL'); 
+  const [rebalanceamento, setRebalanceamento] = useState('nenhum');
+  const [bandaRebalanceamento, setBandaRebalanceamento] = useState('5');
+  const [dividendos, setDividendos] = useState('ignorar');
+  const [benchmarks, setBenchmarks] = useState('ipca, sgs:4391');
   const [message, setMessage] = useState('');
   const [error, setError] = useState('');
 
@@ -43,7 +47,11 @@ const NovaSimulacaoAutomatica = () => {
         data_final: dataFinal,
         aplicacao_inicial: aplicacaoInicial,
         aplicacao_mensal: aplicacaoMensal,
-        moeda_base: moedaBase
+        moeda_base: moedaBase,
+        rebalanceamento,
+        banda_rebalanceamento: Number(bandaRebalanceamento) / 100,
+        dividendos,
+        benchmarks: benchmarks.split(',').map((benchmark) => benchmark.trim()).filter(Boolean)
       })
     });
 
@@ -175,6 +183,58 @@ const NovaSimulacaoAutomatica = () => {
             <option value="BRL">BRL - Real Brasileiro</option>
           </select>
         </div>
+
+        <div className="form-group">
+          <label>Rebalanceamento:</label>
+          <select
+            value={rebalanceamento}
+            onChange={(e) => setRebalanceamento(e.target.value)}
+          >
+            <option value="nenhum">Sem rebalanceamento</option>
+            <option value="mensal">Mensal</option>
+            <option value="trimestral">Trimestral</option>
+            <option value="anual">Anual</option>
+            <option value="bandas">Por bandas de tolerância</option>
+            <option value="aportes">Somente com os aportes</option>
+          </select>
+        </div>
+
+        {rebalanceamento === 'bandas' && (
+          <div className="form-group">
+            <label>Banda de Tolerância (%):</label>
+            <input
+              type="number"
+              value={bandaRebalanceamento}
+              onChange={(e) => setBandaRebalanceamento(e.target.value)}
+              required
+              min="0.1"
+              max="99"
+              step="any"
+            />
+          </div>
+        )}
+
+        <div className="form-group">
+          <label>Dividendos:</label>
+          <select
+            value={dividendos}
+            onChange={(e) => setDividendos(e.target.value)}
+          >
+            <option value="ignorar">Embutidos no preço ajustado</option>
+            <option value="caixa">Creditados em caixa</option>
+            <option value="reinvestir">Reinvestidos no próprio ativo</option>
+          </select>
+        </div>
+
+        <div className="form-group">
+          <label>Comparar com (ipca, sgs:código ou ticker, separados por vírgula):</label>
+          <input
+            type="text"
+            value={benchmarks}
+            onChange={(e) => setBenchmarks(e.target.value)}
+            placeholder="ipca, sgs:4391, ^BVSP, ^GSPC"
+          />
+        </div>
         <button type="submit" className="submit-button">Criar Simulação</button>
       </form>
       {message && <p className="success-message">{message}</p>}
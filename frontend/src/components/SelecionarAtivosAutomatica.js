@@ -10,6 +10,7 @@ import config from '../config';
 function SelecionarAtivosAutomatica() {
   const [ativos, setAtivos] = useState([]);
   const [pesos, setPesos] = useState({});
+  const [criterioOtimizacao, setCriterioOtimizacao] = useState('maximo_sharpe');
   const navigate = useNavigate();
   const location = useLocation();
   const { simulacaoId, carteiraId } = location.state || {};
@@ -88,6 +89,38 @@ function SelecionarAtivosAutomatica() {
     }
   };
 
+  const otimizarPesos = async () => {
+    if (ativos.length < 2) {
+      alert('Adicione ao menos dois ativos para otimizar os pesos.');
+      return;
+    }
+
+    try {
+      const response = await fetch(`${config.backendUrl}/api/otimizar_pesos/`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ tickers: ativos, simulacao_id: simulacaoId })
+      });
+      const resultado = await response.json();
+
+      if (response.ok) {
+        // Os pesos voltam por ticker (em maiúsculas); ativos ausentes ficam com peso zero
+        const pesosOtimizados = resultado[criterioOtimizacao].pesos;
+        setPesos(ativos.reduce((acc, ativo) => {
+          acc[ativo] = arredondarPeso((pesosOtimizados[ativo.toUpperCase()] || 0) * 100, 2);
+          return acc;
+        }, {}));
+      } else {
+        alert(resultado.error || 'Erro ao otimizar os pesos');
+      }
+    } catch (error) {
+      console.error('Erro ao otimizar os pesos:', error);
+      alert('Erro ao otimizar os pesos');
+    }
+  };
+
   const enviarDados = async () => {
     ajustarPesosProporcionalmente();
 
@@ -183,6 +216,14 @@ function SelecionarAtivosAutomatica() {
             <button onClick={() => removerAtivo(ativo)} className="remover-button">Remover</button>
           </div>
         ))}
+        <div className="otimizar-pesos">
+          <select value={criterioOtimizacao} onChange={(e) => setCriterioOtimizacao(e.target.value)}>
+            <option value="maximo_sharpe">Máximo Sharpe</option>
+            <option value="minima_variancia">Mínima variância</option>
+            <option value="paridade_risco">Paridade de risco</option>
+          </select>
+          <button onClick={otimizarPesos} className="otimizar-button">Otimizar Pesos</button>
+        </div>
         <button onClick={enviarDados} className="enviar-button">Enviar Dados</button>
       </div>
     </div>
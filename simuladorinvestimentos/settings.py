@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import dj_database_url
 import os
 
@@ -163,3 +163,62 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+
+# Armazém local de dados de mercado
+# Tempo (em segundos) até que o candle do dia/mês em aberto seja baixado novamente
+PRECOS_TTL_PERIODO_ABERTO = config('PRECOS_TTL_PERIODO_ABERTO', default=900, cast=int)
+# Número máximo de downloads simultâneos ao buscar vários tickers de uma vez
+PRECOS_MAX_DOWNLOADS_PARALELOS = config('PRECOS_MAX_DOWNLOADS_PARALELOS', default=8, cast=int)
+# Tempo de vida (em segundos) dos metadados de tickers (nome, moeda, bolsa) e tamanho do cache em memória
+METADADOS_TTL = config('METADADOS_TTL', default=7 * 24 * 3600, cast=int)
+METADADOS_CACHE_TAMANHO = config('METADADOS_CACHE_TAMANHO', default=2048, cast=int)
+
+# Tabela local de IPCA: intervalo mínimo (em segundos) entre atualizações em segundo plano
+# e tempo que a série completa fica em memória em cada processo
+IPCA_INTERVALO_ATUALIZACAO = config('IPCA_INTERVALO_ATUALIZACAO', default=3600, cast=int)
+IPCA_TTL_MEMORIA = config('IPCA_TTL_MEMORIA', default=600, cast=int)
+
+# Provedores de dados de mercado, consultados em cadeia na ordem dada (ex.: 'arquivos,yfinance')
+# 'arquivos' lê CSV/Parquet de DADOS_MERCADO_DIRETORIO_ARQUIVOS, sem acesso à rede (testes de carga, desenvolvimento offline)
+DADOS_MERCADO_PROVEDORES = config('DADOS_MERCADO_PROVEDORES', default='yfinance', cast=Csv())
+DADOS_MERCADO_DIRETORIO_ARQUIVOS = config('DADOS_MERCADO_DIRETORIO_ARQUIVOS', default=str(BASE_DIR / 'dados_mercado'))
+
+# Coalescência de downloads: requisições simultâneas pelo mesmo ticker esperam o primeiro download
+# (no processo e entre workers, via lock de arquivo no diretório abaixo) por até COALESCENCIA_ESPERA_MAXIMA segundos
+COALESCENCIA_DIRETORIO = config('COALESCENCIA_DIRETORIO', default='')
+COALESCENCIA_ESPERA_MAXIMA = config('COALESCENCIA_ESPERA_MAXIMA', default=60, cast=int)
+
+# Diretório local de símbolos (busca por ticker/nome): intervalo (em segundos) para recarregar o índice da tabela
+SIMBOLOS_TTL_MEMORIA = config('SIMBOLOS_TTL_MEMORIA', default=300, cast=int)
+
+# Eventos corporativos (dividendos): tempo (em segundos) até que o histórico de um ticker seja baixado novamente
+EVENTOS_TTL = config('EVENTOS_TTL', default=24 * 3600, cast=int)
+# Tickers populares preaquecidos pelo comando preaquecer_dados_mercado, além dos usados nas simulações
+DADOS_MERCADO_PREAQUECER = config('DADOS_MERCADO_PREAQUECER', default='', cast=Csv())
+
+# Motor de cálculo das simulações automáticas: 'vetorizado' (matrizes NumPy) ou 'legado' (mês a mês, ativo a ativo)
+SIMULACAO_MOTOR = config('SIMULACAO_MOTOR', default='vetorizado')
+# Número máximo de variantes avaliadas em uma varredura de cenários
+SIMULACAO_VARREDURA_MAX_VARIANTES = config('SIMULACAO_VARREDURA_MAX_VARIANTES', default=10000, cast=int)
+# Número máximo de meses do período analisado nas janelas móveis
+SIMULACAO_JANELAS_MAX_MESES = config('SIMULACAO_JANELAS_MAX_MESES', default=1200, cast=int)
+
+# Métricas de risco e retorno: código no SGS da taxa livre de risco mensal (4391 = CDI; 0 desativa Sharpe e Sortino)
+# e tempo (em segundos) até que a série seja consultada de novo
+METRICAS_CODIGO_TAXA_LIVRE = config('METRICAS_CODIGO_TAXA_LIVRE', default=4391, cast=int)
+TAXAS_TTL = config('TAXAS_TTL', default=24 * 3600, cast=int)
+
+# Projeções por Monte Carlo: caminhos por padrão e no máximo, horizonte máximo (meses), caminhos por lote
+# e processos do pool (0 = um por CPU; 1 = no próprio processo)
+PROJECAO_CAMINHOS_PADRAO = config('PROJECAO_CAMINHOS_PADRAO', default=10000, cast=int)
+PROJECAO_MAX_CAMINHOS = config('PROJECAO_MAX_CAMINHOS', default=50000, cast=int)
+PROJECAO_MAX_MESES = config('PROJECAO_MAX_MESES', default=600, cast=int)
+PROJECAO_TAMANHO_LOTE = config('PROJECAO_TAMANHO_LOTE', default=2500, cast=int)
+PROJECAO_PROCESSOS = config('PROJECAO_PROCESSOS', default=0, cast=int)
+
+# Otimização de pesos: janela padrão (em meses) da estimativa, número máximo de ativos e cache em memória
+# das médias e covariâncias por conjunto de tickers e janela (TTL em segundos e número de entradas)
+OTIMIZACAO_JANELA_MESES = config('OTIMIZACAO_JANELA_MESES', default=60, cast=int)
+OTIMIZACAO_MAX_ATIVOS = config('OTIMIZACAO_MAX_ATIVOS', default=500, cast=int)
+OTIMIZACAO_CACHE_TTL = config('OTIMIZACAO_CACHE_TTL', default=24 * 3600, cast=int)
+OTIMIZACAO_CACHE_TAMANHO = config('OTIMIZACAO_CACHE_TAMANHO', default=128, cast=int)
@@ -0,0 +1,173 @@
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+from contextlib import contextmanager, ExitStack
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: a coalescência fica restrita ao processo
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Locks por chave dentro do processo: chave -> [threading.Lock, quantidade de threads usando a entrada]
+_locks = {}
+_lock = threading.Lock()
+_contadores = {'lideres': 0, 'coalescidas': 0, 'esperas_expiradas': 0}
+
+
+def _diretorio():
+    diretorio = getattr(settings, 'COALESCENCIA_DIRETORIO', None) or os.path.join(tempfile.gettempdir(), 'simulador_locks')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def _espera_maxima():
+    return getattr(settings, 'COALESCENCIA_ESPERA_MAXIMA', 60)
+
+
+def _adquirir_no_processo(chave, prazo):
+    """
+    Obtém o lock da chave entre as threads deste processo.
+
+    Args:
+        chave (str): Chave do recurso.
+        prazo (float): Instante (time.monotonic) em que a espera é abandonada.
+
+    Returns:
+        tuple: (lock ou None se a espera expirou, True se foi preciso esperar outra thread).
+    """
+    with _lock:
+        entrada = _locks.setdefault(chave, [threading.Lock(), 0])
+        entrada[1] += 1
+
+    lock = entrada[0]
+    if lock.acquire(blocking=False):
+        return lock, False
+    if lock.acquire(timeout=max(prazo - time.monotonic(), 0)):
+        return lock, True
+
+    _liberar_no_processo(chave, None)
+    return None, True
+
+
+def _liberar_no_processo(chave, lock):
+    if lock is not None:
+        lock.release()
+    with _lock:
+        entrada = _locks[chave]
+        entrada[1] -= 1
+        if entrada[1] == 0:
+            del _locks[chave]
+
+
+def _adquirir_entre_processos(chave, prazo):
+    """
+    Obtém um lock de arquivo (flock) para a chave, compartilhado por todos os workers da máquina.
+
+    Args:
+        chave (str): Chave do recurso.
+        prazo (float): Instante (time.monotonic) em que a espera é abandonada.
+
+    Returns:
+        tuple: (descritor do arquivo ou None se a espera expirou, True se foi preciso esperar outro worker).
+    """
+    if fcntl is None:
+        return None, False
+
+    nome = hashlib.sha1(chave.encode()).hexdigest() + '.lock'
+    descritor = os.open(os.path.join(_diretorio(), nome), os.O_RDWR | os.O_CREAT, 0o644)
+    esperou = False
+    while True:
+        try:
+            fcntl.flock(descritor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return descritor, esperou
+        except BlockingIOError:
+            if time.monotonic() >= prazo:
+                os.close(descritor)
+                return None, True
+            esperou = True
+            time.sleep(0.05)
+
+
+def _liberar_entre_processos(descritor):
+    if descritor is not None:
+        fcntl.flock(descritor, fcntl.LOCK_UN)
+        os.close(descritor)
+
+
+@contextmanager
+def arrendamento(chave):
+    """
+    Garante que apenas uma requisição por vez (no processo e entre workers) busque o recurso da chave.
+
+    Quem chega enquanto outra busca está em andamento espera ela terminar; ao entrar, deve conferir
+    novamente o armazém, que provavelmente já terá os dados. Se a espera passar de
+    COALESCENCIA_ESPERA_MAXIMA segundos, segue sem o arrendamento (e busca por conta própria).
+
+    Args:
+        chave (str): Chave do recurso (ex.: 'precos:PETR4.SA:1d').
+
+    Yields:
+        bool: True se foi preciso esperar por outra busca da mesma chave.
+    """
+    prazo = time.monotonic() + _espera_maxima()
+
+    lock, esperou_processo = _adquirir_no_processo(chave, prazo)
+    descritor, esperou_arquivo = (None, False)
+    if lock is not None:
+        descritor, esperou_arquivo = _adquirir_entre_processos(chave, prazo)
+
+    esperou = esperou_processo or esperou_arquivo
+    expirou = lock is None or (fcntl is not None and descritor is None)
+    with _lock:
+        if expirou:
+            _contadores['esperas_expiradas'] += 1
+        _contadores['coalescidas' if esperou else 'lideres'] += 1
+    if expirou:
+        logger.warning(f'Espera pelo arrendamento de {chave} expirou, seguindo sem ele')
+
+    try:
+        yield esperou
+    finally:
+        _liberar_entre_processos(descritor)
+        if lock is not None:
+            _liberar_no_processo(chave, lock)
+
+
+@contextmanager
+def arrendamentos(chaves):
+    """
+    Obtém o arrendamento de várias chaves, sempre na mesma ordem, para evitar deadlocks entre lotes.
+
+    Args:
+        chaves (iterable): Chaves dos recursos.
+
+    Yields:
+        bool: True se foi preciso esperar por alguma das chaves.
+    """
+    with ExitStack() as pilha:
+        esperou = False
+        for chave in sorted(set(chaves)):
+            esperou = pilha.enter_context(arrendamento(chave)) or esperou
+        yield esperou
+
+
+def estatisticas_coalescencia():
+    """
+    Retorna os contadores de arrendamentos deste processo.
+
+    Returns:
+        dict: Buscas lideradas, buscas que esperaram por outra e esperas expiradas.
+    """
+    with _lock:
+        estatisticas = dict(_contadores)
+        estatisticas['em_andamento'] = len(_locks)
+    return estatisticas
@@ -0,0 +1,82 @@
+import zlib
+import struct
+import numpy as np
+
+
+# Cabeçalho: assinatura, versão, comprimido (0/1), número de colunas, número de linhas e data base (dias desde 1970-01-01)
+_CABECALHO = struct.Struct('<4sBBHIi')
+_ASSINATURA = b'SPC1'
+_VERSAO = 1
+_EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def codificar_serie(datas, colunas, comprimir=True):
+    """
+    Codifica uma série de preços em formato colunar binário.
+
+    As datas são gravadas como deslocamentos em dias (int32) entre linhas consecutivas, e cada coluna
+    como um vetor float64, sem repetir nomes de campos ou datas em texto a cada registro.
+
+    Args:
+        datas (array-like): Datas da série, em ordem crescente.
+        colunas (dict): Dicionário nome da coluna -> valores (um por data).
+        comprimir (bool, optional): Se o conteúdo deve ser comprimido com zlib. Default é True.
+
+    Returns:
+        bytes: Série codificada.
+    """
+    dias = (np.asarray(datas, dtype='datetime64[D]') - _EPOCA).astype(np.int64)
+    base = int(dias[0]) if len(dias) else 0
+    deslocamentos = np.diff(dias, prepend=base).astype('<i4')
+
+    nomes = [nome.encode('utf-8') for nome in colunas]
+    partes = [struct.pack('<H', len(nome)) + nome for nome in nomes]
+    partes.append(deslocamentos.tobytes())
+    partes.extend(np.asarray(valores, dtype='<f8').tobytes() for valores in colunas.values())
+
+    corpo = b''.join(partes)
+    if comprimir:
+        corpo = zlib.compress(corpo, 6)
+
+    return _CABECALHO.pack(_ASSINATURA, _VERSAO, int(comprimir), len(nomes), len(dias), base) + corpo
+
+
+def decodificar_serie(dados):
+    """
+    Decodifica uma série gerada por codificar_serie diretamente em vetores NumPy.
+
+    Args:
+        dados (bytes ou memoryview): Série codificada.
+
+    Returns:
+        tuple: (np.ndarray de datetime64[D], dict nome da coluna -> np.ndarray float64).
+
+    Raises:
+        ValueError: Se os dados não estiverem no formato esperado.
+    """
+    dados = bytes(dados)
+    assinatura, versao, comprimido, n_colunas, n_linhas, base = _CABECALHO.unpack_from(dados)
+    if assinatura != _ASSINATURA or versao != _VERSAO:
+        raise ValueError('Formato de série de preços desconhecido')
+
+    corpo = dados[_CABECALHO.size:]
+    if comprimido:
+        corpo = zlib.decompress(corpo)
+
+    posicao = 0
+    nomes = []
+    for _ in range(n_colunas):
+        (tamanho,) = struct.unpack_from('<H', corpo, posicao)
+        nomes.append(corpo[posicao + 2:posicao + 2 + tamanho].decode('utf-8'))
+        posicao += 2 + tamanho
+
+    deslocamentos = np.frombuffer(corpo, dtype='<i4', count=n_linhas, offset=posicao)
+    posicao += 4 * n_linhas
+    datas = _EPOCA + (base + np.cumsum(deslocamentos, dtype=np.int64)).astype('timedelta64[D]')
+
+    colunas = {}
+    for nome in nomes:
+        colunas[nome] = np.frombuffer(corpo, dtype='<f8', count=n_linhas, offset=posicao)
+        posicao += 8 * n_linhas
+
+    return datas, colunas
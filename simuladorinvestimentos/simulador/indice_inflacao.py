@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+class IndiceInflacaoAcumulado:
+    """
+    Índice de preços acumulado de uma série mensal de inflação, calculado uma única vez.
+
+    O nível do índice antes do mês i é o produto de (1 + taxa / 100) dos meses anteriores, de modo que a
+    inflação acumulada entre dois meses quaisquer é a razão entre dois níveis: cada ajuste custa uma busca
+    binária e uma divisão, sem recalcular o produto acumulado da janela.
+    """
+
+    def __init__(self, datas, taxas, niveis=None):
+        """
+        Args:
+            datas (array-like): Datas dos meses da série, em ordem crescente.
+            taxas (array-like): Inflação de cada mês, em porcentagem.
+            niveis (array-like, optional): Índice acumulado já calculado ao fim de cada mês (ex.: a coluna
+                'indice_acumulado' da tabela). Se informado, é usado no lugar do produto acumulado das taxas.
+        """
+        self.datas = pd.DatetimeIndex(datas).values
+        taxas = np.asarray(taxas, dtype=float)
+        if niveis is None or len(taxas) == 0:
+            # nivel[i] é o índice acumulado até o mês anterior a datas[i]; nivel[-1] inclui o último mês
+            self.nivel = np.concatenate(([1.0], np.cumprod(1 + taxas / 100)))
+        else:
+            # Rebase do índice armazenado para o nível imediatamente anterior ao primeiro mês do trecho
+            niveis = np.asarray(niveis, dtype=float)
+            base = niveis[0] / (1 + taxas[0] / 100)
+            self.nivel = np.concatenate(([1.0], niveis / base))
+
+    @classmethod
+    def de_dataframe(cls, ipca_data, coluna_ipca='Valor', coluna_indice='IndiceAcumulado'):
+        """
+        Cria o índice a partir de um DataFrame de inflação indexado por data.
+
+        Se o DataFrame trouxer o índice acumulado já gravado na tabela (coluna_indice, sem lacunas), ele é
+        reaproveitado; caso contrário o índice é calculado a partir das taxas mensais.
+
+        Args:
+            ipca_data (pd.DataFrame): DataFrame com os dados do IPCA, indexado por data.
+            coluna_ipca (str, optional): Coluna com a inflação mensal em porcentagem. Default é 'Valor'.
+            coluna_indice (str, optional): Coluna com o índice acumulado ao fim de cada mês. Default é 'IndiceAcumulado'.
+
+        Returns:
+            IndiceInflacaoAcumulado: Índice acumulado da série.
+        """
+        ipca_data = ipca_data.sort_index()
+        niveis = None
+        if coluna_indice in ipca_data.columns and ipca_data[coluna_indice].notna().all():
+            niveis = ipca_data[coluna_indice].to_numpy(dtype=float)
+        return cls(pd.to_datetime(ipca_data.index), ipca_data[coluna_ipca].to_numpy(), niveis)
+
+    def _posicoes(self, inicio, fim):
+        inicio = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(inicio))).values
+        fim = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(fim))).values
+        return np.searchsorted(self.datas, inicio, side='left'), np.searchsorted(self.datas, fim, side='right')
+
+    def fatores(self, inicio, fim):
+        """
+        Calcula a inflação acumulada dos meses entre inicio e fim (inclusive), de forma vetorizada.
+
+        Args:
+            inicio (data ou array-like de datas): Mês (ou meses) inicial.
+            fim (data ou array-like de datas): Mês (ou meses) final.
+
+        Returns:
+            np.ndarray: Fatores de correção; NaN onde não há meses da série no intervalo.
+        """
+        posicao_inicio, posicao_fim = self._posicoes(inicio, fim)
+        validos = posicao_fim > posicao_inicio
+        return np.where(
+            validos,
+            self.nivel[posicao_fim] / self.nivel[np.minimum(posicao_inicio, posicao_fim)],
+            np.nan
+        )
+
+    def fator(self, inicio, fim):
+        """
+        Calcula a inflação acumulada dos meses entre inicio e fim (inclusive).
+
+        Args:
+            inicio (str ou data): Mês inicial.
+            fim (str ou data): Mês final.
+
+        Returns:
+            float ou None: Fator de correção, ou None se não houver meses da série no intervalo.
+        """
+        fator = self.fatores(inicio, fim)[0]
+        return None if np.isnan(fator) else float(fator)
+
+    def deflacionar(self, valor, inicio, fim):
+        """
+        Traz um valor para o poder de compra do início do intervalo, dividindo-o pela inflação acumulada.
+
+        Args:
+            valor (float): Valor a ser ajustado.
+            inicio (str ou data): Mês inicial.
+            fim (str ou data): Mês final.
+
+        Returns:
+            float ou None: Valor ajustado, ou None se não houver meses da série no intervalo.
+        """
+        fator = self.fator(inicio, fim)
+        return None if fator is None else valor / fator
+
+    def deflacionar_vetor(self, valores, inicios, fim):
+        """
+        Ajusta de uma só vez um vetor de valores (ex.: aportes mensais), cada um desde a sua data até fim.
+
+        Args:
+            valores (float ou array-like): Valor de cada aporte (ou um único valor para todos).
+            inicios (array-like): Data de cada aporte.
+            fim (str ou data): Mês final, comum a todos.
+
+        Returns:
+            np.ndarray: Valores ajustados; NaN onde não há meses da série no intervalo.
+        """
+        return np.asarray(valores, dtype=float) / self.fatores(inicios, fim)
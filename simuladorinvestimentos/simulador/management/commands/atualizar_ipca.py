@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from simulador.services.inflacao_services import atualizar_ipca
+
+
+class Command(BaseCommand):
+    """
+    Atualiza incrementalmente a tabela local de IPCA. Pode ser agendado via cron, ex.:
+    0 6 * * * cd /app/simuladorinvestimentos && python manage.py atualizar_ipca
+    """
+    help = 'Busca no SGS os meses de IPCA posteriores ao último armazenado.'
+
+    def handle(self, *args, **options):
+        novos = atualizar_ipca()
+        self.stdout.write(self.style.SUCCESS(f'IPCA atualizado: {novos} meses novos.'))
@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from simulador.models import BarraPreco, MetadadosAtivo, IndiceInflacao, EventoCorporativo, TaxaMensal
+from simulador.provedores import COLUNAS_PRECOS
+from simulador.services.precos_services import CAMPOS_BARRA
+
+
+class Command(BaseCommand):
+    """
+    Exporta o armazém local (preços, eventos corporativos, metadados, IPCA e taxas do SGS) no formato lido pelo provedor 'arquivos',
+    para rodar testes de carga e desenvolvimento sem acesso à rede, ex.:
+    python manage.py exportar_dados_mercado --diretorio /tmp/dados_mercado
+    """
+    help = 'Exporta os dados de mercado armazenados para o diretório do provedor de arquivos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--diretorio', default=settings.DADOS_MERCADO_DIRETORIO_ARQUIVOS)
+
+    def handle(self, *args, **options):
+        diretorio = options['diretorio']
+        os.makedirs(os.path.join(diretorio, 'precos'), exist_ok=True)
+
+        series = BarraPreco.objects.values_list('ticker', 'intervalo').distinct()
+        for ticker, intervalo in series:
+            linhas = BarraPreco.objects.filter(ticker=ticker, intervalo=intervalo).order_by('data')
+            df = pd.DataFrame.from_records(list(linhas.values_list('data', *CAMPOS_BARRA)), columns=['Date'] + COLUNAS_PRECOS)
+            df.to_csv(os.path.join(diretorio, 'precos', f'{ticker}_{intervalo}.csv'), index=False)
+
+        # Dividendos e desdobramentos, cada tipo na sua pasta e com a coluna lida pelo provedor de arquivos
+        pastas_eventos = {
+            EventoCorporativo.DIVIDENDO: ('dividendos', 'Dividends'),
+            EventoCorporativo.DESDOBRAMENTO: ('desdobramentos', 'Stock Splits'),
+        }
+        for pasta, _ in pastas_eventos.values():
+            os.makedirs(os.path.join(diretorio, pasta), exist_ok=True)
+
+        eventos = EventoCorporativo.objects.order_by('ticker', 'tipo', 'data').values_list('ticker', 'tipo', 'data', 'valor')
+        df_eventos = pd.DataFrame.from_records(list(eventos), columns=['ticker', 'tipo', 'Date', 'valor'])
+        for (ticker, tipo), grupo in df_eventos.groupby(['ticker', 'tipo']):
+            pasta, coluna = pastas_eventos[tipo]
+            grupo[['Date', 'valor']].rename(columns={'valor': coluna}) \
+                .to_csv(os.path.join(diretorio, pasta, f'{ticker}.csv'), index=False)
+
+        metadados = MetadadosAtivo.objects.values('ticker', 'nome', 'moeda', 'bolsa', 'data_primeira_negociacao')
+        pd.DataFrame.from_records(list(metadados), columns=['ticker', 'nome', 'moeda', 'bolsa', 'data_primeira_negociacao']) \
+            .to_csv(os.path.join(diretorio, 'metadados.csv'), index=False)
+
+        inflacao = IndiceInflacao.objects.order_by('data').values_list('data', 'valor')
+        pd.DataFrame.from_records(list(inflacao), columns=['Data', 'Valor']) \
+            .to_csv(os.path.join(diretorio, 'inflacao.csv'), index=False)
+
+        # Séries mensais do SGS (ex.: CDI), uma por código
+        os.makedirs(os.path.join(diretorio, 'taxas'), exist_ok=True)
+        taxas = TaxaMensal.objects.order_by('codigo', 'data').values_list('codigo', 'data', 'valor')
+        df_taxas = pd.DataFrame.from_records(list(taxas), columns=['codigo', 'Data', 'Valor'])
+        for codigo, grupo in df_taxas.groupby('codigo'):
+            grupo[['Data', 'Valor']].to_csv(os.path.join(diretorio, 'taxas', f'{codigo}.csv'), index=False)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(series)} séries de preços exportadas para {diretorio}.'))
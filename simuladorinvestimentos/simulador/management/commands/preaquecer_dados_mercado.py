@@ -0,0 +1,132 @@
+import time
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.core.management.base import BaseCommand
+
+from simulador.models import Ativo, BarraPreco, EventoCorporativo, CarteiraAutomatica, CarteiraManual, MetadadosAtivo
+from simulador.utils import executar_em_paralelo
+from simulador.services.precos_services import garantir_precos, para_data, DATA_MINIMA
+from simulador.services.metadados_services import obter_metadados, remover_metadados_expirados
+from simulador.services.eventos_services import garantir_eventos_em_lote
+from simulador.services.cambio_services import serie_cambio, ticker_par
+
+
+# Tamanho aproximado de uma linha no banco (datas de 4 bytes e floats de 8 bytes, sem contar índices)
+BYTES_BARRA = 4 + 8 * 6
+BYTES_EVENTO = 4 + 8
+
+
+class Command(BaseCommand):
+    """
+    Preenche o armazém local (preços mensais e diários, metadados, dividendos e câmbio) dos tickers usados
+    nas simulações e da lista DADOS_MERCADO_PREAQUECER. É incremental: execuções seguidas baixam apenas
+    os meses novos. Antes disso remove os metadados com TTL vencido; os dos tickers preaquecidos são baixados
+    de novo em seguida. Pode ser agendado via cron, ex.:
+    30 5 * * * cd /app/simuladorinvestimentos && python manage.py preaquecer_dados_mercado
+    """
+    help = 'Baixa para o armazém local os dados de mercado dos tickers mais usados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickers', nargs='*', default=[], help='Tickers adicionais.')
+        parser.add_argument('--intervalos', nargs='*', default=['1mo', '1d'], help="Intervalos das barras (ex.: 1mo 1d).")
+        parser.add_argument('--inicio', default=None, help='Data inicial (AAAA-MM-DD). Default: histórico completo.')
+        parser.add_argument(
+            '--max-workers', type=int, default=getattr(settings, 'PRECOS_MAX_DOWNLOADS_PARALELOS', 8),
+            help='Número máximo de tickers processados ao mesmo tempo.'
+        )
+
+    def handle(self, *args, **options):
+        intervalos = options['intervalos']
+        inicio = para_data(options['inicio']) if options['inicio'] else DATA_MINIMA
+        fim = date.today() + timedelta(days=1)
+
+        tickers = list(dict.fromkeys(
+            list(Ativo.objects.values_list('ticker', flat=True).distinct())
+            + list(getattr(settings, 'DADOS_MERCADO_PREAQUECER', []))
+            + options['tickers']
+        ))
+        self.stdout.write(f'Preaquecendo {len(tickers)} tickers ({", ".join(intervalos)}) a partir de {inicio}...')
+
+        # Metadados de tickers que ninguém mais consulta não ficam na tabela indefinidamente
+        removidos = remover_metadados_expirados()
+        self.stdout.write(f'{removidos} metadados expirados removidos.')
+
+        inicio_total = time.perf_counter()
+        relatorio = executar_em_paralelo(
+            lambda ticker: self._preaquecer_ticker(ticker, intervalos, inicio, fim),
+            tickers,
+            max_workers=options['max_workers']
+        )
+
+        # Pares de câmbio entre as moedas dos tickers e as moedas base das carteiras
+        moedas = set(MetadadosAtivo.objects.filter(ticker__in=tickers, moeda__isnull=False).values_list('moeda', flat=True))
+        moedas_base = set(CarteiraAutomatica.objects.values_list('moeda_base', flat=True)) \
+            | set(CarteiraManual.objects.values_list('moeda_base', flat=True))
+        pares = [(moeda, base) for moeda in sorted(moedas) for base in sorted(moedas_base) if moeda != base]
+        relatorio.update({
+            ticker_par(*par): resultado
+            for par, resultado in executar_em_paralelo(
+                lambda par: self._preaquecer_par(par, intervalos, inicio, fim),
+                pares,
+                max_workers=options['max_workers']
+            ).items()
+        })
+
+        total_barras = 0
+        total_bytes = 0
+        for chave, resultado in relatorio.items():
+            if isinstance(resultado, Exception):
+                self.stdout.write(self.style.WARNING(f'{chave}: erro - {resultado}'))
+                continue
+            total_barras += resultado['barras_novas']
+            total_bytes += resultado['bytes']
+            self.stdout.write(
+                f"{chave}: {resultado['tempo']:.2f}s, {resultado['barras_novas']} barras novas, "
+                f"{resultado['barras']} barras e {resultado['eventos']} eventos armazenados (~{resultado['bytes']} bytes)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(relatorio)} séries preaquecidas em {time.perf_counter() - inicio_total:.2f}s: '
+            f'{total_barras} barras novas, ~{total_bytes} bytes armazenados.'
+        ))
+
+    def _preaquecer_ticker(self, ticker, intervalos, inicio, fim):
+        inicio_ticker = time.perf_counter()
+        try:
+            obter_metadados(ticker)
+            barras_novas = sum(garantir_precos(ticker, inicio, fim, intervalo) for intervalo in intervalos)
+            garantir_eventos_em_lote([ticker])
+            return self._resultado([ticker], inicio_ticker, barras_novas)
+        finally:
+            # Cada thread abre a própria conexão com o banco
+            connection.close()
+
+    def _preaquecer_par(self, par, intervalos, inicio, fim):
+        inicio_par = time.perf_counter()
+        try:
+            base, cotacao = par
+            # A série pode ser resolvida pelo par direto ou pelo inverso
+            tickers = [ticker_par(base, cotacao), ticker_par(cotacao, base)]
+            antes = BarraPreco.objects.filter(ticker__in=tickers).count()
+            for intervalo in intervalos:
+                serie_cambio(base, cotacao, inicio, fim, intervalo)
+            barras_novas = BarraPreco.objects.filter(ticker__in=tickers).count() - antes
+            return self._resultado(tickers, inicio_par, barras_novas)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _resultado(tickers, inicio, barras_novas):
+        barras = BarraPreco.objects.filter(ticker__in=tickers).count()
+        eventos = EventoCorporativo.objects.filter(ticker__in=tickers).count()
+        tamanho_ticker = len(tickers[0])
+        return {
+            'tempo': time.perf_counter() - inicio,
+            'barras_novas': barras_novas,
+            'barras': barras,
+            'eventos': eventos,
+            'bytes': barras * (BYTES_BARRA + tamanho_ticker) + eventos * (BYTES_EVENTO + tamanho_ticker),
+        }
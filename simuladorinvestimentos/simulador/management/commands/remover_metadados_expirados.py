@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from simulador.services.metadados_services import remover_metadados_expirados
+
+
+class Command(BaseCommand):
+    """
+    Remove da tabela os metadados com TTL vencido, para que tickers que ninguém mais consulta não fiquem
+    armazenados indefinidamente. Pode ser agendado via cron, ex.:
+    0 4 * * * cd /app/simuladorinvestimentos && python manage.py remover_metadados_expirados
+    """
+    help = 'Remove os metadados de tickers com TTL vencido.'
+
+    def handle(self, *args, **options):
+        removidos = remover_metadados_expirados()
+        self.stdout.write(self.style.SUCCESS(f'{removidos} metadados expirados removidos.'))
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0014_remove_carteiraautomatica_indicadores_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarraPreco',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=50)),
+                ('intervalo', models.CharField(max_length=5)),
+                ('data', models.DateField()),
+                ('abertura', models.FloatField(null=True)),
+                ('maxima', models.FloatField(null=True)),
+                ('minima', models.FloatField(null=True)),
+                ('fechamento', models.FloatField(null=True)),
+                ('fechamento_ajustado', models.FloatField(null=True)),
+                ('volume', models.FloatField(null=True)),
+            ],
+            options={
+                'unique_together': {('ticker', 'intervalo', 'data')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SeriePrecos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=50)),
+                ('intervalo', models.CharField(max_length=5)),
+                ('inicio', models.DateField()),
+                ('fim', models.DateField()),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('ticker', 'intervalo')},
+            },
+        ),
+    ]
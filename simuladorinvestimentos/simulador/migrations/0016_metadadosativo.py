@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0015_armazem_precos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetadadosAtivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=50, unique=True)),
+                ('nome', models.CharField(blank=True, max_length=200, null=True)),
+                ('moeda', models.CharField(blank=True, max_length=10, null=True)),
+                ('bolsa', models.CharField(blank=True, max_length=20, null=True)),
+                ('data_primeira_negociacao', models.DateField(blank=True, null=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0016_metadadosativo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceInflacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True)),
+                ('valor', models.FloatField()),
+            ],
+        ),
+    ]
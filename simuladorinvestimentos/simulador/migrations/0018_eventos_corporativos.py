@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0017_indiceinflacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieEventos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=50, unique=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventoCorporativo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=50)),
+                ('tipo', models.CharField(choices=[('dividendo', 'Dividendo')], max_length=20)),
+                ('data', models.DateField()),
+                ('valor', models.FloatField()),
+            ],
+            options={
+                'unique_together': {('ticker', 'tipo', 'data')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0018_eventos_corporativos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ativo',
+            name='moeda',
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='ativo',
+            name='serie_precos',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='simulador.serieprecos'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import json
+
+from django.db import migrations, models
+
+from simulador.codec_precos import codificar_serie, decodificar_serie
+
+
+def _datas_e_colunas(precos):
+    """
+    Extrai datas e a coluna usada pelo simulador de um 'precos' no formato JSON antigo.
+
+    Carteiras automáticas guardavam uma string JSON com uma lista de registros ('Date', 'Adj Close', ...);
+    carteiras manuais guardavam um dicionário data -> {'open', 'high', 'low', 'close'}.
+    """
+    if isinstance(precos, str):
+        registros = json.loads(precos)
+        datas = [registro['Date'][:10] for registro in registros]
+        valores = [registro.get('Adj Close') for registro in registros]
+        return datas, {'Adj Close': [float('nan') if valor is None else valor for valor in valores]}
+
+    datas = sorted(precos)
+    return datas, {'Close': [float(precos[data]['close']) for data in datas]}
+
+
+def compactar_precos(apps, schema_editor):
+    Ativo = apps.get_model('simulador', 'Ativo')
+    for ativo in Ativo.objects.iterator():
+        if not ativo.precos:
+            continue
+        datas, colunas = _datas_e_colunas(ativo.precos)
+        ativo.precos_compactos = codificar_serie(datas, colunas)
+        ativo.save(update_fields=['precos_compactos'])
+
+
+def descompactar_precos(apps, schema_editor):
+    Ativo = apps.get_model('simulador', 'Ativo')
+    for ativo in Ativo.objects.filter(precos_compactos__isnull=False).iterator():
+        datas, colunas = decodificar_serie(ativo.precos_compactos)
+        datas = [str(data) for data in datas]
+        if 'Adj Close' in colunas:
+            ativo.precos = json.dumps([
+                {'Date': f'{data}T00:00:00', 'Adj Close': float(valor)}
+                for data, valor in zip(datas, colunas['Adj Close'])
+            ])
+        else:
+            ativo.precos = {
+                data: {'open': float(valor), 'high': float(valor), 'low': float(valor), 'close': float(valor)}
+                for data, valor in zip(datas, colunas['Close'])
+            }
+        ativo.save(update_fields=['precos'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0019_ativo_serie_precos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ativo',
+            name='precos_compactos',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='serieprecos',
+            name='compactado',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(compactar_precos, descompactar_precos),
+        migrations.RemoveField(
+            model_name='ativo',
+            name='precos',
+        ),
+    ]
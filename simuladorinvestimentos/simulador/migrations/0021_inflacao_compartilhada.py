@@ -0,0 +1,101 @@
+from datetime import date
+
+import numpy as np
+from django.db import migrations, models
+
+
+def _copia(inflacao_total):
+    """
+    Retorna a lista de meses (data, valor) de uma cópia antiga do IPCA guardada na simulação.
+    """
+    if not isinstance(inflacao_total, list):
+        return []
+    return [
+        (date.fromisoformat(str(registro['Data'])[:10]), float(registro['Valor']))
+        for registro in inflacao_total
+        if registro.get('Valor') is not None
+    ]
+
+
+def mover_inflacao_para_tabela(apps, schema_editor):
+    IndiceInflacao = apps.get_model('simulador', 'IndiceInflacao')
+    meses = {}
+
+    for nome_modelo in ('SimulacaoAutomatica', 'SimulacaoManual'):
+        modelo = apps.get_model('simulador', nome_modelo)
+        for simulacao in modelo.objects.iterator():
+            copia = _copia(simulacao.inflacao_total)
+            if not copia:
+                continue
+            meses.update(copia)
+            simulacao.inflacao_inicio = min(data for data, _ in copia)
+            simulacao.inflacao_fim = max(data for data, _ in copia)
+            simulacao.save(update_fields=['inflacao_inicio', 'inflacao_fim'])
+
+    IndiceInflacao.objects.bulk_create(
+        [IndiceInflacao(data=data, valor=valor) for data, valor in meses.items()],
+        ignore_conflicts=True
+    )
+
+    registros = list(IndiceInflacao.objects.order_by('data'))
+    indices = np.cumprod([1 + registro.valor / 100 for registro in registros])
+    for registro, indice in zip(registros, indices):
+        registro.indice_acumulado = float(indice)
+    IndiceInflacao.objects.bulk_update(registros, ['indice_acumulado'])
+
+
+def copiar_inflacao_para_simulacoes(apps, schema_editor):
+    IndiceInflacao = apps.get_model('simulador', 'IndiceInflacao')
+
+    for nome_modelo in ('SimulacaoAutomatica', 'SimulacaoManual'):
+        modelo = apps.get_model('simulador', nome_modelo)
+        for simulacao in modelo.objects.filter(inflacao_inicio__isnull=False).iterator():
+            meses = IndiceInflacao.objects.filter(
+                data__gte=simulacao.inflacao_inicio, data__lte=simulacao.inflacao_fim
+            ).order_by('data').values_list('data', 'valor')
+            simulacao.inflacao_total = [{'Data': data.isoformat(), 'Valor': valor} for data, valor in meses]
+            simulacao.save(update_fields=['inflacao_total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0020_precos_compactos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indiceinflacao',
+            name='indice_acumulado',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='inflacao_inicio',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='inflacao_fim',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulacaomanual',
+            name='inflacao_inicio',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='simulacaomanual',
+            name='inflacao_fim',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(mover_inflacao_para_tabela, copiar_inflacao_para_simulacoes),
+        migrations.RemoveField(
+            model_name='simulacaoautomatica',
+            name='inflacao_total',
+        ),
+        migrations.RemoveField(
+            model_name='simulacaomanual',
+            name='inflacao_total',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0021_inflacao_compartilhada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='fatores_crescimento',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0022_fatores_crescimento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='contribuicoes_ativos',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
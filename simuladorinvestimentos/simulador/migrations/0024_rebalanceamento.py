@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0023_contribuicoes_ativos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='banda_rebalanceamento',
+            field=models.FloatField(default=0.05),
+        ),
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='estrategia_rebalanceamento',
+            field=models.CharField(choices=[('nenhum', 'Sem rebalanceamento'), ('mensal', 'Mensal'), ('trimestral', 'Trimestral'), ('anual', 'Anual'), ('bandas', 'Por bandas de tolerância'), ('aportes', 'Somente com os aportes')], default='nenhum', max_length=20),
+        ),
+    ]
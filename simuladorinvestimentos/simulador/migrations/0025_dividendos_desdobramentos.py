@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0024_rebalanceamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='dividendos',
+            field=models.CharField(choices=[('ignorar', 'Embutidos no preço ajustado'), ('caixa', 'Creditados em caixa'), ('reinvestir', 'Reinvestidos no próprio ativo')], default='ignorar', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='eventocorporativo',
+            name='tipo',
+            field=models.CharField(choices=[('dividendo', 'Dividendo'), ('desdobramento', 'Desdobramento')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0025_dividendos_desdobramentos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieTaxa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.IntegerField(unique=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='metricas',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TaxaMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.IntegerField()),
+                ('data', models.DateField()),
+                ('valor', models.FloatField()),
+            ],
+            options={
+                'unique_together': {('codigo', 'data')},
+            },
+        ),
+    ]
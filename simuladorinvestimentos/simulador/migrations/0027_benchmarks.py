@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulador', '0026_metricas_taxas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='benchmarks',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='simulacaoautomatica',
+            name='resultados_benchmarks',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
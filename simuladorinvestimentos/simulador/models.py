@@ -5,12 +5,17 @@ from django.contrib.auth.models import User
 class Ativo(models.Model):
     """
     Representa um ativo financeiro, contendo informações como ticker, nome, peso e posse.
+
+    Os preços ficam no armazém compartilhado (BarraPreco), referenciado por 'serie_precos';
+    'precos_compactos' só é preenchido em ativos criados antes do armazém (ver codec_precos).
     """
     ticker = models.CharField(max_length=50)
     nome = models.CharField(max_length=100)
     peso = models.FloatField()
     posse = models.FloatField()
-    precos = models.JSONField(default=dict)
+    precos_compactos = models.BinaryField(null=True, blank=True)
+    serie_precos = models.ForeignKey('SeriePrecos', null=True, blank=True, on_delete=models.SET_NULL)
+    moeda = models.CharField(max_length=10, null=True, blank=True)
     ultimo_preco_convertido = models.FloatField()
     data_lancamento = models.DateField(null=True, blank=True)
 
@@ -35,6 +40,29 @@ class SimulacaoAutomatica(models.Model):
     """
     Representa uma simulação automática de investimentos.
     """
+    SEM_REBALANCEAMENTO = 'nenhum'
+    REBALANCEAMENTO_MENSAL = 'mensal'
+    REBALANCEAMENTO_TRIMESTRAL = 'trimestral'
+    REBALANCEAMENTO_ANUAL = 'anual'
+    REBALANCEAMENTO_BANDAS = 'bandas'
+    REBALANCEAMENTO_APORTES = 'aportes'
+    ESTRATEGIAS_REBALANCEAMENTO = [
+        (SEM_REBALANCEAMENTO, 'Sem rebalanceamento'),
+        (REBALANCEAMENTO_MENSAL, 'Mensal'),
+        (REBALANCEAMENTO_TRIMESTRAL, 'Trimestral'),
+        (REBALANCEAMENTO_ANUAL, 'Anual'),
+        (REBALANCEAMENTO_BANDAS, 'Por bandas de tolerância'),
+        (REBALANCEAMENTO_APORTES, 'Somente com os aportes'),
+    ]
+    DIVIDENDOS_IGNORAR = 'ignorar'
+    DIVIDENDOS_CAIXA = 'caixa'
+    DIVIDENDOS_REINVESTIR = 'reinvestir'
+    TRATAMENTOS_DIVIDENDOS = [
+        (DIVIDENDOS_IGNORAR, 'Embutidos no preço ajustado'),
+        (DIVIDENDOS_CAIXA, 'Creditados em caixa'),
+        (DIVIDENDOS_REINVESTIR, 'Reinvestidos no próprio ativo'),
+    ]
+
     nome = models.CharField(max_length=100)
     data_inicial = models.DateField()
     data_final = models.DateField()
@@ -42,8 +70,30 @@ class SimulacaoAutomatica(models.Model):
     aplicacao_mensal = models.FloatField()
     carteira_automatica = models.OneToOneField(CarteiraAutomatica, on_delete=models.CASCADE)
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
-    inflacao_total = models.JSONField(default=dict)
+    # Trecho da tabela IndiceInflacao usado pela simulação (meses publicados até a sua criação)
+    inflacao_inicio = models.DateField(null=True, blank=True)
+    inflacao_fim = models.DateField(null=True, blank=True)
+    estrategia_rebalanceamento = models.CharField(
+        max_length=20, choices=ESTRATEGIAS_REBALANCEAMENTO, default=SEM_REBALANCEAMENTO
+    )
+    # Desvio máximo (absoluto) entre o peso atual e o peso alvo de um ativo na estratégia por bandas
+    banda_rebalanceamento = models.FloatField(default=0.05)
+    # 'ignorar' usa o 'Adj Close' (dividendos já embutidos no preço); os demais usam o 'Close' e os
+    # dividendos do armazém de eventos corporativos
+    dividendos = models.CharField(max_length=20, choices=TRATAMENTOS_DIVIDENDOS, default=DIVIDENDOS_IGNORAR)
+    # Referências de comparação: 'ipca', séries mensais do SGS ('sgs:4391') ou tickers ('^BVSP')
+    benchmarks = models.JSONField(default=list, blank=True)
     resultados = models.JSONField(default=dict)
+    # Curvas dos mesmos aportes investidos em cada referência e métricas relativas (ver benchmarks_services)
+    resultados_benchmarks = models.JSONField(default=list, blank=True)
+    # Por mês: valor final de uma unidade aportada ('Fator'), fator de inflação até a data final ('Inflacao')
+    # e aporte corrigido usado no resultado ('Aporte'), no formato de codec_precos
+    fatores_crescimento = models.BinaryField(null=True, blank=True)
+    # Por mês: caixa distribuído ('investido'), ativos com preço ('compraveis') e contribuição por unidade
+    # de peso de cada ativo (uma coluna por ticker), para recalcular o resultado com outros pesos
+    contribuicoes_ativos = models.BinaryField(null=True, blank=True)
+    # Métricas de risco e retorno do último cálculo do resultado (ver metricas_services.calcular_metricas)
+    metricas = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return self.nome
@@ -71,10 +121,144 @@ class SimulacaoManual(models.Model):
     data_inicial = models.DateField()
     mes_atual = models.DateTimeField()
     carteira_manual = models.OneToOneField(CarteiraManual, on_delete=models.CASCADE)
-    inflacao_total = models.JSONField(default=dict)
+    # Trecho da tabela IndiceInflacao usado pela simulação (meses publicados até a sua criação)
+    inflacao_inicio = models.DateField(null=True, blank=True)
+    inflacao_fim = models.DateField(null=True, blank=True)
     historico_valor_total = models.JSONField(default=list)
 
 
+class SeriePrecos(models.Model):
+    """
+    Representa o intervalo de datas já baixado de um ticker no armazém local de preços.
+    O intervalo coberto vai de 'inicio' (inclusivo) até 'fim' (exclusivo).
+
+    'compactado' guarda todas as barras do ticker codificadas por codec_precos, para leituras sem
+    uma linha por barra; é descartado sempre que novas barras são gravadas.
+    """
+    ticker = models.CharField(max_length=50)
+    intervalo = models.CharField(max_length=5)
+    inicio = models.DateField()
+    fim = models.DateField()
+    atualizado_em = models.DateTimeField(auto_now=True)
+    compactado = models.BinaryField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('ticker', 'intervalo')
+
+    def __str__(self):
+        return f"{self.ticker} ({self.intervalo}) - {self.inicio} a {self.fim}"
+
+
+class BarraPreco(models.Model):
+    """
+    Representa uma barra OHLC de um ticker, compartilhada por todas as simulações.
+    """
+    ticker = models.CharField(max_length=50)
+    intervalo = models.CharField(max_length=5)
+    data = models.DateField()
+    abertura = models.FloatField(null=True)
+    maxima = models.FloatField(null=True)
+    minima = models.FloatField(null=True)
+    fechamento = models.FloatField(null=True)
+    fechamento_ajustado = models.FloatField(null=True)
+    volume = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ('ticker', 'intervalo', 'data')
+
+    def __str__(self):
+        return f"{self.ticker} ({self.intervalo}) {self.data}"
+
+
+class MetadadosAtivo(models.Model):
+    """
+    Representa os metadados de um ticker (nome, moeda, bolsa e data da primeira negociação) em cache.
+    """
+    ticker = models.CharField(max_length=50, unique=True)
+    nome = models.CharField(max_length=200, null=True, blank=True)
+    moeda = models.CharField(max_length=10, null=True, blank=True)
+    bolsa = models.CharField(max_length=20, null=True, blank=True)
+    data_primeira_negociacao = models.DateField(null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.ticker} - {self.nome}"
+
+
+class IndiceInflacao(models.Model):
+    """
+    Representa a variação mensal do IPCA (série 433 do SGS), compartilhada por todas as simulações.
+
+    'indice_acumulado' é o nível de preços ao fim do mês, acumulado desde o primeiro mês da tabela
+    (produto de 1 + valor / 100), de modo que a inflação entre dois meses é a razão entre os índices.
+    """
+    data = models.DateField(unique=True)
+    valor = models.FloatField()
+    indice_acumulado = models.FloatField(null=True)
+
+    def __str__(self):
+        return f"IPCA {self.data}: {self.valor}%"
+
+
+class SerieTaxa(models.Model):
+    """
+    Representa a última atualização de uma série mensal de taxa do SGS (ex.: CDI, série 4391) no armazém local.
+    """
+    codigo = models.IntegerField(unique=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Série SGS {self.codigo} - {self.atualizado_em}"
+
+
+class TaxaMensal(models.Model):
+    """
+    Representa a taxa de um mês (em % ao mês) de uma série do SGS, compartilhada por todas as simulações.
+    """
+    codigo = models.IntegerField()
+    data = models.DateField()
+    valor = models.FloatField()
+
+    class Meta:
+        unique_together = ('codigo', 'data')
+
+    def __str__(self):
+        return f"SGS {self.codigo} {self.data}: {self.valor}%"
+
+
+class SerieEventos(models.Model):
+    """
+    Representa o momento em que os eventos corporativos de um ticker foram baixados pela última vez.
+    """
+    ticker = models.CharField(max_length=50, unique=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Eventos de {self.ticker} - {self.atualizado_em}"
+
+
+class EventoCorporativo(models.Model):
+    """
+    Representa um evento corporativo de um ticker (dividendo ou desdobramento), compartilhado por todas as simulações.
+
+    O valor é o dividendo por ação, ou a razão do desdobramento (ex.: 4.0 em um desdobramento de 1 para 4).
+    """
+    DIVIDENDO = 'dividendo'
+    DESDOBRAMENTO = 'desdobramento'
+    TIPOS = [(DIVIDENDO, 'Dividendo'), (DESDOBRAMENTO, 'Desdobramento')]
+
+    ticker = models.CharField(max_length=50)
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    data = models.DateField()
+    valor = models.FloatField()
+
+    class Meta:
+        unique_together = ('ticker', 'tipo', 'data')
+
+    def __str__(self):
+        return f"{self.ticker} {self.tipo} {self.data}: {self.valor}"
+
+
 class Historico(models.Model):
     """
     Representa o histórico de simulações de um usuário.
@@ -0,0 +1,33 @@
+from functools import lru_cache
+
+from django.conf import settings
+
+from .base import ProvedorDadosMercado, DadosIndisponiveis, COLUNAS_PRECOS
+from .yahoo import ProvedorYFinance
+from .arquivos import ProvedorArquivos
+from .cadeia import ProvedorEmCadeia
+
+
+# Provedores disponíveis para a configuração DADOS_MERCADO_PROVEDORES
+PROVEDORES = {
+    'yfinance': lambda: ProvedorYFinance(),
+    'arquivos': lambda: ProvedorArquivos(settings.DADOS_MERCADO_DIRETORIO_ARQUIVOS),
+}
+
+
+@lru_cache(maxsize=None)
+def obter_provedor():
+    """
+    Retorna o provedor de dados de mercado configurado em DADOS_MERCADO_PROVEDORES.
+
+    Com mais de um nome configurado, os provedores são consultados em cadeia, na ordem dada.
+
+    Returns:
+        ProvedorDadosMercado: Provedor configurado.
+    """
+    nomes = getattr(settings, 'DADOS_MERCADO_PROVEDORES', ['yfinance'])
+    provedores = [PROVEDORES[nome.strip()]() for nome in nomes if nome.strip()]
+
+    if len(provedores) == 1:
+        return provedores[0]
+    return ProvedorEmCadeia(provedores)
@@ -0,0 +1,118 @@
+import os
+import threading
+import pandas as pd
+
+from .base import ProvedorDadosMercado, DadosIndisponiveis, COLUNAS_PRECOS
+
+
+class ProvedorArquivos(ProvedorDadosMercado):
+    """
+    Provedor que lê os dados de mercado de um diretório local (CSV ou Parquet), sem acesso à rede.
+
+    Estrutura esperada do diretório:
+        precos/<TICKER>_<intervalo>.csv      Date, Open, High, Low, Close, Adj Close, Volume
+        dividendos/<TICKER>.csv              Date, Dividends
+        desdobramentos/<TICKER>.csv          Date, Stock Splits
+        metadados.csv                        ticker, nome, moeda, bolsa, data_primeira_negociacao
+        inflacao.csv                         Data, Valor
+        taxas/<CODIGO>.csv                   Data, Valor (séries mensais do SGS, em % ao mês)
+
+    Qualquer arquivo pode ser substituído por um .parquet com as mesmas colunas (requer pyarrow).
+    Os arquivos são lidos uma única vez e recarregados apenas se forem modificados.
+    """
+    nome = 'arquivos'
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _ler(self, *partes):
+        """
+        Lê um arquivo do diretório (CSV ou Parquet), usando a versão em memória se não foi modificado.
+
+        Args:
+            *partes (str): Caminho relativo do arquivo, sem extensão.
+
+        Returns:
+            pd.DataFrame: Conteúdo do arquivo.
+
+        Raises:
+            DadosIndisponiveis: Se o arquivo não existir.
+        """
+        base = os.path.join(self.diretorio, *partes)
+        for extensao, leitor in (('.parquet', pd.read_parquet), ('.csv', pd.read_csv)):
+            caminho = base + extensao
+            try:
+                modificado_em = os.path.getmtime(caminho)
+            except OSError:
+                continue
+
+            with self._lock:
+                entrada = self._cache.get(caminho)
+            if entrada is not None and entrada[1] == modificado_em:
+                return entrada[0]
+
+            df = leitor(caminho)
+            with self._lock:
+                self._cache[caminho] = (df, modificado_em)
+            return df
+
+        raise DadosIndisponiveis(f'Arquivo {base}.csv/.parquet não encontrado')
+
+    def precos(self, ticker, inicio, fim, intervalo='1d'):
+        df = self._ler('precos', f'{ticker}_{intervalo}')
+        df = df.assign(Date=pd.to_datetime(df['Date'])).set_index('Date').reindex(columns=COLUNAS_PRECOS)
+        return df[(df.index >= pd.Timestamp(inicio)) & (df.index < pd.Timestamp(fim))]
+
+    def _possui_precos(self, ticker):
+        return any(
+            os.path.exists(os.path.join(self.diretorio, 'precos', f'{ticker}_{intervalo}{extensao}'))
+            for intervalo in ('1d', '1mo')
+            for extensao in ('.csv', '.parquet')
+        )
+
+    def _eventos(self, pasta, ticker, coluna):
+        try:
+            df = self._ler(pasta, ticker)
+        except DadosIndisponiveis:
+            if not self._possui_precos(ticker):
+                raise
+            # O ticker existe nos arquivos, mas não tem eventos desse tipo
+            return pd.Series(dtype=float, index=pd.DatetimeIndex([]), name=coluna)
+
+        return pd.Series(df[coluna].values, index=pd.to_datetime(df['Date']), name=coluna)
+
+    def dividendos(self, ticker):
+        return self._eventos('dividendos', ticker, 'Dividends')
+
+    def desdobramentos(self, ticker):
+        return self._eventos('desdobramentos', ticker, 'Stock Splits')
+
+    def metadados(self, ticker):
+        df = self._ler('metadados')
+        linhas = df[df['ticker'] == ticker]
+        if linhas.empty:
+            raise DadosIndisponiveis(f'Metadados de {ticker} não encontrados')
+
+        linha = linhas.iloc[0]
+        data_primeira_negociacao = linha.get('data_primeira_negociacao')
+        return {
+            'nome': None if pd.isna(linha.get('nome')) else linha.get('nome'),
+            'moeda': None if pd.isna(linha.get('moeda')) else linha.get('moeda'),
+            'bolsa': None if pd.isna(linha.get('bolsa')) else linha.get('bolsa'),
+            'data_primeira_negociacao': (
+                None if pd.isna(data_primeira_negociacao) else pd.Timestamp(data_primeira_negociacao).date()
+            ),
+        }
+
+    def _serie_mensal(self, *partes, inicio, fim):
+        df = self._ler(*partes)
+        df = df.assign(Data=pd.to_datetime(df['Data']))
+        return df[(df['Data'] >= pd.Timestamp(inicio)) & (df['Data'] <= pd.Timestamp(fim))][['Data', 'Valor']]
+
+    def inflacao(self, inicio, fim):
+        return self._serie_mensal('inflacao', inicio=inicio, fim=fim)
+
+    def taxa_mensal(self, codigo, inicio, fim):
+        return self._serie_mensal('taxas', str(codigo), inicio=inicio, fim=fim)
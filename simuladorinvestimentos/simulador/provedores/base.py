@@ -0,0 +1,115 @@
+# Colunas de preços no mesmo formato devolvido pelo yfinance
+COLUNAS_PRECOS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+class DadosIndisponiveis(Exception):
+    """
+    Indica que o provedor não possui os dados pedidos (ex.: ticker ausente nos arquivos locais).
+    """
+    pass
+
+
+class ProvedorDadosMercado:
+    """
+    Interface comum das fontes de dados de mercado (preços, câmbio, eventos corporativos, metadados, inflação e taxas).
+
+    Convenções:
+        - Pares de câmbio são tratados como tickers no formato do Yahoo (ex.: 'USDBRL=X') em precos().
+        - Um DataFrame vazio significa que não há pregões no intervalo (resposta válida).
+        - Falhas ou dados inexistentes no provedor levantam exceção, para que a cadeia tente o próximo.
+    """
+    nome = 'base'
+
+    def precos(self, ticker, inicio, fim, intervalo='1d'):
+        """
+        Obtém as barras OHLC de um ticker.
+
+        Args:
+            ticker (str): Ticker do ativo ou par de câmbio.
+            inicio (datetime.date): Data inicial.
+            fim (datetime.date): Data final (exclusiva).
+            intervalo (str, optional): Intervalo das barras ('1d' ou '1mo'). Default é '1d'.
+
+        Returns:
+            pd.DataFrame: DataFrame com as colunas de COLUNAS_PRECOS indexado por data (sem fuso horário).
+        """
+        raise NotImplementedError
+
+    def dividendos(self, ticker):
+        """
+        Obtém o histórico de dividendos por ação de um ticker.
+
+        Args:
+            ticker (str): Ticker do ativo.
+
+        Returns:
+            pd.Series: Valores dos dividendos indexados por data (sem fuso horário).
+        """
+        raise NotImplementedError
+
+    def desdobramentos(self, ticker):
+        """
+        Obtém o histórico de desdobramentos (e grupamentos) de um ticker.
+
+        Args:
+            ticker (str): Ticker do ativo.
+
+        Returns:
+            pd.Series: Razão de cada desdobramento (ex.: 4.0 para 1 ação virando 4) indexada por data (sem fuso horário).
+        """
+        raise NotImplementedError
+
+    def eventos(self, ticker):
+        """
+        Obtém dividendos e desdobramentos de um ticker; provedores que trazem os dois em uma única
+        consulta sobrescrevem este método.
+
+        Args:
+            ticker (str): Ticker do ativo.
+
+        Returns:
+            tuple: (dividendos, desdobramentos), no formato de dividendos() e desdobramentos().
+        """
+        return self.dividendos(ticker), self.desdobramentos(ticker)
+
+    def metadados(self, ticker):
+        """
+        Obtém os metadados de um ticker.
+
+        Args:
+            ticker (str): Ticker do ativo.
+
+        Returns:
+            dict: Dicionário com 'nome', 'moeda', 'bolsa' e 'data_primeira_negociacao'.
+        """
+        raise NotImplementedError
+
+    def inflacao(self, inicio, fim):
+        """
+        Obtém a variação mensal do IPCA.
+
+        Args:
+            inicio (datetime.date): Data inicial.
+            fim (datetime.date): Data final.
+
+        Returns:
+            pd.DataFrame: DataFrame com as colunas 'Data' e 'Valor'.
+        """
+        raise NotImplementedError
+
+    def taxa_mensal(self, codigo, inicio, fim):
+        """
+        Obtém uma série mensal de taxa (em % ao mês) do SGS, como o CDI (série 4391).
+
+        Args:
+            codigo (int): Código da série no SGS.
+            inicio (datetime.date): Data inicial.
+            fim (datetime.date): Data final.
+
+        Returns:
+            pd.DataFrame: DataFrame com as colunas 'Data' e 'Valor'.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.nome}>'
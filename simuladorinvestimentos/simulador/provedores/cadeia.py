@@ -0,0 +1,63 @@
+import logging
+
+from .base import ProvedorDadosMercado
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProvedorEmCadeia(ProvedorDadosMercado):
+    """
+    Provedor que consulta uma lista de provedores em ordem, passando ao próximo quando um deles falha.
+    """
+    nome = 'cadeia'
+
+    def __init__(self, provedores):
+        self.provedores = list(provedores)
+
+    def _consultar(self, metodo, *args):
+        """
+        Chama o mesmo método em cada provedor até que um deles responda.
+
+        Args:
+            metodo (str): Nome do método do provedor.
+            *args: Argumentos repassados ao método.
+
+        Returns:
+            object: Resposta do primeiro provedor que não falhou.
+
+        Raises:
+            Exception: A exceção do último provedor, se todos falharem.
+        """
+        erro = None
+        for provedor in self.provedores:
+            try:
+                return getattr(provedor, metodo)(*args)
+            except Exception as e:
+                logger.info(f'{provedor.nome} não atendeu {metodo}{args}: {e}')
+                erro = e
+        raise erro
+
+    def precos(self, ticker, inicio, fim, intervalo='1d'):
+        return self._consultar('precos', ticker, inicio, fim, intervalo)
+
+    def dividendos(self, ticker):
+        return self._consultar('dividendos', ticker)
+
+    def desdobramentos(self, ticker):
+        return self._consultar('desdobramentos', ticker)
+
+    def eventos(self, ticker):
+        return self._consultar('eventos', ticker)
+
+    def metadados(self, ticker):
+        return self._consultar('metadados', ticker)
+
+    def inflacao(self, inicio, fim):
+        return self._consultar('inflacao', inicio, fim)
+
+    def taxa_mensal(self, codigo, inicio, fim):
+        return self._consultar('taxa_mensal', codigo, inicio, fim)
+
+    def __repr__(self):
+        return f'<ProvedorEmCadeia {[provedor.nome for provedor in self.provedores]}>'
@@ -0,0 +1,92 @@
+import pandas as pd
+import yfinance as yf
+
+from bcb import sgs
+from datetime import datetime, timezone
+from yfinance.exceptions import YFPricesMissingError
+
+from .base import ProvedorDadosMercado, COLUNAS_PRECOS
+
+
+# Código do IPCA no SGS
+CODIGO_IPCA = 433
+
+
+class ProvedorYFinance(ProvedorDadosMercado):
+    """
+    Provedor que busca preços, dividendos e metadados no Yahoo Finance (yfinance) e a inflação e as taxas no SGS do BCB.
+    """
+    nome = 'yfinance'
+
+    def precos(self, ticker, inicio, fim, intervalo='1d'):
+        ativo = yf.Ticker(ticker)
+        try:
+            df = ativo.history(
+                start=inicio.strftime('%Y-%m-%d'),
+                end=fim.strftime('%Y-%m-%d'),
+                interval=intervalo,
+                auto_adjust=False,
+                actions=False,
+                raise_errors=True
+            )
+        except YFPricesMissingError:
+            # O yfinance levanta a mesma exceção para respostas nulas, com status_code (ex.: 429) ou sem 'result'.
+            # Só um gráfico válido (com metadados) e sem pregões no intervalo é tratado como vazio; nos demais
+            # casos a falha é propagada para que a cadeia de provedores ou a próxima chamada tente de novo.
+            if not ativo.get_history_metadata():
+                raise
+            return pd.DataFrame(columns=COLUNAS_PRECOS)
+
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        return df
+
+    def dividendos(self, ticker):
+        dividendos = yf.Ticker(ticker).dividends
+        if dividendos.index.tz is not None:
+            dividendos.index = dividendos.index.tz_localize(None)
+        return dividendos
+
+    def desdobramentos(self, ticker):
+        desdobramentos = yf.Ticker(ticker).splits
+        if desdobramentos.index.tz is not None:
+            desdobramentos.index = desdobramentos.index.tz_localize(None)
+        return desdobramentos
+
+    def eventos(self, ticker):
+        # Dividendos e desdobramentos vêm do mesmo histórico de ações corporativas (uma única consulta)
+        acoes = yf.Ticker(ticker).actions
+        if acoes.index.tz is not None:
+            acoes.index = acoes.index.tz_localize(None)
+        colunas = acoes.reindex(columns=['Dividends', 'Stock Splits']).fillna(0.0)
+        dividendos = colunas['Dividends']
+        desdobramentos = colunas['Stock Splits']
+        return dividendos[dividendos != 0], desdobramentos[desdobramentos != 0]
+
+    def metadados(self, ticker):
+        info = yf.Ticker(ticker).info
+
+        primeira_negociacao = info.get('firstTradeDateEpochUtc')
+        if primeira_negociacao is not None:
+            primeira_negociacao = datetime.fromtimestamp(primeira_negociacao, tz=timezone.utc).date()
+
+        return {
+            'nome': info.get('longName'),
+            'moeda': info.get('currency'),
+            'bolsa': info.get('exchange'),
+            'data_primeira_negociacao': primeira_negociacao,
+        }
+
+    def inflacao(self, inicio, fim):
+        df = sgs.get(CODIGO_IPCA, start=inicio.strftime('%Y-%m-%d'), end=fim.strftime('%Y-%m-%d'))
+
+        # Ajustar o DataFrame para ter duas colunas: Data e Valor
+        df = df.reset_index()
+        df.columns = ['Data', 'Valor']
+        return df
+
+    def taxa_mensal(self, codigo, inicio, fim):
+        df = sgs.get(codigo, start=inicio.strftime('%Y-%m-%d'), end=fim.strftime('%Y-%m-%d'))
+        df = df.reset_index()
+        df.columns = ['Data', 'Valor']
+        return df
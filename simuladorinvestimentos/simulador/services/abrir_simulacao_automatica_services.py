@@ -43,9 +43,16 @@ def processar_simulacao_automatica(simulacao_id):
                 'data_inicial': simulacao.data_inicial,
                 'data_final': simulacao.data_final,
                 'nome': simulacao.nome,
-                'ativos': ativos_info
+                'ativos': ativos_info,
+                'rebalanceamento': {
+                    'estrategia': simulacao.estrategia_rebalanceamento,
+                    'banda': simulacao.banda_rebalanceamento
+                },
+                'dividendos': simulacao.dividendos
             },
-            'resultado': df_resultado.to_dict(orient='records')  # Convertendo o DataFrame para formato JSON
+            'metricas': simulacao.metricas,
+            'resultado': df_resultado.to_dict(orient='records'),  # Convertendo o DataFrame para formato JSON
+            'benchmarks': simulacao.resultados_benchmarks
         }
 
         return resposta, 200
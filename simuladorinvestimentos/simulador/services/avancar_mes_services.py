@@ -1,9 +1,12 @@
 import json
-import yfinance as yf
 
 from django.shortcuts import get_object_or_404
 from dateutil.relativedelta import relativedelta
 
+from .precos_services import obter_precos
+from .cambio_services import taxa_cambio
+from .metadados_services import obter_metadados_em_lote
+from .eventos_services import obter_dividendos
 from ..models import SimulacaoManual
 from ..utils import arredondar_para_baixo
 
@@ -30,74 +33,45 @@ def avancar_mes(simulacao_id, user):
         moeda_base_carteira = carteira_manual.moeda_base
 
         ativos = carteira_manual.ativos.all()
+        metadados = obter_metadados_em_lote([ativo.ticker for ativo in ativos])
         for ativo in ativos:
             try:
-                # Obter informações do ativo do yfinance
-                yf_data = yf.Ticker(ativo.ticker)
-                info_ativo = yf_data.info
-                moeda_base_ativo = info_ativo.get('currency', None)
+                # Obter a moeda do ativo do cache de metadados
+                moeda_base_ativo = metadados[ativo.ticker]['moeda']
 
                 # Definir o intervalo do mês para buscar dados
                 inicio_mes = mes_atual.strftime('%Y-%m-%d')
                 fim_mes = novo_mes.strftime('%Y-%m-%d')
 
                 # Obter histórico de preços para o mês
-                historico_precos = yf_data.history(start=inicio_mes, end=fim_mes, interval="1d", auto_adjust=False)
-
-                # Processar dividendos
-                dividends = yf_data.dividends
-                if not dividends.empty:
-                    filtered_dividends = dividends[(dividends.index >= inicio_mes) & (dividends.index < fim_mes)]
-                    if not filtered_dividends.empty:
-                        dividend_value = filtered_dividends.sum() * ativo.posse
-
-                        # Converter dividendos se necessário
-                        if moeda_base_ativo and moeda_base_ativo != moeda_base_carteira:
-                            par_moedas = f"{moeda_base_ativo}{moeda_base_carteira}=X"
-                            conversao_moeda = yf.Ticker(par_moedas)
-                            historico_conversao = conversao_moeda.history(start=inicio_mes, end=fim_mes, interval="1d")
-
-                            if not historico_conversao.empty:
-                                taxa_conversao = historico_conversao['Close'].iloc[-1]
-                                dividend_value_convertido = dividend_value * taxa_conversao
-                            else:
-                                dividend_value_convertido = dividend_value
-                        else:
-                            dividend_value_convertido = dividend_value
-
-                        # Somar dividendos ao valor em dinheiro da carteira
-                        carteira_manual.valor_em_dinheiro += arredondar_para_baixo(dividend_value_convertido)
-                        carteira_manual.save()
-
-                # Processar histórico de preços do ativo
+                historico_precos = obter_precos(ativo.ticker, inicio_mes, fim_mes, intervalo='1d')
+
+                # Obter uma única vez a taxa de câmbio do mês (usada nos dividendos e no preço)
+                if moeda_base_ativo and moeda_base_ativo != moeda_base_carteira:
+                    taxa_conversao = taxa_cambio(moeda_base_ativo, moeda_base_carteira, inicio_mes, fim_mes) or 1
+                else:
+                    taxa_conversao = 1
+
+                # Processar dividendos do mês, lidos do armazém de eventos corporativos
+                filtered_dividends = obter_dividendos(ativo.ticker, inicio_mes, fim_mes)
+                if not filtered_dividends.empty:
+                    dividend_value = filtered_dividends.sum() * ativo.posse
+
+                    # Converter dividendos se necessário
+                    dividend_value_convertido = dividend_value * taxa_conversao
+
+                    # Somar dividendos ao valor em dinheiro da carteira
+                    carteira_manual.valor_em_dinheiro += arredondar_para_baixo(dividend_value_convertido)
+                    carteira_manual.save()
+
+                # Último fechamento do mês (as barras ficam no armazém compartilhado, não no ativo)
                 if not historico_precos.empty:
-                    precos = ativo.precos if ativo.precos else {}
-                    for index, row in historico_precos.iterrows():
-                        data_preco = index.strftime('%Y-%m-%d')
-                        precos[data_preco] = {
-                            'open': float(row['Open']),
-                            'high': float(row['High']),
-                            'low': float(row['Low']),
-                            'close': float(row['Close'])
-                        }
-                    ativo.precos = precos
                     preco_mes_atual = historico_precos['Close'].iloc[-1]
                 else:
                     preco_mes_atual = ativo.ultimo_preco_convertido or 0
 
                 # Converter preço se necessário
-                if moeda_base_ativo and moeda_base_ativo != moeda_base_carteira:
-                    par_moedas = f"{moeda_base_ativo}{moeda_base_carteira}=X"
-                    conversao_moeda = yf.Ticker(par_moedas)
-                    historico_conversao = conversao_moeda.history(start=inicio_mes, end=fim_mes, interval="1d")
-
-                    if not historico_conversao.empty:
-                        taxa_conversao = historico_conversao['Close'].iloc[-1]
-                        preco_mes_atual_convertido = preco_mes_atual * taxa_conversao
-                    else:
-                        preco_mes_atual_convertido = preco_mes_atual
-                else:
-                    preco_mes_atual_convertido = preco_mes_atual
+                preco_mes_atual_convertido = preco_mes_atual * taxa_conversao
 
                 preco_mes_atual_convertido = arredondar_para_baixo(preco_mes_atual_convertido)
                 ativo.ultimo_preco_convertido = preco_mes_atual_convertido
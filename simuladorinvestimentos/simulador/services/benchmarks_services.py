@@ -0,0 +1,226 @@
+import logging
+import numpy as np
+
+from dateutil.relativedelta import relativedelta
+
+from .precos_services import garantir_precos_em_lote
+from .cambio_services import ticker_par, ler_precos_convertidos
+from .metadados_services import obter_metadados_em_lote, obter_metadados
+from .taxas_services import obter_taxa_mensal
+from .metricas_services import retornos_mensais, calcular_metricas, resumir_metricas
+from .motor_simulacao_services import simular_variantes
+from ..utils import arredondar_para_baixo
+
+
+logger = logging.getLogger(__name__)
+
+# Referências aceitas além de tickers: 'ipca' e séries mensais do SGS no formato 'sgs:<código>' (ex.: 'sgs:4391', CDI)
+BENCHMARK_IPCA = 'ipca'
+PREFIXO_SGS = 'sgs:'
+
+
+def validar_benchmarks(benchmarks):
+    """
+    Normaliza a lista de referências de comparação de uma simulação automática.
+
+    Args:
+        benchmarks (list ou str): Referências ('ipca', 'sgs:<código>' ou ticker); uma string pode separá-las por vírgula.
+
+    Returns:
+        list: Referências sem repetições, na ordem dada.
+
+    Raises:
+        ValueError: Se alguma referência for inválida.
+    """
+    if not benchmarks:
+        return []
+    if isinstance(benchmarks, str):
+        benchmarks = benchmarks.split(',')
+    if not isinstance(benchmarks, (list, tuple)):
+        raise ValueError('Os benchmarks devem ser uma lista.')
+
+    normalizados = []
+    for benchmark in benchmarks:
+        if not isinstance(benchmark, str) or not benchmark.strip():
+            raise ValueError(f'Benchmark inválido: {benchmark}')
+        benchmark = benchmark.strip()
+        if benchmark.lower() == BENCHMARK_IPCA:
+            benchmark = BENCHMARK_IPCA
+        elif benchmark.lower().startswith(PREFIXO_SGS):
+            codigo = benchmark[len(PREFIXO_SGS):]
+            if not codigo.isdigit():
+                raise ValueError(f'Código SGS inválido: {benchmark}')
+            benchmark = f'{PREFIXO_SGS}{int(codigo)}'
+        else:
+            benchmark = benchmark.upper()
+        normalizados.append(benchmark)
+
+    return list(dict.fromkeys(normalizados))
+
+
+def _indice_de_taxas(taxas):
+    """
+    Converte taxas mensais (em %) em um índice que funciona como preço: o valor ao fim de cada mês.
+
+    Um mês sem dado depois do início da série (atraso na publicação, lacuna ou fim da série) rende 0% e o
+    índice repete o nível anterior; só os meses antes do primeiro dado ficam sem preço.
+
+    Args:
+        taxas (np.ndarray): Taxa de cada mês, em %; NaN nos meses sem dado.
+
+    Returns:
+        np.ndarray: Índice acumulado, 0 nos meses anteriores ao primeiro dado.
+    """
+    indice = np.cumprod(1 + np.nan_to_num(taxas) / 100)
+    return np.where(np.cumsum(~np.isnan(taxas)) > 0, indice, 0.0)
+
+
+def montar_precos_benchmarks(simulacao, dados, benchmarks):
+    """
+    Alinha as referências em uma matriz de preços (meses x referências) na moeda da carteira.
+
+    Índices e taxas viram um índice acumulado; tickers usam o 'Adj Close' mensal do armazém compartilhado,
+    baixado apenas se ausente. Meses sem dado depois do início de uma série repetem o último nível; antes do
+    início, e em referências sem dados, o preço é zero (o aporte fica em caixa).
+
+    Args:
+        simulacao (SimulacaoAutomatica): Objeto da simulação automática.
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        benchmarks (list): Referências normalizadas por validar_benchmarks.
+
+    Returns:
+        np.ndarray: Preços (meses x referências).
+    """
+    datas_validas = dados['datas_validas']
+    precos = np.zeros((len(datas_validas), len(benchmarks)))
+    if len(datas_validas) == 0 or not benchmarks:
+        return precos
+
+    moeda_carteira = simulacao.carteira_automatica.moeda_base
+    inicio = simulacao.data_inicial
+    fim = simulacao.data_final + relativedelta(months=1)
+
+    tickers = [
+        benchmark for benchmark in benchmarks
+        if benchmark != BENCHMARK_IPCA and not benchmark.startswith(PREFIXO_SGS)
+    ]
+    moedas = {}
+    if tickers:
+        try:
+            metadados = obter_metadados_em_lote(tickers)
+        except Exception:
+            # Um ticker desconhecido não impede a comparação com os demais
+            metadados = {}
+            for ticker in tickers:
+                try:
+                    metadados[ticker] = obter_metadados(ticker)
+                except Exception as e:
+                    logger.warning(f'Benchmark {ticker} ignorado: {e}')
+        moedas = {ticker: dados_ticker['moeda'] or 'USD' for ticker, dados_ticker in metadados.items()}
+        pares_cambio = {ticker_par(moeda, moeda_carteira) for moeda in moedas.values() if moeda != moeda_carteira}
+        garantir_precos_em_lote(list(moedas) + list(pares_cambio), inicio, fim, intervalo='1mo')
+
+    for coluna, benchmark in enumerate(benchmarks):
+        if benchmark == BENCHMARK_IPCA:
+            taxas = dados['ipca_data']['Valor'].reindex(datas_validas).to_numpy(dtype=float)
+            precos[:, coluna] = _indice_de_taxas(taxas)
+        elif benchmark.startswith(PREFIXO_SGS):
+            codigo = int(benchmark[len(PREFIXO_SGS):])
+            taxas = obter_taxa_mensal(codigo, datas_validas[0], datas_validas[-1]).reindex(datas_validas)
+            precos[:, coluna] = _indice_de_taxas(taxas.to_numpy(dtype=float))
+        elif benchmark in moedas:
+            serie = ler_precos_convertidos(benchmark, moedas[benchmark], moeda_carteira, inicio, fim, intervalo='1mo')
+            serie.index = serie.index.to_period('M').start_time
+            # Meses sem barra repetem o último preço; só os anteriores ao início da série ficam sem preço
+            precos[:, coluna] = serie.reindex(datas_validas).ffill().fillna(0.0).to_numpy(dtype=float)
+
+    return precos
+
+
+def calcular_benchmarks(simulacao, dados, valores, aportes, aplicacao_inicial):
+    """
+    Simula os mesmos aportes da carteira investidos em cada referência, todas de uma vez no motor vetorizado,
+    e compara cada curva com a carteira.
+
+    Args:
+        simulacao (SimulacaoAutomatica): Objeto da simulação automática, com a lista 'benchmarks'.
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        valores (array-like): Valor total da carteira em cada mês.
+        aportes (array-like): Aporte corrigido de cada mês.
+        aplicacao_inicial (float): Aplicação inicial corrigida.
+
+    Returns:
+        list: Para cada referência, a série mensal ('resultado'), o valor final, as métricas da curva e as
+        métricas relativas da carteira ('excesso_cagr', 'tracking_error', 'information_ratio', 'beta' e 'correlacao').
+    """
+    benchmarks = simulacao.benchmarks or []
+    datas_validas = dados['datas_validas']
+    if not benchmarks or len(datas_validas) == 0:
+        return []
+
+    precos = montar_precos_benchmarks(simulacao, dados, benchmarks)
+    n_benchmarks = len(benchmarks)
+    aportes = np.asarray(aportes, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+
+    # Cada referência é uma variante com todo o peso em uma única coluna
+    resultado = simular_variantes(
+        precos,
+        precos > 0,
+        pesos=np.eye(n_benchmarks),
+        aportes=np.broadcast_to(aportes, (n_benchmarks, len(aportes))),
+        aplicacao_inicial=np.full(n_benchmarks, float(aplicacao_inicial))
+    )
+    curvas = resultado['valor']
+
+    inflacao = dados['ipca_data'].loc[datas_validas, 'Valor'].to_numpy(dtype=float) / 100
+    metricas = calcular_metricas(curvas, aportes, np.full(n_benchmarks, float(aplicacao_inicial)), inflacao=inflacao)
+    metricas_carteira = calcular_metricas(valores, aportes, float(aplicacao_inicial))
+
+    # Métricas relativas, calculadas sobre os retornos mensais de todas as curvas ao mesmo tempo
+    retornos_carteira = retornos_mensais(valores, aportes, aplicacao_inicial)
+    retornos = retornos_mensais(curvas, aportes, np.full(n_benchmarks, float(aplicacao_inicial)))
+    diferencas = retornos_carteira[None, :] - retornos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if len(datas_validas) > 1:
+            tracking_error = np.std(diferencas, axis=1, ddof=1) * np.sqrt(12)
+            centrados = retornos - retornos.mean(axis=1, keepdims=True)
+            centrado_carteira = retornos_carteira - retornos_carteira.mean()
+            covariancias = centrados @ centrado_carteira / (len(datas_validas) - 1)
+            variancias = np.var(retornos, axis=1, ddof=1)
+            beta = np.where(variancias > 1e-18, covariancias / variancias, np.nan)
+            desvio_carteira = np.std(retornos_carteira, ddof=1)
+            correlacao = np.where(
+                (variancias > 1e-18) & (desvio_carteira > 1e-9), covariancias / (np.sqrt(variancias) * desvio_carteira), np.nan
+            )
+        else:
+            tracking_error = beta = correlacao = np.full(n_benchmarks, np.nan)
+        excesso_cagr = metricas_carteira['cagr'] - metricas['cagr']
+        information_ratio = np.where(tracking_error > 1e-12, excesso_cagr / tracking_error, np.nan)
+
+    relativas = {
+        'excesso_cagr': excesso_cagr,
+        'tracking_error': tracking_error,
+        'information_ratio': information_ratio,
+        'beta': beta,
+        'correlacao': correlacao,
+    }
+
+    datas = datas_validas.strftime('%Y-%m-%d')
+    curvas_arredondadas = arredondar_para_baixo(curvas)
+    # Referências sem nenhum preço no período (ex.: ticker inexistente) não têm métricas
+    disponiveis = precos.any(axis=0)
+    return [
+        {
+            'benchmark': benchmark,
+            'disponivel': bool(disponiveis[indice]),
+            'valor_final': float(curvas_arredondadas[indice, -1]),
+            'diferenca_valor_final': float(arredondar_para_baixo(valores[-1] - curvas[indice, -1])),
+            'metricas': resumir_metricas(metricas, indice) if disponiveis[indice] else None,
+            'relativas': resumir_metricas(relativas, indice) if disponiveis[indice] else None,
+            'resultado': [
+                {'Data': data, 'Valor': valor} for data, valor in zip(datas, curvas_arredondadas[indice].tolist())
+            ],
+        }
+        for indice, benchmark in enumerate(benchmarks)
+    ]
@@ -1,11 +1,12 @@
-import yfinance as yf
 from datetime import timedelta
 from typing import Tuple, Dict, Union, Optional
 
 from django.shortcuts import get_object_or_404
 
+from .precos_services import garantir_precos
+from .metadados_services import obter_metadados
 from ..utils import arredondar_para_baixo
-from ..models import SimulacaoManual, Ativo
+from ..models import SimulacaoManual, Ativo, SeriePrecos, BarraPreco
 
 
 def processar_compra_venda(
@@ -61,26 +62,16 @@ def processar_compra_venda(
             data_fim = mes_atual + timedelta(days=1)
 
             try:
-                historico_precos = yf.download(
-                    ticker,
-                    start=data_inicio.strftime('%Y-%m-%d'),
-                    end=data_fim.strftime('%Y-%m-%d'),
-                    auto_adjust=False,
-                    actions=True
-                )
-
-                if historico_precos.empty:
+                # Os preços ficam no armazém compartilhado; o ativo só referencia a série diária
+                garantir_precos(ticker, data_inicio, data_fim, intervalo='1d')
+                possui_precos = BarraPreco.objects.filter(
+                    ticker=ticker, intervalo='1d', data__gte=data_inicio.date(), data__lt=data_fim.date()
+                ).exists()
+
+                if not possui_precos:
                     return {'error': f'Histórico de preços não disponível para {ticker}.'}, 404
 
-                precos = {
-                    str(index.date()): {
-                        'open': float(row['Open']),
-                        'high': float(row['High']),
-                        'low': float(row['Low']),
-                        'close': float(row['Close'])
-                    }
-                    for index, row in historico_precos.iterrows()
-                }
+                serie_precos = SeriePrecos.objects.filter(ticker=ticker, intervalo='1d').first()
             except Exception as e:
                 return {'error': f'Erro ao obter dados do ativo {ticker}: {str(e)}'}, 400
 
@@ -108,7 +99,8 @@ def processar_compra_venda(
                         nome=ticker,
                         peso=0.0,
                         posse=quantidade_comprada,
-                        precos=precos,
+                        serie_precos=serie_precos,
+                        moeda=obter_metadados(ticker)['moeda'],
                         ultimo_preco_convertido=preco_convertido,
                         data_lancamento=None
                     )
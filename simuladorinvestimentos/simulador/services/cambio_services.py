@@ -0,0 +1,209 @@
+import time
+import threading
+import pandas as pd
+
+from django.conf import settings
+
+from .precos_services import obter_precos, ler_precos, para_data, inicio_periodo_aberto
+from ..utils import arredondar_para_baixo
+
+
+# Moeda usada para triangular pares que não existem no Yahoo (ex.: EUR -> BRL via USD)
+MOEDA_PIVO = 'USD'
+
+# Cache em memória (por processo) das séries já resolvidas: (base, cotacao, intervalo) -> entrada
+_memoria = {}
+# Rota que funcionou para cada par: 'direta', 'inversa' ou 'triangulada'
+_rotas = {}
+_lock = threading.Lock()
+_contadores = {'acertos_memoria': 0, 'leituras_armazem': 0}
+
+
+def ticker_par(base, cotacao):
+    """
+    Retorna o ticker do Yahoo para um par de moedas.
+
+    Args:
+        base (str): Moeda de origem (ex.: 'USD').
+        cotacao (str): Moeda de destino (ex.: 'BRL').
+
+    Returns:
+        str: Ticker do par (ex.: 'USDBRL=X').
+    """
+    return f"{base}{cotacao}=X"
+
+
+def _serie_par(base, cotacao, inicio, fim, intervalo):
+    df = obter_precos(ticker_par(base, cotacao), inicio, fim, intervalo)
+    return df['Close'].dropna()
+
+
+def _resolver(base, cotacao, inicio, fim, intervalo):
+    """
+    Resolve a série de câmbio de um par pela cotação direta, pela inversa ou por triangulação.
+
+    Args:
+        base (str): Moeda de origem.
+        cotacao (str): Moeda de destino.
+        inicio (datetime.date): Data inicial.
+        fim (datetime.date): Data final (exclusiva).
+        intervalo (str): Intervalo das barras.
+
+    Returns:
+        pd.Series: Taxas de câmbio (quantas unidades de 'cotacao' valem uma unidade de 'base').
+    """
+    rota = _rotas.get((base, cotacao))
+
+    if rota in (None, 'direta'):
+        serie = _serie_par(base, cotacao, inicio, fim, intervalo)
+        if not serie.empty:
+            _rotas[(base, cotacao)] = 'direta'
+            return serie
+
+    if rota in (None, 'inversa'):
+        serie = _serie_par(cotacao, base, inicio, fim, intervalo)
+        if not serie.empty:
+            _rotas[(base, cotacao)] = 'inversa'
+            return 1 / serie
+
+    if rota in (None, 'triangulada') and MOEDA_PIVO not in (base, cotacao):
+        ate_pivo = _resolver(base, MOEDA_PIVO, inicio, fim, intervalo)
+        do_pivo = _resolver(MOEDA_PIVO, cotacao, inicio, fim, intervalo)
+        if not ate_pivo.empty and not do_pivo.empty:
+            datas = ate_pivo.index.union(do_pivo.index)
+            serie = (ate_pivo.reindex(datas).ffill() * do_pivo.reindex(datas).ffill()).dropna()
+            _rotas[(base, cotacao)] = 'triangulada'
+            return serie
+
+    return pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+
+
+def serie_cambio(base, cotacao, inicio, fim, intervalo='1d'):
+    """
+    Obtém a série de câmbio de um par, compartilhada entre todas as requisições do processo.
+
+    A série fica em memória e é persistida no armazém de preços; apenas as datas ausentes são baixadas.
+
+    Args:
+        base (str): Moeda de origem.
+        cotacao (str): Moeda de destino.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras. Default é '1d'.
+
+    Returns:
+        pd.Series: Taxas de câmbio indexadas por data.
+    """
+    inicio = para_data(inicio)
+    fim = para_data(fim)
+    chave = (base, cotacao, intervalo)
+    ttl = getattr(settings, 'PRECOS_TTL_PERIODO_ABERTO', 900)
+
+    with _lock:
+        entrada = _memoria.get(chave)
+
+    if entrada is not None:
+        serie, inicio_memoria, fim_memoria, carregado_em = entrada
+        fechado = fim_memoria <= inicio_periodo_aberto(intervalo) or time.monotonic() - carregado_em < ttl
+        if inicio_memoria <= inicio and fim <= fim_memoria and fechado:
+            with _lock:
+                _contadores['acertos_memoria'] += 1
+            return serie[(serie.index >= pd.Timestamp(inicio)) & (serie.index < pd.Timestamp(fim))]
+
+        # Amplia o trecho em memória para que a série continue contígua
+        inicio = min(inicio, inicio_memoria)
+        fim = max(fim, fim_memoria)
+
+    serie = _resolver(base, cotacao, inicio, fim, intervalo)
+    with _lock:
+        _contadores['leituras_armazem'] += 1
+        # Séries vazias (ex.: falha no download) não ficam em memória, para serem tentadas de novo
+        if not serie.empty:
+            _memoria[chave] = (serie, inicio, fim, time.monotonic())
+
+    return serie[(serie.index >= pd.Timestamp(inicio)) & (serie.index < pd.Timestamp(fim))]
+
+
+def taxa_cambio(base, cotacao, inicio, fim, intervalo='1d'):
+    """
+    Retorna a última taxa de câmbio disponível em [inicio, fim).
+
+    Args:
+        base (str): Moeda de origem.
+        cotacao (str): Moeda de destino.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras. Default é '1d'.
+
+    Returns:
+        float ou None: Última taxa do período (1.0 se as moedas forem iguais), ou None se não houver dados.
+    """
+    if base == cotacao:
+        return 1.0
+
+    serie = serie_cambio(base, cotacao, inicio, fim, intervalo)
+    return float(serie.iloc[-1]) if not serie.empty else None
+
+
+def converter_precos(precos, base, cotacao, inicio, fim, intervalo='1d'):
+    """
+    Converte uma série de preços para outra moeda, usando a taxa da mesma data (ou a anterior mais próxima).
+
+    Args:
+        precos (pd.Series): Preços indexados por data.
+        base (str): Moeda dos preços.
+        cotacao (str): Moeda de destino.
+        inicio (str, date ou datetime): Data inicial da série de câmbio.
+        fim (str, date ou datetime): Data final (exclusiva) da série de câmbio.
+        intervalo (str, optional): Intervalo das barras. Default é '1d'.
+
+    Returns:
+        pd.Series: Preços convertidos.
+    """
+    if base == cotacao:
+        return precos
+
+    serie = serie_cambio(base, cotacao, inicio, fim, intervalo)
+    return precos * serie.reindex(precos.index, method='ffill')
+
+
+def ler_precos_convertidos(ticker, moeda_ativo, moeda_destino, inicio, fim, intervalo='1mo', coluna='Adj Close'):
+    """
+    Lê do armazém uma coluna de preços (por padrão o 'Adj Close') de um ticker já convertida para a moeda de destino.
+
+    Meses sem preço recebem o preço anterior (ou 0 antes do primeiro), e os valores são arredondados
+    para baixo antes e depois da conversão, como na montagem original das carteiras automáticas.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        moeda_ativo (str): Moeda em que o ativo é negociado.
+        moeda_destino (str): Moeda da carteira.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras. Default é '1mo'.
+        coluna (str, optional): Coluna de COLUNAS_PRECOS. Default é 'Adj Close'.
+
+    Returns:
+        pd.Series: Preços convertidos, indexados por data.
+    """
+    precos = ler_precos(ticker, inicio, fim, intervalo)[coluna]
+    precos = arredondar_para_baixo(precos.ffill().fillna(0))
+
+    if moeda_ativo != moeda_destino:
+        precos = arredondar_para_baixo(converter_precos(precos, moeda_ativo, moeda_destino, inicio, fim, intervalo))
+
+    return precos
+
+
+def estatisticas_cambio():
+    """
+    Retorna os contadores do cache de câmbio deste processo.
+
+    Returns:
+        dict: Contadores do cache, pares em memória e rotas resolvidas.
+    """
+    with _lock:
+        estatisticas = dict(_contadores)
+        estatisticas['pares_em_memoria'] = len(_memoria)
+        estatisticas['rotas'] = {f'{base}{cotacao}': rota for (base, cotacao), rota in _rotas.items()}
+    return estatisticas
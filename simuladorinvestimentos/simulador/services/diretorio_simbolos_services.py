@@ -0,0 +1,218 @@
+import time
+import bisect
+import difflib
+import threading
+import unicodedata
+
+from datetime import date, timedelta
+
+from django.conf import settings
+
+from ..models import MetadadosAtivo
+from ..provedores import DadosIndisponiveis
+from .metadados_services import obter_metadados
+from .precos_services import obter_precos, DATA_MINIMA
+
+
+# Índice em memória (por processo), reconstruído a partir da tabela MetadadosAtivo
+_indice = {
+    'simbolos': {},     # TICKER -> entrada
+    'tickers': [],      # tickers em ordem alfabética, para a busca por prefixo
+    'palavras': [],     # palavras dos nomes em ordem alfabética, para a busca por prefixo e aproximada
+    'por_palavra': {},  # palavra -> lista de TICKERS cujo nome a contém
+    'nomes': {},        # TICKER -> palavras do nome
+    'carregado_em': None,
+}
+_lock = threading.Lock()
+
+
+def _palavras(texto):
+    """
+    Separa um texto em palavras normalizadas: sem acentos, sem pontuação e em minúsculas.
+
+    Args:
+        texto (str): Texto original.
+
+    Returns:
+        tuple: Palavras do texto.
+    """
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(
+        caractere if caractere.isalnum() else ' '
+        for caractere in texto if not unicodedata.combining(caractere)
+    )
+    return tuple(texto.lower().split())
+
+
+def _entrada(ticker, nome, moeda, bolsa, data_primeira_negociacao):
+    return {
+        'ticker': ticker,
+        'nome': nome,
+        'moeda': moeda,
+        'bolsa': bolsa,
+        'data_primeira_negociacao': data_primeira_negociacao,
+    }
+
+
+def _carregar_indice():
+    """
+    Reconstrói o índice com todos os símbolos válidos da tabela (com nome e data da primeira negociação).
+    """
+    linhas = MetadadosAtivo.objects.filter(
+        nome__isnull=False, data_primeira_negociacao__isnull=False
+    ).values_list('ticker', 'nome', 'moeda', 'bolsa', 'data_primeira_negociacao')
+
+    simbolos = {}
+    por_palavra = {}
+    nomes = {}
+    for linha in linhas:
+        entrada = _entrada(*linha)
+        chave = entrada['ticker'].upper()
+        simbolos[chave] = entrada
+        nomes[chave] = _palavras(entrada['nome'])
+        for palavra in set(nomes[chave]):
+            por_palavra.setdefault(palavra, []).append(chave)
+
+    with _lock:
+        _indice['simbolos'] = simbolos
+        _indice['tickers'] = sorted(simbolos)
+        _indice['palavras'] = sorted(por_palavra)
+        _indice['por_palavra'] = por_palavra
+        _indice['nomes'] = nomes
+        _indice['carregado_em'] = time.monotonic()
+
+
+def _indice_atual():
+    """
+    Retorna o índice em memória, recarregando-o da tabela a cada SIMBOLOS_TTL_MEMORIA segundos.
+
+    Returns:
+        dict: Índice de símbolos.
+    """
+    with _lock:
+        carregado_em = _indice['carregado_em']
+    if carregado_em is None or time.monotonic() - carregado_em >= getattr(settings, 'SIMBOLOS_TTL_MEMORIA', 300):
+        _carregar_indice()
+    return _indice
+
+
+def _adicionar_ao_indice(entrada):
+    chave = entrada['ticker'].upper()
+    palavras = _palavras(entrada['nome'])
+    with _lock:
+        if chave not in _indice['simbolos']:
+            bisect.insort(_indice['tickers'], chave)
+            for palavra in set(palavras):
+                if palavra not in _indice['por_palavra']:
+                    bisect.insort(_indice['palavras'], palavra)
+                _indice['por_palavra'].setdefault(palavra, []).append(chave)
+            _indice['nomes'][chave] = palavras
+        _indice['simbolos'][chave] = entrada
+
+
+def _com_prefixo(lista, prefixo):
+    """
+    Percorre, em uma lista ordenada, os itens que começam com o prefixo (busca binária).
+
+    Args:
+        lista (list): Lista ordenada de strings.
+        prefixo (str): Prefixo buscado.
+
+    Yields:
+        str: Itens que começam com o prefixo, em ordem alfabética.
+    """
+    posicao = bisect.bisect_left(lista, prefixo)
+    while posicao < len(lista) and lista[posicao].startswith(prefixo):
+        yield lista[posicao]
+        posicao += 1
+
+
+def consultar_simbolo(ticker):
+    """
+    Consulta um ticker no diretório de símbolos, indo à rede apenas se ele ainda não for conhecido.
+
+    Um ticker desconhecido só é adicionado ao diretório se tiver nome e histórico de preços.
+
+    Args:
+        ticker (str): Ticker do ativo.
+
+    Returns:
+        dict ou None: Entrada do diretório (ticker, nome, moeda, bolsa, data_primeira_negociacao),
+        ou None se o ticker não existir.
+    """
+    entrada = _indice_atual()['simbolos'].get(ticker.upper())
+    if entrada is not None:
+        return entrada
+
+    try:
+        metadados = obter_metadados(ticker)
+    except DadosIndisponiveis:
+        return None
+    if not metadados['nome']:
+        return None
+
+    data_primeira_negociacao = metadados['data_primeira_negociacao']
+    if data_primeira_negociacao is None:
+        # O provedor não informou a data: usa a primeira barra mensal do histórico
+        historico = obter_precos(ticker, DATA_MINIMA, date.today() + timedelta(days=1), intervalo='1mo')
+        if historico.empty:
+            return None
+        data_primeira_negociacao = historico.index[0].date()
+        MetadadosAtivo.objects.filter(ticker=ticker).update(data_primeira_negociacao=data_primeira_negociacao)
+
+    entrada = _entrada(ticker, metadados['nome'], metadados['moeda'], metadados['bolsa'], data_primeira_negociacao)
+    _adicionar_ao_indice(entrada)
+    return entrada
+
+
+def buscar_simbolos(termo, limite=10):
+    """
+    Busca símbolos no diretório local, sem acessar a rede.
+
+    Os resultados vêm em ordem de relevância: tickers que começam com o termo, nomes com palavras
+    que começam com as palavras do termo e, por último, nomes com palavras parecidas (busca aproximada).
+
+    Args:
+        termo (str): Início do ticker ou parte do nome do ativo.
+        limite (int, optional): Número máximo de resultados. Default é 10.
+
+    Returns:
+        list: Lista de entradas do diretório.
+    """
+    indice = _indice_atual()
+    termo_ticker = termo.strip().upper()
+    termos = _palavras(termo)
+    if not termo_ticker:
+        return []
+
+    encontrados = {}  # dicionário usado como conjunto ordenado
+
+    # Prefixo do ticker
+    for ticker in _com_prefixo(indice['tickers'], termo_ticker):
+        if len(encontrados) >= limite:
+            break
+        encontrados[ticker] = True
+
+    def contem_termos(ticker):
+        return all(any(palavra.startswith(termo) for palavra in indice['nomes'][ticker]) for termo in termos)
+
+    # Palavras do nome: candidatos pela palavra mais longa do termo, filtrados pelas demais
+    if len(encontrados) < limite and termos:
+        principal = max(termos, key=len)
+        for palavra in _com_prefixo(indice['palavras'], principal):
+            for ticker in indice['por_palavra'][palavra]:
+                if len(encontrados) < limite and ticker not in encontrados and contem_termos(ticker):
+                    encontrados[ticker] = True
+            if len(encontrados) >= limite:
+                break
+
+    # Busca aproximada (erros de digitação), apenas entre palavras com a mesma inicial
+    if len(encontrados) < limite and termos and len(max(termos, key=len)) >= 4:
+        principal = max(termos, key=len)
+        candidatas = list(_com_prefixo(indice['palavras'], principal[0]))
+        for palavra in difflib.get_close_matches(principal, candidatas, n=limite, cutoff=0.75):
+            for ticker in indice['por_palavra'][palavra]:
+                if len(encontrados) < limite:
+                    encontrados.setdefault(ticker, True)
+
+    return [indice['simbolos'][ticker] for ticker in encontrados]
@@ -1,10 +1,10 @@
-import json
-import yfinance as yf
-
+from django.db.models import Min
 from dateutil.relativedelta import relativedelta
 
-from ..utils import arredondar_para_baixo
-from ..models import CarteiraAutomatica, SimulacaoAutomatica, Ativo
+from .precos_services import garantir_precos_em_lote
+from .cambio_services import ticker_par
+from .metadados_services import obter_metadados_em_lote
+from ..models import CarteiraAutomatica, SimulacaoAutomatica, Ativo, SeriePrecos, BarraPreco
 
 
 def enviar_ativos_para_carteira(data):
@@ -34,69 +34,64 @@ def enviar_ativos_para_carteira(data):
         return {'error': 'SimulacaoAutomatica not found'}, 404
 
     moeda_carteira = carteira_automatica.moeda_base
-
-    # Dicionário para armazenar as taxas de câmbio baixadas
-    cambio_cache = {}
-
+    # Um ticker repetido vira um único ativo com a soma dos pesos (mesmos preços, mesmo resultado): os serviços
+    # que decompõem o resultado por ativo (contribuições, repesagem, otimização) indexam as colunas pelo ticker
+    pesos = {}
     for item in data['ativos']:
-        ticker = item['ticker']
-        peso = item['peso']
-
-        # Obtendo informações do ativo
-        ativo_info = yf.Ticker(ticker).info
-        nome = ativo_info.get('longName', ticker)
-        moeda_ativo = ativo_info.get('currency', 'USD')
-
-        # Converter strings de data em objetos datetime
-        data_inicial = simulacao_automatica.data_inicial
-        data_final = simulacao_automatica.data_final
-
-        # Adicionar 1 mês à data final para incluir o último mês na simulação
-        data_final_inclusiva = data_final + relativedelta(months=1)
-
-        # Pegar preços dos ativos incluindo o mês final
-        precos_df = yf.download(ticker, start=data_inicial, end=data_final_inclusiva, interval='1mo')
+        pesos[item['ticker']] = pesos.get(item['ticker'], 0) + item['peso']
+    itens = list(pesos.items())
+    tickers = list(pesos)
 
-        # Substituir NaN pelo preço do mês anterior (forward fill)
-        precos_df['Adj Close'] = precos_df['Adj Close'].ffill()
+    # Converter strings de data em objetos datetime
+    data_inicial = simulacao_automatica.data_inicial
+    data_final = simulacao_automatica.data_final
 
-        # Se ainda houver NaN após o ffill, substitua por 0
-        precos_df['Adj Close'] = arredondar_para_baixo(precos_df['Adj Close'].fillna(0))
+    # Adicionar 1 mês à data final para incluir o último mês na simulação
+    data_final_inclusiva = data_final + relativedelta(months=1)
 
-        # Pegar a data de início de negociação do ativo
-        data_lancamento = precos_df.index.min().date() if not precos_df.empty else None
-
-        # Se a moeda do ativo for diferente da moeda da carteira, faça a conversão
-        if moeda_ativo != moeda_carteira:
-            # Verificar se o câmbio já está no cache
-            if moeda_ativo in cambio_cache:
-                cambio_df = cambio_cache[moeda_ativo]
-            else:
-                cambio_ticker = f"{moeda_ativo}{moeda_carteira}=X"
-                cambio_df = yf.download(cambio_ticker, start=data_inicial, end=data_final_inclusiva, interval='1mo')
-                cambio_cache[moeda_ativo] = cambio_df  # Armazenar no cache
-
-            # Garantindo que a data do câmbio corresponde à data dos preços do ativo
-            cambio_df = cambio_df.reindex(precos_df.index, method='ffill')
-
-            # Convertendo preços para a moeda da carteira
-            precos_df['Adj Close'] = arredondar_para_baixo(precos_df['Adj Close'] * cambio_df['Adj Close'])
-
-        # Converter DataFrame para lista de dicionários com datas como strings
-        precos = precos_df.reset_index().to_dict(orient='records')
-        for preco in precos:
-            preco['Date'] = preco['Date'].isoformat()  # Converter Timestamp para string ISO 8601
-
-        # Criar objeto Ativo
-        ativo = Ativo.objects.create(
+    # Etapa 1: obter os metadados de todos os ativos (do cache, ou em paralelo para os que faltam)
+    try:
+        metadados = obter_metadados_em_lote(tickers)
+    except Exception as e:
+        return {'error': f'Erro ao obter informações dos ativos: {str(e)}'}, 500
+    moedas = {ticker: metadados[ticker]['moeda'] or 'USD' for ticker in tickers}
+
+    # Etapa 2: baixar de uma só vez os preços de todos os ativos e pares de câmbio que faltam no armazém
+    pares_cambio = [
+        ticker_par(moeda_ativo, moeda_carteira)
+        for moeda_ativo in set(moedas.values())
+        if moeda_ativo != moeda_carteira
+    ]
+    garantir_precos_em_lote(tickers + pares_cambio, data_inicial, data_final_inclusiva, intervalo='1mo')
+
+    # Etapa 3: montar os ativos referenciando a série mensal do armazém (sem copiar os preços)
+    series = {
+        serie.ticker: serie
+        for serie in SeriePrecos.objects.filter(ticker__in=tickers, intervalo='1mo')
+    }
+
+    # Data de início de negociação de cada ativo dentro do período (primeira barra mensal), em uma só consulta
+    datas_lancamento = dict(
+        BarraPreco.objects.filter(
+            ticker__in=tickers, intervalo='1mo', data__gte=data_inicial, data__lt=data_final_inclusiva
+        ).values('ticker').annotate(primeira=Min('data')).values_list('ticker', 'primeira')
+    )
+
+    ativos = []
+    for ticker, peso in itens:
+        ativos.append(Ativo(
             ticker=ticker,
             peso=peso,
             posse=0,
-            nome=nome,
-            precos=json.dumps(precos),
+            nome=metadados[ticker]['nome'] or ticker,
+            moeda=moedas[ticker],
+            serie_precos=series.get(ticker),
             ultimo_preco_convertido=0.00,  # Não usado pela simulação automática
-            data_lancamento=data_lancamento  # Salvando a data de lançamento do ativo
-        )
-        carteira_automatica.ativos.add(ativo)
+            data_lancamento=datas_lancamento.get(ticker)  # Salvando a data de lançamento do ativo
+        ))
+
+    # Criar todos os objetos Ativo de uma vez
+    ativos = Ativo.objects.bulk_create(ativos)
+    carteira_automatica.ativos.add(*ativos)
 
     return {'status': 'success'}, 200
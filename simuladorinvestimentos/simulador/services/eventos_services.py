@@ -0,0 +1,208 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import SerieEventos, EventoCorporativo
+from ..utils import executar_em_paralelo
+from ..coalescencia import arrendamentos
+from ..provedores import obter_provedor
+from .precos_services import invalidar_precos
+
+
+logger = logging.getLogger(__name__)
+
+
+def _baixar_eventos(ticker):
+    """
+    Baixa o histórico completo de dividendos e desdobramentos de um ticker no provedor configurado.
+
+    Args:
+        ticker (str): Ticker do ativo.
+
+    Returns:
+        tuple: (dividendos por ação, razões dos desdobramentos), ambos pd.Series indexadas por data.
+    """
+    return obter_provedor().eventos(ticker)
+
+
+def _salvar_eventos(ticker, dividendos, desdobramentos):
+    """
+    Grava os eventos de um ticker e descarta as barras de preço gravadas antes de um desdobramento novo.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        dividendos (pd.Series): Dividendos por ação indexados por data.
+        desdobramentos (pd.Series): Razões dos desdobramentos indexadas por data.
+
+    Returns:
+        int: Quantidade de eventos gravados.
+    """
+    eventos = [
+        EventoCorporativo(ticker=ticker, tipo=tipo, data=pd.Timestamp(data).date(), valor=float(valor))
+        for tipo, serie in ((EventoCorporativo.DIVIDENDO, dividendos), (EventoCorporativo.DESDOBRAMENTO, desdobramentos))
+        for data, valor in serie.items()
+        if not pd.isna(valor)
+    ]
+
+    # Na primeira sincronização os preços já vêm ajustados pelos desdobramentos passados
+    if SerieEventos.objects.filter(ticker=ticker).exists():
+        conhecidos = set(
+            EventoCorporativo.objects.filter(ticker=ticker, tipo=EventoCorporativo.DESDOBRAMENTO)
+            .values_list('data', flat=True)
+        )
+        novos = [
+            evento.data for evento in eventos
+            if evento.tipo == EventoCorporativo.DESDOBRAMENTO and evento.data not in conhecidos
+        ]
+        if novos:
+            logger.info(f'Novo desdobramento de {ticker} em {max(novos)}: preços gravados serão baixados de novo')
+            invalidar_precos(ticker)
+
+    EventoCorporativo.objects.bulk_create(
+        eventos,
+        update_conflicts=True,
+        unique_fields=['ticker', 'tipo', 'data'],
+        update_fields=['valor']
+    )
+    SerieEventos.objects.update_or_create(ticker=ticker)
+    return len(eventos)
+
+
+def garantir_eventos_em_lote(tickers):
+    """
+    Garante que o armazém tenha os eventos corporativos dos tickers, baixando apenas os ausentes ou vencidos.
+
+    Os eventos de um ticker são baixados de novo depois de EVENTOS_TTL segundos; os downloads rodam em paralelo.
+
+    Args:
+        tickers (list): Lista de tickers.
+
+    Returns:
+        int: Quantidade de eventos gravados.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'EVENTOS_TTL', 24 * 3600))
+
+    def vencidos():
+        atualizados = set(
+            SerieEventos.objects.filter(ticker__in=tickers, atualizado_em__gt=limite).values_list('ticker', flat=True)
+        )
+        return [ticker for ticker in tickers if ticker not in atualizados]
+
+    pendentes = vencidos()
+    if not pendentes:
+        return 0
+
+    # Requisições simultâneas pelos mesmos tickers esperam o primeiro download terminar
+    with arrendamentos(f'eventos:{ticker}' for ticker in pendentes) as esperou:
+        if esperou:
+            pendentes = [ticker for ticker in vencidos() if ticker in pendentes]
+
+        resultados = executar_em_paralelo(
+            _baixar_eventos,
+            pendentes,
+            max_workers=getattr(settings, 'PRECOS_MAX_DOWNLOADS_PARALELOS', 8)
+        )
+
+        gravados = 0
+        for ticker, eventos in resultados.items():
+            if isinstance(eventos, Exception):
+                logger.warning(f'Erro ao baixar eventos corporativos de {ticker}: {eventos}')
+                continue
+            gravados += _salvar_eventos(ticker, *eventos)
+
+    return gravados
+
+
+def _ler_eventos(ticker, tipo, nome, inicio=None, fim=None):
+    garantir_eventos_em_lote([ticker])
+
+    eventos = EventoCorporativo.objects.filter(ticker=ticker, tipo=tipo)
+    if inicio is not None:
+        eventos = eventos.filter(data__gte=pd.Timestamp(inicio).date())
+    if fim is not None:
+        eventos = eventos.filter(data__lt=pd.Timestamp(fim).date())
+
+    linhas = list(eventos.order_by('data').values_list('data', 'valor'))
+    return pd.Series(
+        [valor for _, valor in linhas],
+        index=pd.DatetimeIndex([data for data, _ in linhas]),
+        name=nome,
+        dtype=float
+    )
+
+
+def obter_dividendos(ticker, inicio=None, fim=None):
+    """
+    Obtém os dividendos de um ticker a partir do armazém local, indo à rede apenas se estiverem vencidos.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        inicio (str, date ou datetime, optional): Data inicial.
+        fim (str, date ou datetime, optional): Data final (exclusiva).
+
+    Returns:
+        pd.Series: Dividendos por ação indexados por data.
+    """
+    return _ler_eventos(ticker, EventoCorporativo.DIVIDENDO, 'Dividends', inicio, fim)
+
+
+def obter_desdobramentos(ticker, inicio=None, fim=None):
+    """
+    Obtém os desdobramentos de um ticker a partir do armazém local, indo à rede apenas se estiverem vencidos.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        inicio (str, date ou datetime, optional): Data inicial.
+        fim (str, date ou datetime, optional): Data final (exclusiva).
+
+    Returns:
+        pd.Series: Razão de cada desdobramento indexada por data.
+    """
+    return _ler_eventos(ticker, EventoCorporativo.DESDOBRAMENTO, 'Stock Splits', inicio, fim)
+
+
+def dividendos_mensais(tickers, meses, inicio=None, fim=None):
+    """
+    Soma os dividendos por ação de vários tickers em cada mês, em uma única consulta ao armazém.
+
+    Os eventos devem estar no armazém (ver garantir_eventos_em_lote); esta função não acessa a rede.
+
+    Args:
+        tickers (list): Lista de tickers (colunas do resultado).
+        meses (pd.DatetimeIndex): Primeiro dia de cada mês (linhas do resultado), em ordem crescente.
+        inicio (str, date ou datetime, optional): Data inicial dos eventos.
+        fim (str, date ou datetime, optional): Data final (exclusiva) dos eventos.
+
+    Returns:
+        np.ndarray: Dividendos por ação (meses x tickers).
+    """
+    meses = pd.DatetimeIndex(meses)
+    resultado = np.zeros((len(meses), len(tickers)))
+    if len(meses) == 0 or not tickers:
+        return resultado
+
+    eventos = EventoCorporativo.objects.filter(ticker__in=tickers, tipo=EventoCorporativo.DIVIDENDO)
+    if inicio is not None:
+        eventos = eventos.filter(data__gte=pd.Timestamp(inicio).date())
+    if fim is not None:
+        eventos = eventos.filter(data__lt=pd.Timestamp(fim).date())
+    linhas = list(eventos.values_list('ticker', 'data', 'valor'))
+    if not linhas:
+        return resultado
+
+    colunas_ticker = {ticker: coluna for coluna, ticker in enumerate(tickers)}
+    colunas = np.array([colunas_ticker[ticker] for ticker, _, _ in linhas])
+    datas = np.array([data for _, data, _ in linhas], dtype='datetime64[D]')
+    valores = np.array([valor for _, _, valor in linhas], dtype=float)
+
+    # Cada evento vai para o último mês que começa até a sua data
+    linhas_mes = np.searchsorted(meses.values.astype('datetime64[D]'), datas, side='right') - 1
+    validos = linhas_mes >= 0
+    np.add.at(resultado, (linhas_mes[validos], colunas[validos]), valores[validos])
+    return resultado
@@ -0,0 +1,253 @@
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+from datetime import date
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Min, Max, Count
+
+from ..models import IndiceInflacao
+from ..coalescencia import arrendamento
+from ..provedores import obter_provedor
+
+
+logger = logging.getLogger(__name__)
+
+# Primeiro mês buscado quando a tabela ainda está vazia
+DATA_INICIAL_IPCA = date(1980, 1, 1)
+
+# Série completa em memória (por processo): (DataFrame, momento da carga)
+_serie_memoria = None
+_lock = threading.Lock()
+_atualizacao = {'thread': None, 'ultima_tentativa': None}
+
+
+def _mes_esperado():
+    """
+    Retorna o mês mais recente cujo IPCA já deveria estar publicado (o mês anterior ao atual).
+
+    Returns:
+        datetime.date: Primeiro dia do mês esperado.
+    """
+    return date.today().replace(day=1) - relativedelta(months=1)
+
+
+def _inicio_busca():
+    """
+    Define o primeiro mês a buscar no SGS: o mês seguinte ao último armazenado, ou o início da série
+    se a tabela estiver vazia, começar depois de DATA_INICIAL_IPCA ou tiver meses faltando.
+
+    Returns:
+        datetime.date: Primeiro mês a ser buscado.
+    """
+    resumo = IndiceInflacao.objects.aggregate(primeiro=Min('data'), ultimo=Max('data'), quantidade=Count('id'))
+    primeiro, ultimo = resumo['primeiro'], resumo['ultimo']
+    if ultimo is None or primeiro > DATA_INICIAL_IPCA:
+        return DATA_INICIAL_IPCA
+
+    meses = (ultimo.year - primeiro.year) * 12 + ultimo.month - primeiro.month + 1
+    if resumo['quantidade'] < meses:
+        return DATA_INICIAL_IPCA
+
+    return ultimo + relativedelta(months=1)
+
+
+def _recalcular_indice_acumulado():
+    """
+    Recalcula o índice acumulado (nível de preços) de todos os meses da tabela, em ordem de data.
+    """
+    registros = list(IndiceInflacao.objects.order_by('data'))
+    indices = np.cumprod([1 + registro.valor / 100 for registro in registros])
+    for registro, indice in zip(registros, indices):
+        registro.indice_acumulado = float(indice)
+    IndiceInflacao.objects.bulk_update(registros, ['indice_acumulado'], batch_size=500)
+
+
+def atualizar_ipca(max_retries=5, retry_delay=2):
+    """
+    Busca no SGS apenas os meses posteriores ao último IPCA armazenado e os grava na tabela local.
+
+    Deve ser chamada fora do ciclo das requisições (thread em segundo plano ou comando agendado),
+    pois pode esperar entre as tentativas.
+
+    Args:
+        max_retries (int, optional): Número máximo de tentativas em caso de falha. Default é 5.
+        retry_delay (int, optional): Intervalo (em segundos) entre tentativas. Default é 2.
+
+    Returns:
+        int: Quantidade de meses novos gravados.
+    """
+    global _serie_memoria
+
+    # Apenas um worker por vez consulta o SGS; os demais encontram os meses já gravados
+    with arrendamento('ipca'):
+        inicio = _inicio_busca()
+        if inicio > date.today():
+            return 0
+
+        df = None
+        for tentativa in range(max_retries):
+            try:
+                df = obter_provedor().inflacao(inicio, date.today())
+                break
+            except Exception as e:
+                logger.warning(f'Erro ao buscar o IPCA (tentativa {tentativa + 1} de {max_retries}): {e}')
+                if tentativa + 1 < max_retries:
+                    time.sleep(retry_delay)  # Aguarda alguns segundos antes de tentar novamente
+
+        if df is None or df.empty:
+            return 0
+
+        existentes = IndiceInflacao.objects.count()
+        IndiceInflacao.objects.bulk_create(
+            [
+                IndiceInflacao(data=pd.Timestamp(row.Data).date(), valor=float(row.Valor))
+                for row in df.itertuples(index=False)
+                if not pd.isna(row.Valor)
+            ],
+            ignore_conflicts=True
+        )
+        novos = IndiceInflacao.objects.count() - existentes
+        if novos:
+            _recalcular_indice_acumulado()
+
+    with _lock:
+        _serie_memoria = None
+
+    return novos
+
+
+def _executar_atualizacao():
+    try:
+        novos = atualizar_ipca()
+        logger.info(f'IPCA atualizado em segundo plano: {novos} meses novos')
+    except Exception as e:
+        logger.warning(f'Erro ao atualizar o IPCA em segundo plano: {e}')
+    finally:
+        connection.close()
+
+
+def atualizar_ipca_em_segundo_plano():
+    """
+    Dispara a atualização incremental do IPCA em uma thread, sem bloquear a requisição.
+
+    Só uma atualização roda por vez, e novas tentativas respeitam o intervalo IPCA_INTERVALO_ATUALIZACAO.
+
+    Returns:
+        bool: True se uma atualização foi disparada.
+    """
+    intervalo = getattr(settings, 'IPCA_INTERVALO_ATUALIZACAO', 3600)
+
+    with _lock:
+        thread = _atualizacao['thread']
+        ultima_tentativa = _atualizacao['ultima_tentativa']
+        if thread is not None and thread.is_alive():
+            return False
+        if ultima_tentativa is not None and time.monotonic() - ultima_tentativa < intervalo:
+            return False
+
+        thread = threading.Thread(target=_executar_atualizacao, daemon=True)
+        _atualizacao['thread'] = thread
+        _atualizacao['ultima_tentativa'] = time.monotonic()
+
+    thread.start()
+    return True
+
+
+def _ler_tabela():
+    linhas = IndiceInflacao.objects.order_by('data').values_list('data', 'valor', 'indice_acumulado')
+    df = pd.DataFrame.from_records(list(linhas), columns=['Data', 'Valor', 'IndiceAcumulado'])
+    df['Data'] = pd.to_datetime(df['Data'])
+    return df
+
+
+def _carregar_serie():
+    """
+    Carrega a série completa do IPCA, mantendo-a em memória por IPCA_TTL_MEMORIA segundos.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas 'Data', 'Valor' e 'IndiceAcumulado'.
+    """
+    global _serie_memoria
+
+    with _lock:
+        if _serie_memoria is not None:
+            df, carregado_em = _serie_memoria
+            if time.monotonic() - carregado_em < getattr(settings, 'IPCA_TTL_MEMORIA', 600):
+                return df
+
+    df = _ler_tabela()
+    if df.empty:
+        # Primeira execução: uma única tentativa, sem esperas, para não prender a requisição
+        atualizar_ipca(max_retries=1, retry_delay=0)
+        df = _ler_tabela()
+    elif df['Data'].iloc[-1].date() < _mes_esperado():
+        atualizar_ipca_em_segundo_plano()
+
+    if not df.empty:
+        with _lock:
+            _serie_memoria = (df, time.monotonic())
+
+    return df
+
+
+def obter_ipca(start_date, end_date):
+    """
+    Obtém da tabela local os dados do IPCA entre duas datas.
+
+    Args:
+        start_date (str ou datetime.date): Data de início.
+        end_date (str ou datetime.date): Data de término.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas 'Data', 'Valor' e 'IndiceAcumulado', ou None se não houver dados.
+    """
+    df = _carregar_serie()
+
+    # A série está ordenada por data: o trecho é localizado por busca binária
+    inicio = df['Data'].searchsorted(pd.Timestamp(start_date), side='left')
+    fim = df['Data'].searchsorted(pd.Timestamp(end_date), side='right')
+    if inicio >= fim:
+        return None
+
+    return df.iloc[inicio:fim].reset_index(drop=True)
+
+
+def periodo_ipca(data_inicial):
+    """
+    Define o trecho da tabela de IPCA referenciado por uma nova simulação: da data inicial ao último mês publicado.
+
+    Args:
+        data_inicial (str ou datetime.date): Data inicial da simulação.
+
+    Returns:
+        tuple: (inflacao_inicio, inflacao_fim) como datetime.date, ou None se não houver dados.
+    """
+    df = obter_ipca(start_date=data_inicial, end_date=date.today())
+    if df is None:
+        return None
+    return pd.Timestamp(data_inicial).date(), df['Data'].iloc[-1].date()
+
+
+def obter_ipca_simulacao(simulacao):
+    """
+    Obtém o IPCA do trecho referenciado por uma simulação, indexado por data.
+
+    Args:
+        simulacao (SimulacaoAutomatica ou SimulacaoManual): Simulação com inflacao_inicio e inflacao_fim.
+
+    Returns:
+        pd.DataFrame: DataFrame indexado por 'Data' com as colunas 'Valor' e 'IndiceAcumulado', ou None se não houver dados.
+    """
+    inicio = simulacao.inflacao_inicio or simulacao.data_inicial
+    fim = simulacao.inflacao_fim or date.today()
+
+    df = obter_ipca(start_date=inicio, end_date=fim)
+    if df is None:
+        return None
+    return df.set_index('Data')
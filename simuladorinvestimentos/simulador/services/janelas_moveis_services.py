@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+
+from .precos_services import garantir_precos_em_lote
+from .cambio_services import ticker_par, ler_precos_convertidos
+from .metadados_services import obter_metadados_em_lote, obter_metadados
+from .inflacao_services import obter_ipca
+from .metricas_services import taxa_interna_retorno
+from .motor_simulacao_services import valores_janelas
+from ..indice_inflacao import IndiceInflacaoAcumulado
+from ..utils import arredondar_para_baixo
+
+
+PERCENTIS = (5, 10, 25, 50, 75, 90, 95)
+
+
+def montar_matriz_precos_mensais(tickers, moeda_base, inicio, fim):
+    """
+    Carrega do armazém compartilhado o 'Adj Close' mensal de vários tickers na moeda da carteira,
+    baixando apenas o que falta.
+
+    Args:
+        tickers (list): Lista de tickers.
+        moeda_base (str): Moeda da carteira.
+        inicio (datetime.date): Primeiro mês.
+        fim (datetime.date): Último mês (inclusivo).
+
+    Returns:
+        tuple: (pd.DatetimeIndex dos meses, np.ndarray de preços meses x tickers, zero nos meses sem preço).
+
+    Raises:
+        ValueError: Se algum ticker não for encontrado.
+    """
+    try:
+        metadados = obter_metadados_em_lote(tickers)
+    except Exception:
+        # O download em lote não diz qual ticker falhou: procura um a um para informar o culpado
+        metadados = {}
+        for ticker in tickers:
+            try:
+                metadados[ticker] = obter_metadados(ticker)
+            except Exception as e:
+                raise ValueError(f'Ticker não encontrado: {ticker}') from e
+    moedas = {ticker: metadados[ticker]['moeda'] or 'USD' for ticker in tickers}
+    fim_exclusivo = fim + relativedelta(months=1)
+
+    pares_cambio = {ticker_par(moeda, moeda_base) for moeda in moedas.values() if moeda != moeda_base}
+    garantir_precos_em_lote(list(tickers) + list(pares_cambio), inicio, fim_exclusivo, intervalo='1mo')
+
+    meses = pd.date_range(inicio, fim, freq='MS')
+    precos = np.zeros((len(meses), len(tickers)))
+    for coluna, ticker in enumerate(tickers):
+        serie = ler_precos_convertidos(ticker, moedas[ticker], moeda_base, inicio, fim_exclusivo, intervalo='1mo')
+        serie.index = serie.index.to_period('M').start_time
+        precos[:, coluna] = serie[~serie.index.duplicated()].reindex(meses).fillna(0.0).to_numpy(dtype=float)
+
+    return meses, precos
+
+
+def _distribuicao(valores, percentis):
+    """
+    Resume uma distribuição em percentis e média.
+
+    Args:
+        valores (np.ndarray): Valores de todas as janelas.
+        percentis (tuple): Percentis desejados.
+
+    Returns:
+        dict: 'p<n>' -> valor e 'media'.
+    """
+    resumo = {f'p{percentil:g}': round(float(valor), 6) for percentil, valor in zip(percentis, np.percentile(valores, percentis))}
+    resumo['media'] = round(float(valores.mean()), 6)
+    return resumo
+
+
+def analisar_janelas_moveis(ativos, horizonte_meses, data_inicial, data_final, aplicacao_inicial=0.0,
+                            aplicacao_mensal=0.0, moeda_base='BRL', percentis=None, serie=False):
+    """
+    Simula uma carteira em todas as janelas de 'horizonte_meses' meses entre duas datas, uma por mês de início.
+
+    Os preços são carregados e alinhados uma única vez; o valor final de todas as janelas sai de somas
+    acumuladas sobre a matriz de preços (ver valores_janelas), sem criar simulações. Janelas em que algum
+    ativo não tem preço em algum mês são descartadas.
+
+    Args:
+        ativos (list): Lista de dicionários com 'ticker' e 'peso'; os pesos são normalizados para somar 1.
+        horizonte_meses (int): Duração de cada janela, em meses.
+        data_inicial (str): Primeiro mês de início ('AAAA-MM' ou 'AAAA-MM-DD').
+        data_final (str): Último mês em que uma janela pode terminar.
+        aplicacao_inicial (float, optional): Valor aplicado no início de cada janela. Default é 0.
+        aplicacao_mensal (float, optional): Aporte mensal (inclusive no primeiro mês). Default é 0.
+        moeda_base (str, optional): Moeda da carteira. Default é 'BRL'.
+        percentis (list, optional): Percentis das distribuições. Default é PERCENTIS.
+        serie (bool, optional): Se o resultado de cada janela deve ser retornado. Default é False.
+
+    Returns:
+        tuple: Dicionário com as distribuições do valor final, do retorno sobre o total aportado e da TIR anual,
+        a pior e a melhor janela e, opcionalmente, todas as janelas, e código de status HTTP.
+    """
+    try:
+        try:
+            itens = [(str(ativo['ticker']).strip(), float(ativo['peso'])) for ativo in ativos or []]
+            horizonte = int(horizonte_meses)
+            aplicacao_inicial = float(aplicacao_inicial or 0)
+            aplicacao_mensal = float(aplicacao_mensal or 0)
+            inicio = pd.Timestamp(data_inicial).to_period('M').start_time.date()
+            fim = pd.Timestamp(data_final).to_period('M').start_time.date()
+            percentis = tuple(float(percentil) for percentil in (percentis or PERCENTIS))
+        except (KeyError, TypeError, ValueError) as e:
+            return {'error': f'Parâmetros inválidos: {e}'}, 400
+
+        if not itens:
+            return {'error': 'Informe ao menos um ativo.'}, 400
+        pesos = np.array([peso for _, peso in itens])
+        if (pesos < 0).any() or pesos.sum() <= 0:
+            return {'error': 'Os pesos devem ser positivos.'}, 400
+        if horizonte < 1:
+            return {'error': 'O horizonte deve ter ao menos um mês.'}, 400
+        if aplicacao_inicial + aplicacao_mensal <= 0:
+            return {'error': 'Informe a aplicação inicial ou a mensal.'}, 400
+        if not all(0 <= percentil <= 100 for percentil in percentis):
+            return {'error': 'Os percentis devem estar entre 0 e 100.'}, 400
+
+        maximo = getattr(settings, 'SIMULACAO_JANELAS_MAX_MESES', 1200)
+        meses_total = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+        if meses_total < horizonte:
+            return {'error': 'O período é menor que o horizonte.'}, 400
+        if meses_total > maximo:
+            return {'error': f'Período de {meses_total} meses acima do máximo permitido ({maximo}).'}, 400
+
+        tickers = [ticker for ticker, _ in itens]
+        try:
+            meses, precos = montar_matriz_precos_mensais(tickers, moeda_base, inicio, fim)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        pesos = pesos / pesos.sum()
+
+        valores, completas = valores_janelas(precos, pesos, horizonte, aplicacao_inicial, aplicacao_mensal)
+        if not completas.any():
+            return {'error': 'Nenhuma janela tem preços de todos os ativos em todos os meses.'}, 400
+
+        posicoes = np.flatnonzero(completas)
+        valores = valores[posicoes]
+        inicios = meses[posicoes]
+        fins = meses[posicoes + horizonte - 1]
+
+        total_aportado = aplicacao_inicial + aplicacao_mensal * horizonte
+        retornos = valores / total_aportado - 1
+
+        # TIR de todas as janelas de uma vez: os fluxos são iguais, muda apenas o valor final
+        fluxos = np.full(horizonte, aplicacao_mensal)
+        fluxos[0] += aplicacao_inicial
+        tir = taxa_interna_retorno(valores, np.broadcast_to(fluxos, (len(valores), horizonte)), np.zeros(len(valores)))
+        tir_anual = (1 + tir) ** 12 - 1
+
+        # Valor final em dinheiro do mês de início de cada janela
+        ipca = obter_ipca(inicio, fim)
+        valores_reais = np.full(len(valores), np.nan)
+        if ipca is not None:
+            indice = IndiceInflacaoAcumulado.de_dataframe(ipca.set_index('Data'))
+            valores_reais = valores / indice.fatores(inicios, fins)
+
+        def janela(posicao):
+            return {
+                'inicio': inicios[posicao].strftime('%Y-%m-%d'),
+                'fim': fins[posicao].strftime('%Y-%m-%d'),
+                'valor_final': float(arredondar_para_baixo(valores[posicao])),
+                'valor_final_real': None if np.isnan(valores_reais[posicao]) else float(arredondar_para_baixo(valores_reais[posicao])),
+                'retorno': round(float(retornos[posicao]), 6),
+                'tir_anual': None if np.isnan(tir_anual[posicao]) else round(float(tir_anual[posicao]), 6),
+            }
+
+        resposta = {
+            'horizonte_meses': horizonte,
+            'pesos': dict(zip(tickers, pesos.round(6).tolist())),
+            'total_aportado': float(arredondar_para_baixo(total_aportado)),
+            'janelas': int(len(valores)),
+            'janelas_descartadas': int((~completas).sum()),
+            'valor_final': _distribuicao(valores, percentis),
+            'retorno': _distribuicao(retornos, percentis),
+            'tir_anual': _distribuicao(tir_anual[~np.isnan(tir_anual)], percentis) if (~np.isnan(tir_anual)).any() else None,
+            'pior': janela(int(np.argmin(valores))),
+            'melhor': janela(int(np.argmax(valores))),
+        }
+        if serie:
+            resposta['resultado'] = [janela(posicao) for posicao in range(len(valores))]
+
+        return resposta, 200
+
+    except Exception as e:
+        return {'error': str(e)}, 500
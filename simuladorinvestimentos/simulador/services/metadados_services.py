@@ -0,0 +1,231 @@
+import time
+import logging
+import threading
+
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import MetadadosAtivo
+from ..utils import executar_em_paralelo
+from ..coalescencia import arrendamentos
+from ..provedores import obter_provedor
+
+
+logger = logging.getLogger(__name__)
+
+# Cache em memória (por processo) na frente da tabela MetadadosAtivo: ticker -> (metadados, expira_em)
+_cache = OrderedDict()
+_lock = threading.Lock()
+_contadores = {
+    'acertos_memoria': 0,
+    'acertos_banco': 0,
+    'faltas': 0,
+    'expirados': 0,
+    'erros': 0,
+    'despejos': 0,
+}
+
+
+def _ttl():
+    return getattr(settings, 'METADADOS_TTL', 7 * 24 * 3600)
+
+
+def _contar(chave):
+    with _lock:
+        _contadores[chave] += 1
+
+
+def _para_dict(registro):
+    """
+    Converte um MetadadosAtivo em dicionário.
+
+    Args:
+        registro (MetadadosAtivo): Registro da tabela de metadados.
+
+    Returns:
+        dict: Metadados do ticker.
+    """
+    return {
+        'ticker': registro.ticker,
+        'nome': registro.nome,
+        'moeda': registro.moeda,
+        'bolsa': registro.bolsa,
+        'data_primeira_negociacao': registro.data_primeira_negociacao,
+    }
+
+
+def _guardar_em_memoria(ticker, metadados, atualizado_em):
+    """
+    Guarda os metadados no cache em memória, despejando os menos usados quando o limite é atingido.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        metadados (dict): Metadados do ticker.
+        atualizado_em (datetime): Momento em que os metadados foram obtidos da rede.
+    """
+    restante = _ttl() - (timezone.now() - atualizado_em).total_seconds()
+    tamanho_maximo = getattr(settings, 'METADADOS_CACHE_TAMANHO', 2048)
+
+    with _lock:
+        _cache[ticker] = (metadados, time.monotonic() + restante)
+        _cache.move_to_end(ticker)
+        while len(_cache) > tamanho_maximo:
+            _cache.popitem(last=False)
+            _contadores['despejos'] += 1
+
+
+def _ler_da_memoria(ticker):
+    with _lock:
+        entrada = _cache.get(ticker)
+        if entrada is None:
+            return None
+        metadados, expira_em = entrada
+        if time.monotonic() >= expira_em:
+            del _cache[ticker]
+            return None
+        _cache.move_to_end(ticker)
+        _contadores['acertos_memoria'] += 1
+        return metadados
+
+
+def _baixar_metadados(ticker):
+    """
+    Obtém os metadados de um ticker no provedor de dados de mercado configurado.
+
+    Args:
+        ticker (str): Ticker do ativo.
+
+    Returns:
+        dict: Campos do MetadadosAtivo (nome, moeda, bolsa e data_primeira_negociacao).
+    """
+    return obter_provedor().metadados(ticker)
+
+
+def _salvar_metadados(ticker, campos):
+    registro, _ = MetadadosAtivo.objects.update_or_create(ticker=ticker, defaults=campos)
+    return registro
+
+
+def obter_metadados_em_lote(tickers):
+    """
+    Obtém os metadados de vários tickers, lendo do cache e baixando apenas os ausentes ou expirados.
+
+    Os downloads necessários são feitos em paralelo.
+
+    Args:
+        tickers (list): Lista de tickers.
+
+    Returns:
+        dict: Dicionário ticker -> metadados (ticker, nome, moeda, bolsa, data_primeira_negociacao).
+
+    Raises:
+        Exception: Se um ticker não estiver em cache e o download falhar.
+    """
+    resultado = {}
+    pendentes = []
+
+    for ticker in dict.fromkeys(tickers):
+        metadados = _ler_da_memoria(ticker)
+        if metadados is not None:
+            resultado[ticker] = metadados
+        else:
+            pendentes.append(ticker)
+
+    if not pendentes:
+        return resultado
+
+    limite = timezone.now() - timedelta(seconds=_ttl())
+    registros = {registro.ticker: registro for registro in MetadadosAtivo.objects.filter(ticker__in=pendentes)}
+
+    a_baixar = []
+    for ticker in pendentes:
+        registro = registros.get(ticker)
+        if registro is not None and registro.atualizado_em > limite:
+            _contar('acertos_banco')
+            resultado[ticker] = _para_dict(registro)
+            _guardar_em_memoria(ticker, resultado[ticker], registro.atualizado_em)
+        else:
+            _contar('expirados' if registro is not None else 'faltas')
+            a_baixar.append(ticker)
+
+    if not a_baixar:
+        return resultado
+
+    # Requisições simultâneas pelos mesmos tickers esperam o primeiro download terminar
+    with arrendamentos(f'metadados:{ticker}' for ticker in a_baixar) as esperou:
+        if esperou:
+            atualizados = MetadadosAtivo.objects.filter(ticker__in=a_baixar, atualizado_em__gt=limite)
+            for registro in atualizados:
+                registros[registro.ticker] = registro
+                resultado[registro.ticker] = _para_dict(registro)
+                _guardar_em_memoria(registro.ticker, resultado[registro.ticker], registro.atualizado_em)
+            a_baixar = [ticker for ticker in a_baixar if ticker not in resultado]
+
+        baixados = executar_em_paralelo(_baixar_metadados, a_baixar)
+        for ticker, campos in baixados.items():
+            if isinstance(campos, Exception):
+                _contar('erros')
+                registro = registros.get(ticker)
+                if registro is None:
+                    raise campos
+                # Metadados vencidos ainda são melhores do que nenhum
+                logger.warning(f'Erro ao atualizar metadados de {ticker}, usando versão expirada: {campos}')
+                resultado[ticker] = _para_dict(registro)
+                continue
+
+            registro = _salvar_metadados(ticker, campos)
+            resultado[ticker] = _para_dict(registro)
+            _guardar_em_memoria(ticker, resultado[ticker], registro.atualizado_em)
+
+    return resultado
+
+
+def obter_metadados(ticker):
+    """
+    Obtém os metadados de um ticker (nome, moeda, bolsa e data da primeira negociação) a partir do cache.
+
+    Args:
+        ticker (str): Ticker do ativo.
+
+    Returns:
+        dict: Metadados do ticker.
+    """
+    return obter_metadados_em_lote([ticker])[ticker]
+
+
+def remover_metadados_expirados():
+    """
+    Remove da tabela e da memória os metadados com TTL vencido.
+
+    Returns:
+        int: Quantidade de registros removidos do banco.
+    """
+    limite = timezone.now() - timedelta(seconds=_ttl())
+    removidos, _ = MetadadosAtivo.objects.filter(atualizado_em__lte=limite).delete()
+
+    agora = time.monotonic()
+    with _lock:
+        for ticker in [ticker for ticker, (_, expira_em) in _cache.items() if expira_em <= agora]:
+            del _cache[ticker]
+
+    return removidos
+
+
+def estatisticas_metadados():
+    """
+    Retorna os contadores de acertos e faltas do cache de metadados deste processo.
+
+    Returns:
+        dict: Contadores do cache e quantidade de tickers em memória.
+    """
+    with _lock:
+        estatisticas = dict(_contadores)
+        estatisticas['em_memoria'] = len(_cache)
+
+    acertos = estatisticas['acertos_memoria'] + estatisticas['acertos_banco']
+    total = acertos + estatisticas['faltas'] + estatisticas['expirados']
+    estatisticas['taxa_acerto'] = round(acertos / total, 4) if total else None
+    return estatisticas
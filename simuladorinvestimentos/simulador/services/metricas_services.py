@@ -0,0 +1,249 @@
+import numpy as np
+
+
+def retornos_mensais(valores, aportes, valor_inicial):
+    """
+    Calcula os retornos mensais ponderados pelo tempo, descontando os aportes de cada mês.
+
+    O retorno do mês t é (valor_t - aporte_t) / valor_(t-1) - 1; meses que começam com a carteira
+    vazia têm retorno zero. Funciona para uma série (meses) ou várias (linhas x meses).
+
+    Args:
+        valores (np.ndarray): Valor total da carteira ao fim de cada mês.
+        aportes (np.ndarray): Aporte feito em cada mês.
+        valor_inicial (float ou np.ndarray): Valor da carteira antes do primeiro mês.
+
+    Returns:
+        np.ndarray: Retornos mensais, no mesmo formato de 'valores'.
+    """
+    valores = np.asarray(valores, dtype=float)
+    aportes = np.broadcast_to(np.asarray(aportes, dtype=float), valores.shape)
+    valor_inicial = np.asarray(valor_inicial, dtype=float)
+
+    anteriores = np.concatenate(
+        (np.broadcast_to(valor_inicial[..., None], valores.shape[:-1] + (1,)), valores[..., :-1]), axis=-1
+    )
+    retornos = np.zeros_like(valores)
+    np.divide(valores - aportes, anteriores, out=retornos, where=anteriores > 0)
+    return np.where(anteriores > 0, retornos - 1, 0.0)
+
+
+def cagr(retornos):
+    """
+    Calcula a taxa de crescimento anual composta a partir de retornos mensais.
+
+    Args:
+        retornos (np.ndarray): Retornos mensais (meses ou linhas x meses).
+
+    Returns:
+        np.ndarray ou float: CAGR de cada série.
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    n_meses = retornos.shape[-1]
+    if n_meses == 0:
+        return np.zeros(retornos.shape[:-1])
+    crescimento = np.prod(1 + retornos, axis=-1)
+    return crescimento ** (12 / n_meses) - 1
+
+
+def drawdown_maximo(retornos):
+    """
+    Calcula a maior queda, a partir de um pico, do índice formado pelos retornos mensais.
+
+    Args:
+        retornos (np.ndarray): Retornos mensais (meses ou linhas x meses).
+
+    Returns:
+        np.ndarray ou float: Drawdown máximo de cada série (valor negativo ou zero).
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    if retornos.shape[-1] == 0:
+        return np.zeros(retornos.shape[:-1])
+    indice = np.cumprod(1 + retornos, axis=-1)
+    # O índice começa em 1 antes do primeiro mês
+    picos = np.maximum(np.maximum.accumulate(indice, axis=-1), 1.0)
+    return np.min(indice / picos - 1, axis=-1)
+
+
+def duracao_drawdown_maximo(retornos):
+    """
+    Calcula o maior número de meses seguidos em que o índice formado pelos retornos ficou abaixo do pico anterior.
+
+    Args:
+        retornos (np.ndarray): Retornos mensais (meses ou linhas x meses).
+
+    Returns:
+        np.ndarray ou int: Duração, em meses, do maior período abaixo do pico de cada série.
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    n_meses = retornos.shape[-1]
+    if n_meses == 0:
+        return np.zeros(retornos.shape[:-1], dtype=int)
+    indice = np.cumprod(1 + retornos, axis=-1)
+    picos = np.maximum(np.maximum.accumulate(indice, axis=-1), 1.0)
+    abaixo = indice < picos
+
+    # Meses desde o último mês no pico (o pico inicial fica antes do primeiro mês)
+    meses = np.arange(n_meses)
+    ultimo_pico = np.maximum.accumulate(np.where(abaixo, -1, meses), axis=-1)
+    return np.max(np.where(abaixo, meses - ultimo_pico, 0), axis=-1)
+
+
+def volatilidade(retornos):
+    """
+    Calcula a volatilidade anualizada (desvio padrão amostral dos retornos mensais vezes raiz de 12).
+
+    Args:
+        retornos (np.ndarray): Retornos mensais (meses ou linhas x meses).
+
+    Returns:
+        np.ndarray ou float: Volatilidade de cada série (NaN com menos de dois meses).
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    if retornos.shape[-1] < 2:
+        return np.full(retornos.shape[:-1], np.nan)
+    return np.std(retornos, axis=-1, ddof=1) * np.sqrt(12)
+
+
+def sharpe_sortino(retornos, taxa_livre):
+    """
+    Calcula os índices de Sharpe e de Sortino anualizados em relação a uma taxa livre de risco mensal.
+
+    Args:
+        retornos (np.ndarray): Retornos mensais (meses ou linhas x meses).
+        taxa_livre (np.ndarray): Taxa livre de risco de cada mês, em fração (meses).
+
+    Returns:
+        tuple: (Sharpe, Sortino) de cada série; NaN quando o denominador é zero ou há menos de dois meses.
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    excesso = retornos - np.asarray(taxa_livre, dtype=float)
+    if excesso.shape[-1] < 2:
+        vazio = np.full(excesso.shape[:-1], np.nan)
+        return vazio, vazio
+
+    media = excesso.mean(axis=-1)
+    desvio = np.std(excesso, axis=-1, ddof=1)
+    desvio_negativo = np.sqrt(np.mean(np.minimum(excesso, 0.0) ** 2, axis=-1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Desvios numericamente nulos (excesso constante) não definem os índices
+        sharpe = np.where(desvio > 1e-12, media / desvio * np.sqrt(12), np.nan)
+        sortino = np.where(desvio_negativo > 1e-12, media / desvio_negativo * np.sqrt(12), np.nan)
+    return sharpe, sortino
+
+
+def taxa_interna_retorno(valor_final, aportes, valor_inicial, iteracoes=100):
+    """
+    Calcula a taxa interna de retorno mensal (retorno ponderado pelo dinheiro), por bissecção vetorizada.
+
+    Segue a convenção de retornos_mensais: o valor inicial rende desde antes do primeiro mês e o aporte
+    do mês t rende a partir do fim do mês t. A taxa é a que leva todos os aportes ao valor final.
+
+    Args:
+        valor_final (np.ndarray ou float): Valor da carteira no último mês de cada série.
+        aportes (np.ndarray): Aporte feito em cada mês (meses ou linhas x meses).
+        valor_inicial (np.ndarray ou float): Valor da carteira antes do primeiro mês.
+        iteracoes (int, optional): Número de bissecções. Default é 100.
+
+    Returns:
+        np.ndarray: Taxa mensal de cada linha (NaN sem aportes ou sem solução entre -100% e +200% ao mês).
+    """
+    aportes = np.atleast_2d(np.asarray(aportes, dtype=float))
+    n_linhas, n_meses = aportes.shape
+    valor_final = np.broadcast_to(np.asarray(valor_final, dtype=float), (n_linhas,))
+    valor_inicial = np.broadcast_to(np.asarray(valor_inicial, dtype=float), (n_linhas,))
+
+    # Meses que cada fluxo rende até o fim: o inicial, n_meses; o aporte do mês t, n_meses - 1 - t
+    prazos = np.concatenate(([n_meses], n_meses - 1 - np.arange(n_meses)))
+    fluxos = np.column_stack((valor_inicial, aportes))
+
+    def excesso(fator):
+        return (fluxos * fator[:, None] ** prazos[None, :]).sum(axis=1) - valor_final
+
+    # O valor acumulado cresce com o fator: basta bissectar entre os extremos
+    baixo = np.zeros(n_linhas)
+    alto = np.full(n_linhas, 3.0)
+    for _ in range(iteracoes):
+        meio = (baixo + alto) / 2
+        acima = excesso(meio) > 0
+        alto = np.where(acima, meio, alto)
+        baixo = np.where(acima, baixo, meio)
+
+    fator = (baixo + alto) / 2
+    resolvido = (fluxos.sum(axis=1) > 0) & (excesso(np.zeros(n_linhas)) <= 0) & (excesso(np.full(n_linhas, 3.0)) >= 0)
+    return np.where(resolvido, fator - 1, np.nan)
+
+
+def calcular_metricas(valores, aportes, valor_inicial, taxa_livre=None, inflacao=None):
+    """
+    Calcula as métricas de risco e retorno de uma ou várias séries de valores da carteira, com operações de matriz.
+
+    Args:
+        valores (np.ndarray): Valor total da carteira ao fim de cada mês (meses ou linhas x meses).
+        aportes (np.ndarray): Aporte feito em cada mês.
+        valor_inicial (float ou np.ndarray): Valor da carteira antes do primeiro mês.
+        taxa_livre (np.ndarray, optional): Taxa livre de risco de cada mês, em fração. Sem ela Sharpe e Sortino ficam NaN.
+        inflacao (np.ndarray, optional): Inflação de cada mês, em fração. Sem ela os retornos reais ficam NaN.
+
+    Returns:
+        dict: Métricas de cada série ('retorno_tempo', 'cagr', 'tir_anual', 'volatilidade', 'drawdown_maximo',
+        'duracao_drawdown_maximo', 'sharpe', 'sortino', 'retorno_real' e 'cagr_real'); taxas em fração.
+    """
+    valores = np.asarray(valores, dtype=float)
+    aportes = np.broadcast_to(np.asarray(aportes, dtype=float), valores.shape)
+    n_meses = valores.shape[-1]
+    retornos = retornos_mensais(valores, aportes, valor_inicial)
+    vazio = np.full(valores.shape[:-1], np.nan)
+
+    metricas = {
+        'retorno_tempo': np.prod(1 + retornos, axis=-1) - 1,
+        'cagr': cagr(retornos),
+        'volatilidade': volatilidade(retornos),
+        'drawdown_maximo': drawdown_maximo(retornos),
+        'duracao_drawdown_maximo': duracao_drawdown_maximo(retornos),
+    }
+
+    if n_meses:
+        tir = taxa_interna_retorno(
+            valores[..., -1].reshape(-1), aportes.reshape(-1, n_meses), np.asarray(valor_inicial, dtype=float).reshape(-1)
+        )
+        metricas['tir_anual'] = np.reshape((1 + tir) ** 12 - 1, valores.shape[:-1])
+    else:
+        metricas['tir_anual'] = vazio
+
+    if taxa_livre is not None:
+        metricas['sharpe'], metricas['sortino'] = sharpe_sortino(retornos, taxa_livre)
+    else:
+        metricas['sharpe'], metricas['sortino'] = vazio, vazio
+
+    if inflacao is not None:
+        retornos_reais = (1 + retornos) / (1 + np.asarray(inflacao, dtype=float)) - 1
+        metricas['retorno_real'] = np.prod(1 + retornos_reais, axis=-1) - 1
+        metricas['cagr_real'] = cagr(retornos_reais)
+    else:
+        metricas['retorno_real'], metricas['cagr_real'] = vazio, vazio
+
+    return metricas
+
+
+def resumir_metricas(metricas, indice=None, casas=6):
+    """
+    Converte as métricas de calcular_metricas em um dicionário serializável em JSON (NaN vira None).
+
+    Args:
+        metricas (dict): Métricas de calcular_metricas.
+        indice (int, optional): Linha a ser resumida, quando as métricas são de várias séries.
+        casas (int, optional): Casas decimais. Default é 6.
+
+    Returns:
+        dict: Métrica -> valor.
+    """
+    resumo = {}
+    for nome, valores in metricas.items():
+        valor = valores if indice is None else valores[indice]
+        valor = float(valor)
+        if nome == 'duracao_drawdown_maximo':
+            resumo[nome] = int(valor)
+        else:
+            resumo[nome] = None if np.isnan(valor) or np.isinf(valor) else round(valor, casas)
+    return resumo
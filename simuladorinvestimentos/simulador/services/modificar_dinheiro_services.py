@@ -1,9 +1,9 @@
-import pandas as pd
-
 from datetime import datetime
 
 from ..models import SimulacaoManual
-from ..utils import arredondar_para_baixo, ajustar_inflacao
+from ..utils import arredondar_para_baixo
+from ..indice_inflacao import IndiceInflacaoAcumulado
+from .inflacao_services import obter_ipca_simulacao
 
 
 def modificar_dinheiro(simulacao_id, user, valor, ajustar_inflacao_flag):
@@ -27,18 +27,12 @@ def modificar_dinheiro(simulacao_id, user, valor, ajustar_inflacao_flag):
         # Arredondar o valor
         valor = arredondar_para_baixo(valor)
 
-        # Converter JSONField para DataFrame
-        ipca_data_json = simulacao.inflacao_total  # Isso é um dicionário
-        ipca_data = pd.DataFrame(ipca_data_json)
-
-        # Verificar se 'Data' está nas colunas
-        if 'Data' not in ipca_data.columns:
-            return {'error': "A coluna 'Data' não está presente em ipca_data."}, 500
-
-        ipca_data['Data'] = pd.to_datetime(ipca_data['Data'])
-        ipca_data.set_index('Data', inplace=True)
+        # IPCA do trecho da tabela compartilhada referenciado pela simulação
+        ipca_data = obter_ipca_simulacao(simulacao)
+        if ipca_data is None:
+            return {'error': 'Falha ao buscar dados de inflação.'}, 500
 
-        coluna_ipca = "Valor"
+        indice_inflacao = IndiceInflacaoAcumulado.de_dataframe(ipca_data)
         periodo_inicial = datetime.today().date()
         data_final = simulacao.mes_atual.date()
 
@@ -51,7 +45,8 @@ def modificar_dinheiro(simulacao_id, user, valor, ajustar_inflacao_flag):
 
         # Se a checkbox estiver marcada, ajusta o valor usando a inflação
         if ajustar_inflacao_flag:
-            valor_ajustado = ajustar_inflacao(ipca_data, coluna_ipca, periodo_inicial, valor, data_final)
+            # O período vai do mês atual da simulação até hoje
+            valor_ajustado = indice_inflacao.deflacionar(valor, data_final, periodo_inicial)
             if valor_ajustado is None:
                 return {'error': 'Erro ao ajustar o valor pela inflação.'}, 500
             valor = arredondar_para_baixo(valor_ajustado)
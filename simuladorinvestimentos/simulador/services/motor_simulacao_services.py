@@ -0,0 +1,549 @@
+import numpy as np
+import pandas as pd
+
+from ..utils import arredondar_para_baixo
+
+
+# Intervalo, em meses do calendário, das estratégias de rebalanceamento periódico
+PERIODOS_REBALANCEAMENTO = {'mensal': 1, 'trimestral': 3, 'anual': 12}
+
+def _numero_mes(datas):
+    """
+    Converte datas em números de meses absolutos (ano * 12 + mês), para contar meses entre datas.
+
+    Args:
+        datas (pd.DatetimeIndex): Datas.
+
+    Returns:
+        np.ndarray: Número do mês de cada data.
+    """
+    return datas.year.to_numpy() * 12 + datas.month.to_numpy()
+
+
+def montar_matriz_precos(ativos, datas):
+    """
+    Alinha os preços de todos os ativos em uma única matriz (meses x ativos).
+
+    O preço do ativo em cada mês é o da posição 'meses desde o lançamento' da sua série 'precos_ajustados'
+    (preços ausentes valem 0). A máscara indica os meses em que o ativo tem preço: a partir do lançamento
+    e enquanto houver série.
+
+    Args:
+        ativos (list): Lista de ativos, com 'precos_ajustados' e 'data_lancamento_ts'.
+        datas (pd.DatetimeIndex): Meses da simulação.
+
+    Returns:
+        tuple: (np.ndarray de preços, np.ndarray booleano de disponibilidade), ambos meses x ativos.
+    """
+    datas = pd.DatetimeIndex(datas)
+    n_ativos = len(ativos)
+    tamanhos = np.array([len(ativo.precos_ajustados) for ativo in ativos], dtype=np.int64)
+
+    # Séries de tamanhos diferentes preenchidas com 0 em uma matriz ativos x posições
+    series = np.zeros((n_ativos, max(tamanhos.max(initial=0), 1)))
+    for coluna, ativo in enumerate(ativos):
+        series[coluna, :tamanhos[coluna]] = ativo.precos_ajustados
+    series = np.nan_to_num(series, nan=0.0)
+
+    lancamentos = pd.DatetimeIndex([ativo.data_lancamento_ts or pd.NaT for ativo in ativos])
+    lancado = datas.values[:, None] >= lancamentos.values[None, :]  # NaT nunca é lançado
+    meses_desde_lancamento = _numero_mes(datas)[:, None] - np.where(
+        lancamentos.isna(), 0, _numero_mes(lancamentos.fillna(pd.Timestamp(0)))
+    )[None, :]
+
+    disponivel = lancado & (meses_desde_lancamento < tamanhos[None, :])
+    posicoes = np.where(disponivel, meses_desde_lancamento, 0)
+    precos = np.where(disponivel, series[np.arange(n_ativos)[None, :], posicoes], 0.0)
+
+    return precos, disponivel
+
+
+def simular_carteira(precos, disponivel, pesos, aportes, aplicacao_inicial, posse_inicial=None):
+    """
+    Simula os aportes mensais em uma carteira com operações sobre matrizes.
+
+    A cada mês o aporte entra no caixa e todo o caixa é distribuído entre os ativos com preço positivo,
+    na proporção dos pesos; o que sobra fica em caixa. Caixa e valor de cada posição são arredondados
+    para baixo com duas casas, na mesma ordem de operações do cálculo mês a mês.
+
+    Args:
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        pesos (array-like): Peso de cada ativo.
+        aportes (array-like): Aporte de cada mês.
+        aplicacao_inicial (float): Valor em caixa antes do primeiro mês.
+        posse_inicial (array-like, optional): Quantidade inicial de cada ativo. Default é zero.
+
+    Returns:
+        dict: 'posses' (meses x ativos, ao fim de cada mês), 'caixa' e 'valor' (valor total da carteira) por mês.
+    """
+    precos = np.asarray(precos, dtype=float)
+    n_meses, n_ativos = precos.shape
+    pesos = np.asarray(pesos, dtype=float)
+    aportes = np.asarray(aportes, dtype=float)
+    posse_inicial = np.zeros(n_ativos) if posse_inicial is None else np.asarray(posse_inicial, dtype=float)
+
+    compra = disponivel & (precos > 0)
+
+    # O caixa depende do mês anterior: só ele é calculado mês a mês, vetorizado entre os ativos
+    valor_inicial_mes = np.empty(n_meses)
+    caixa = np.empty(n_meses)
+    saldo = aplicacao_inicial
+    for mes in range(n_meses):
+        saldo = saldo + aportes[mes]
+        valor_inicial_mes[mes] = saldo
+        # Subtração sequencial, na ordem dos ativos
+        saldo = arredondar_para_baixo(np.subtract.reduce(np.concatenate(([saldo], saldo * pesos[compra[mes]]))))
+        caixa[mes] = saldo
+
+    # Quantidades compradas em cada mês e posse acumulada (soma sequencial ao longo dos meses)
+    compras = np.zeros((n_meses + 1, n_ativos))
+    compras[0] = posse_inicial
+    np.divide(valor_inicial_mes[:, None] * pesos[None, :], precos, out=compras[1:], where=compra)
+    posses = np.cumsum(compras, axis=0)[1:]
+
+    # Valor das posições: redução ao longo do primeiro eixo de uma matriz ativos x meses soma os ativos em ordem
+    valores_posicoes = np.where(disponivel, arredondar_para_baixo(posses * precos), 0.0)
+    valor_ativos = np.add.reduce(np.ascontiguousarray(valores_posicoes.T), axis=0)
+
+    return {
+        'posses': posses,
+        'caixa': caixa,
+        'valor': valor_ativos + caixa,
+    }
+
+
+def simular_variantes(precos, disponivel, pesos, aportes, aplicacao_inicial):
+    """
+    Simula várias variantes da mesma carteira (pesos e aportes diferentes) de uma só vez.
+
+    As variantes formam uma dimensão extra dos arrays: a cada mês todas são atualizadas juntas, sem
+    materializar a matriz variantes x meses x ativos. Cada variante segue as mesmas regras e
+    arredondamentos de simular_carteira.
+
+    Args:
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        pesos (np.ndarray): Pesos de cada variante (variantes x ativos).
+        aportes (np.ndarray): Aportes de cada variante (variantes x meses).
+        aplicacao_inicial (np.ndarray): Valor em caixa de cada variante antes do primeiro mês.
+
+    Returns:
+        dict: 'posses' (variantes x ativos, ao fim do último mês), 'caixa' e 'valor' (variantes x meses).
+    """
+    precos = np.asarray(precos, dtype=float)
+    n_meses, n_ativos = precos.shape
+    pesos = np.asarray(pesos, dtype=float)
+    aportes = np.asarray(aportes, dtype=float)
+    n_variantes = pesos.shape[0]
+
+    compra = disponivel & (precos > 0)
+    posses = np.zeros((n_variantes, n_ativos))
+    caixa = np.empty((n_variantes, n_meses))
+    valor = np.empty((n_variantes, n_meses))
+    saldo = np.asarray(aplicacao_inicial, dtype=float).copy()
+
+    for mes in range(n_meses):
+        saldo = saldo + aportes[:, mes]
+        colunas = compra[mes]
+
+        # Valor investido em cada ativo e subtração sequencial do caixa, na ordem dos ativos
+        investido = saldo[:, None] * pesos[:, colunas]
+        posses[:, colunas] += investido / precos[mes, colunas]
+        saldo = arredondar_para_baixo(np.subtract.reduce(np.concatenate((saldo[:, None], investido), axis=1), axis=1))
+        caixa[:, mes] = saldo
+
+        valores_posicoes = arredondar_para_baixo(posses[:, disponivel[mes]] * precos[mes, disponivel[mes]])
+        valor[:, mes] = np.add.reduce(np.ascontiguousarray(valores_posicoes.T), axis=0) + saldo
+
+    return {
+        'posses': posses,
+        'caixa': caixa,
+        'valor': valor,
+    }
+
+
+def _proporcoes(valores):
+    """
+    Normaliza cada linha para somar 1 (linhas zeradas continuam zeradas).
+
+    Args:
+        valores (np.ndarray): Matriz de valores não negativos.
+
+    Returns:
+        np.ndarray: Proporções de cada linha.
+    """
+    somas = valores.sum(axis=1, keepdims=True)
+    return np.divide(valores, somas, out=np.zeros_like(valores), where=somas > 0)
+
+
+def simular_rebalanceamento(
+    precos, disponivel, pesos, aportes, aplicacao_inicial, datas, estrategia, banda=0.05, dividendos=None, reinvestir=False
+):
+    """
+    Simula variantes de uma carteira com uma estratégia de rebalanceamento, vetorizado entre ativos e variantes.
+
+    Estratégias:
+        - 'mensal', 'trimestral' e 'anual': no primeiro mês de cada período (janeiro, abril, julho e outubro
+          no trimestral; janeiro no anual) cada ativo volta ao peso alvo do valor total da carteira, com vendas;
+          nos outros meses o aporte é distribuído pelos pesos.
+        - 'bandas': rebalanceia no mês em que o peso de algum ativo nas posições (antes do aporte do mês) se
+          afasta do alvo mais que 'banda'.
+        - 'aportes': nunca vende; o caixa vai primeiro para os ativos abaixo do peso alvo.
+
+    Só são negociados os ativos com preço positivo no mês; a parte dos demais fica em caixa, como no cálculo
+    sem rebalanceamento. A primeira compra (sem posições) não conta como rebalanceamento. O caixa e o valor
+    de cada posição são arredondados para baixo com duas casas.
+
+    Com 'dividendos', cada posição recebe no mês os dividendos das ações que tinha no início do mês. Com
+    'reinvestir' eles compram mais do próprio ativo ao preço do mês (ou vão para o caixa investido, se o
+    ativo não tiver preço); sem ele ficam em um caixa separado, que entra no valor da carteira mas não é investido.
+
+    Args:
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        pesos (np.ndarray): Pesos alvo de cada variante (variantes x ativos).
+        aportes (np.ndarray): Aportes de cada variante (variantes x meses).
+        aplicacao_inicial (np.ndarray): Valor em caixa de cada variante antes do primeiro mês.
+        datas (pd.DatetimeIndex): Meses da simulação.
+        estrategia (str): Estratégia de rebalanceamento.
+        banda (float, optional): Desvio máximo do peso na estratégia 'bandas'. Default é 0.05.
+        dividendos (np.ndarray, optional): Dividendos por ação pagos em cada mês (meses x ativos).
+        reinvestir (bool, optional): Se os dividendos são reinvestidos no próprio ativo. Default é False.
+
+    Returns:
+        dict: 'posses' (variantes x ativos, ao fim do último mês), 'caixa' e 'valor' (variantes x meses),
+        'rebalanceamentos' (número de meses rebalanceados), 'giro' (valor total vendido) e 'proventos'
+        (total de dividendos recebidos) por variante.
+
+    Raises:
+        ValueError: Se a soma dos pesos de alguma variante for maior que 1.
+    """
+    precos = np.asarray(precos, dtype=float)
+    n_meses, n_ativos = precos.shape
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=float))
+    aportes = np.atleast_2d(np.asarray(aportes, dtype=float))
+    n_variantes = pesos.shape[0]
+    if (pesos.sum(axis=1) > 1 + 1e-9).any():
+        # Com vendas, pesos somando mais que 1 comprariam mais do que há em caixa
+        raise ValueError('A soma dos pesos não pode ser maior que 1')
+
+    compra = disponivel & (precos > 0)
+    periodo = PERIODOS_REBALANCEAMENTO.get(estrategia)
+    no_inicio_do_periodo = (pd.DatetimeIndex(datas).month.to_numpy() - 1) % periodo == 0 if periodo else None
+
+    posses = np.zeros((n_variantes, n_ativos))
+    caixa = np.empty((n_variantes, n_meses))
+    valor = np.empty((n_variantes, n_meses))
+    rebalanceamentos = np.zeros(n_variantes, dtype=int)
+    giro = np.zeros(n_variantes)
+    proventos = np.zeros(n_variantes)
+    caixa_proventos = np.zeros(n_variantes)
+    saldo = np.atleast_1d(np.asarray(aplicacao_inicial, dtype=float)).copy()
+
+    for mes in range(n_meses):
+        saldo = saldo + aportes[:, mes]
+        colunas = compra[mes]
+
+        if dividendos is not None and dividendos[mes].any():
+            recebidos = arredondar_para_baixo(posses * dividendos[mes])
+            proventos += recebidos.sum(axis=1)
+            if reinvestir:
+                posses[:, colunas] += recebidos[:, colunas] / precos[mes, colunas]
+                saldo = saldo + recebidos[:, ~colunas].sum(axis=1)
+            else:
+                caixa_proventos = arredondar_para_baixo(caixa_proventos + recebidos.sum(axis=1))
+
+        preco = precos[mes, colunas]
+        pesos_mes = pesos[:, colunas]
+        valores_atuais = posses[:, colunas] * preco
+        total = saldo + valores_atuais.sum(axis=1)
+
+        # Valor negociado em cada ativo (positivo compra, negativo vende): por padrão o caixa segue os pesos
+        if estrategia == 'aportes':
+            # Cobre primeiro os déficits em relação ao peso alvo; o que sobrar segue os pesos
+            investir = saldo * pesos_mes.sum(axis=1)
+            deficits = np.maximum(pesos_mes * total[:, None] - valores_atuais, 0.0)
+            cobre = np.minimum(investir, deficits.sum(axis=1))
+            movimentos = (
+                cobre[:, None] * _proporcoes(deficits)
+                + (investir - cobre)[:, None] * _proporcoes(pesos_mes)
+            )
+        else:
+            movimentos = saldo[:, None] * pesos_mes
+
+        if periodo:
+            rebalancear = np.full(n_variantes, no_inicio_do_periodo[mes])
+        elif estrategia == 'bandas':
+            # Desvio medido só nas posições: o aporte ainda não investido não é desvio
+            rebalancear = (np.abs(_proporcoes(valores_atuais) - _proporcoes(pesos_mes)) > banda).any(axis=1)
+        else:
+            rebalancear = np.zeros(n_variantes, dtype=bool)
+        rebalancear &= valores_atuais.sum(axis=1) > 0
+
+        # Rebalanceamento: cada ativo vai para o peso alvo do valor total, vendendo o excesso
+        movimentos = np.where(rebalancear[:, None], pesos_mes * total[:, None] - valores_atuais, movimentos)
+        rebalanceamentos += rebalancear
+        giro += np.maximum(-movimentos, 0.0).sum(axis=1)
+
+        posses[:, colunas] += movimentos / preco
+        # Com os pesos somando no máximo 1 o saldo não fica negativo; o limite só absorve erros de ponto flutuante
+        saldo = arredondar_para_baixo(np.maximum(saldo - movimentos.sum(axis=1), 0.0))
+        caixa[:, mes] = saldo
+
+        valores_posicoes = arredondar_para_baixo(posses[:, disponivel[mes]] * precos[mes, disponivel[mes]])
+        valor[:, mes] = np.add.reduce(np.ascontiguousarray(valores_posicoes.T), axis=0) + saldo + caixa_proventos
+
+    return {
+        'posses': posses,
+        'caixa': caixa,
+        'valor': valor,
+        'rebalanceamentos': rebalanceamentos,
+        'giro': giro,
+        'proventos': proventos,
+    }
+
+
+def fatores_crescimento(precos, disponivel, pesos):
+    """
+    Calcula o valor final de uma unidade de dinheiro aportada em cada mês da simulação.
+
+    Sem os arredondamentos, o valor final da carteira é linear nos aportes: cada aporte compra ativos ao
+    preço do mês (a parte dos ativos sem preço fica em caixa e é investida no mês seguinte) e é avaliado
+    pelos preços do último mês. Assim, o valor final de qualquer cronograma de aportes é o produto escalar
+    dos aportes pelos fatores.
+
+    Args:
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        pesos (array-like): Peso de cada ativo.
+
+    Returns:
+        np.ndarray: Fator de crescimento de cada mês.
+    """
+    precos = np.asarray(precos, dtype=float)
+    n_meses = precos.shape[0]
+    pesos = np.asarray(pesos, dtype=float)
+    if n_meses == 0:
+        return np.zeros(0)
+
+    compra = disponivel & (precos > 0)
+
+    # Crescimento de cada ativo do mês da compra até o último mês (ativos sem preço no fim valem zero)
+    crescimento = np.zeros_like(precos)
+    preco_final = np.where(disponivel[-1], precos[-1], 0.0)
+    np.divide(np.broadcast_to(preco_final, precos.shape), precos, out=crescimento, where=compra)
+
+    rendimento_investido = (crescimento * pesos[None, :]).sum(axis=1)
+    fracao_em_caixa = 1 - (compra * pesos[None, :]).sum(axis=1)
+
+    # Recorrência de trás para frente: o que fica em caixa segue o fator do mês seguinte
+    fatores = np.empty(n_meses)
+    seguinte = 1.0
+    for mes in range(n_meses - 1, -1, -1):
+        seguinte = rendimento_investido[mes] + fracao_em_caixa[mes] * seguinte
+        fatores[mes] = seguinte
+
+    return fatores
+
+
+def contribuicoes_ativos(precos, disponivel, pesos, aportes):
+    """
+    Decompõe o valor da carteira em cada mês em uma parte fixa e uma contribuição por unidade de peso de cada ativo.
+
+    Sem os arredondamentos, com 'investido' o caixa distribuído em cada mês, o valor da carteira é
+    investido + matriz @ pesos. Para outros pesos a decomposição é exata enquanto o caixa distribuído
+    não muda, o que vale quando todos os ativos têm preço em todos os meses e a soma dos pesos se mantém.
+
+    Args:
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        pesos (array-like): Peso de cada ativo.
+        aportes (array-like): Aporte de cada mês (a aplicação inicial entra no primeiro mês).
+
+    Returns:
+        tuple: (np.ndarray com o caixa distribuído em cada mês, np.ndarray meses x ativos com a contribuição
+        por unidade de peso).
+    """
+    precos = np.asarray(precos, dtype=float)
+    n_meses = precos.shape[0]
+    pesos = np.asarray(pesos, dtype=float)
+    aportes = np.asarray(aportes, dtype=float)
+
+    compra = disponivel & (precos > 0)
+    fracao_em_caixa = 1 - (compra * pesos[None, :]).sum(axis=1)
+
+    # Caixa distribuído: aporte do mês mais o que sobrou do mês anterior
+    investido = np.empty(n_meses)
+    sobra = 0.0
+    for mes in range(n_meses):
+        investido[mes] = aportes[mes] + sobra
+        sobra = investido[mes] * fracao_em_caixa[mes]
+
+    # Quantidade acumulada por unidade de peso, avaliada ao preço de cada mês, menos o caixa que ela consumiu
+    quantidades = np.zeros_like(precos)
+    np.divide(np.broadcast_to(investido[:, None], precos.shape), precos, out=quantidades, where=compra)
+    valores = np.where(disponivel, np.cumsum(quantidades, axis=0) * precos, 0.0)
+
+    return investido, valores - compra * investido[:, None]
+
+
+def valores_janelas(precos, pesos, horizonte, aplicacao_inicial, aplicacao_mensal):
+    """
+    Calcula o valor final de uma carteira para todas as janelas de 'horizonte' meses, uma por mês de início.
+
+    Em cada janela a aplicação inicial e os aportes mensais compram os ativos pelos pesos ao preço do mês
+    e são avaliados pelos preços do último mês da janela. A quantidade comprada por unidade de dinheiro
+    é 1 / preço, de modo que a soma dos aportes de qualquer janela sai da diferença de duas somas
+    acumuladas, para todas as janelas de uma vez. Não considera os arredondamentos de centavos.
+
+    Args:
+        precos (np.ndarray): Preços (meses x ativos); zero nos meses sem preço.
+        pesos (array-like): Peso de cada ativo (somando 1).
+        horizonte (int): Número de meses de cada janela.
+        aplicacao_inicial (float): Valor aplicado no primeiro mês de cada janela.
+        aplicacao_mensal (float): Aporte de cada mês da janela (inclusive o primeiro).
+
+    Returns:
+        tuple: (np.ndarray com o valor final de cada janela, np.ndarray booleano indicando as janelas em que
+        todos os ativos com peso têm preço em todos os meses).
+    """
+    precos = np.asarray(precos, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+    n_meses = precos.shape[0]
+    n_janelas = n_meses - horizonte + 1
+    if horizonte < 1 or n_janelas < 1:
+        return np.zeros(0), np.zeros(0, dtype=bool)
+
+    com_preco = precos > 0
+    inversos = np.zeros_like(precos)
+    np.divide(1.0, precos, out=inversos, where=com_preco)
+
+    # Somas acumuladas (com um zero no início) de 1 / preço e dos meses sem preço de cada ativo
+    acumulado = np.vstack((np.zeros(precos.shape[1]), np.cumsum(inversos, axis=0)))
+    faltas = np.vstack((np.zeros(precos.shape[1], dtype=int), np.cumsum(~com_preco, axis=0)))
+
+    inicios = np.arange(n_janelas)
+    fins = inicios + horizonte - 1
+
+    quantidades = aplicacao_inicial * inversos[inicios] + aplicacao_mensal * (acumulado[fins + 1] - acumulado[inicios])
+    valores = (quantidades * precos[fins] * pesos[None, :]).sum(axis=1)
+
+    completas = ((faltas[fins + 1] - faltas[inicios]) * (pesos[None, :] > 0)).sum(axis=1) == 0
+    return valores, completas
+
+
+def projetar_caminhos(retornos, pesos, posicoes_iniciais, aporte, horizonte, n_caminhos, semente,
+                      metodo='bootstrap', bloco=12, estrategia='nenhum', banda=0.05, inicio_do_periodo=None):
+    """
+    Gera um lote de caminhos futuros do valor de uma carteira a partir dos retornos mensais históricos dos ativos.
+
+    Métodos:
+        - 'parametrico': os log-retornos de cada mês são sorteados de uma normal multivariada com a média e a
+          covariância históricas.
+        - 'bootstrap': os meses são sorteados do histórico em blocos de 'bloco' meses consecutivos (circulares),
+          preservando a correlação entre os ativos e parte da dependência entre meses.
+
+    A cada mês as posições rendem o retorno sorteado e depois recebem o aporte, com as mesmas regras de
+    simular_rebalanceamento ('aportes' cobre primeiro os déficits; 'bandas' e as estratégias periódicas
+    voltam aos pesos alvo). Todos os caminhos do lote avançam juntos; só o sorteio é refeito a cada mês,
+    para não materializar a matriz caminhos x meses x ativos. Não considera os arredondamentos de centavos.
+
+    Args:
+        retornos (np.ndarray): Retornos mensais históricos (meses x ativos), com dividendos.
+        pesos (array-like): Peso alvo de cada ativo (somando 1).
+        posicoes_iniciais (array-like): Valor de cada posição no início da projeção.
+        aporte (float): Aporte de cada mês.
+        horizonte (int): Número de meses projetados.
+        n_caminhos (int): Número de caminhos do lote.
+        semente (np.random.SeedSequence ou int): Semente do gerador do lote.
+        metodo (str, optional): 'parametrico' ou 'bootstrap'. Default é 'bootstrap'.
+        bloco (int, optional): Tamanho dos blocos do bootstrap. Default é 12.
+        estrategia (str, optional): Estratégia de rebalanceamento. Default é 'nenhum'.
+        banda (float, optional): Desvio máximo do peso na estratégia 'bandas'. Default é 0.05.
+        inicio_do_periodo (np.ndarray, optional): Máscara dos meses projetados em que as estratégias periódicas
+            rebalanceiam.
+
+    Returns:
+        np.ndarray: Valor da carteira ao fim de cada mês (caminhos x meses), em float32.
+    """
+    retornos = np.asarray(retornos, dtype=float)
+    pesos = np.asarray(pesos, dtype=float)
+    gerador = np.random.default_rng(semente)
+    n_historico, n_ativos = retornos.shape
+
+    if metodo == 'parametrico':
+        logs = np.log1p(retornos)
+        media = logs.mean(axis=0)
+        covariancia = np.atleast_2d(np.cov(logs, rowvar=False)) if n_historico > 1 else np.zeros((n_ativos, n_ativos))
+        # Raiz da covariância por autovalores: funciona também com matrizes apenas semidefinidas
+        autovalores, autovetores = np.linalg.eigh(covariancia)
+        raiz = autovetores * np.sqrt(np.maximum(autovalores, 0.0))[None, :]
+    else:
+        n_blocos = -(-horizonte // bloco)
+        inicios = gerador.integers(0, n_historico, size=(n_caminhos, n_blocos))
+        indices = ((inicios[:, :, None] + np.arange(bloco)[None, None, :]) % n_historico).reshape(n_caminhos, -1)[:, :horizonte]
+
+    periodo = PERIODOS_REBALANCEAMENTO.get(estrategia)
+    posicoes = np.broadcast_to(np.asarray(posicoes_iniciais, dtype=float), (n_caminhos, n_ativos)).copy()
+    valores = np.empty((n_caminhos, horizonte), dtype=np.float32)
+
+    for mes in range(horizonte):
+        if metodo == 'parametrico':
+            posicoes *= np.exp(media + gerador.standard_normal((n_caminhos, n_ativos)) @ raiz.T)
+        else:
+            posicoes *= 1 + retornos[indices[:, mes]]
+
+        total = aporte + posicoes.sum(axis=1)
+        if estrategia == 'aportes':
+            deficits = np.maximum(pesos * total[:, None] - posicoes, 0.0)
+            cobre = np.minimum(aporte, deficits.sum(axis=1))
+            movimentos = cobre[:, None] * _proporcoes(deficits) + (aporte - cobre)[:, None] * pesos
+        else:
+            movimentos = np.broadcast_to(aporte * pesos, posicoes.shape)
+
+        if periodo:
+            rebalancear = np.full(n_caminhos, bool(inicio_do_periodo[mes]))
+        elif estrategia == 'bandas':
+            # Como em simular_rebalanceamento, o desvio é medido só nas posições, antes do aporte
+            rebalancear = (np.abs(_proporcoes(posicoes) - pesos) > banda).any(axis=1)
+        else:
+            rebalancear = np.zeros(n_caminhos, dtype=bool)
+
+        posicoes = np.where(rebalancear[:, None], pesos * total[:, None], posicoes + movimentos)
+        valores[:, mes] = posicoes.sum(axis=1)
+
+    return valores
+
+
+def simular_aportes_vetorizado(ativos, aplicacoes_mensais_ajustadas, datas_validas, aplicacao_inicial_ajustada):
+    """
+    Versão vetorizada de simulate_monthly_investments, com as mesmas entradas e saídas.
+
+    Args:
+        ativos (list): Lista de ativos (a posse final é atualizada em cada um).
+        aplicacoes_mensais_ajustadas (list): Lista de aplicações mensais ajustadas.
+        datas_validas (list): Datas válidas para a simulação.
+        aplicacao_inicial_ajustada (float): Aplicação inicial ajustada.
+
+    Returns:
+        list: Lista contendo o valor total da carteira em cada mês.
+    """
+    datas_validas = pd.DatetimeIndex(datas_validas)
+    if len(datas_validas) == 0:
+        return []
+
+    precos, disponivel = montar_matriz_precos(ativos, datas_validas)
+    resultado = simular_carteira(
+        precos,
+        disponivel,
+        pesos=[ativo.peso for ativo in ativos],
+        aportes=aplicacoes_mensais_ajustadas,
+        aplicacao_inicial=aplicacao_inicial_ajustada,
+        posse_inicial=[ativo.posse for ativo in ativos]
+    )
+
+    for coluna, ativo in enumerate(ativos):
+        ativo.posse = float(resultado['posses'][-1, coluna])
+
+    return list(zip(datas_validas, resultado['valor'].tolist()))
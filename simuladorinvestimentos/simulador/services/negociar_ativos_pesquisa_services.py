@@ -1,9 +1,8 @@
-import yfinance as yf
-
 from django.shortcuts import get_object_or_404
 
 from datetime import datetime
 
+from .diretorio_simbolos_services import consultar_simbolo
 from ..models import SimulacaoManual
 
 
@@ -25,15 +24,14 @@ def pesquisar_ativo(ticker, simulacao_id):
             simulacao.mes_atual.date() if isinstance(simulacao.mes_atual, datetime) else simulacao.mes_atual
         )
 
-        # Busca o histórico do ativo usando o yfinance com preços não ajustados
-        ativo = yf.Ticker(ticker)
-        historico = ativo.history(period='max', auto_adjust=False)
+        # Consulta o diretório local de símbolos (a rede só é usada para tickers desconhecidos)
+        simbolo = consultar_simbolo(ticker)
 
-        if historico.empty:
+        if simbolo is None:
             return {'exists': False, 'error': 'Sem histórico de preços para o ticker fornecido.'}, 404
 
-        # Pega a primeira data disponível nos dados históricos
-        data_inicio_ticker = historico.index[0].date()
+        # Data da primeira negociação do ativo
+        data_inicio_ticker = simbolo['data_primeira_negociacao']
 
         # Verifica se a data de início do ativo é anterior ou igual à data atual da simulação
         if data_inicio_ticker <= data_atual_simulacao:
@@ -2,10 +2,13 @@ from django.utils import timezone
 
 from ..models import CarteiraAutomatica, SimulacaoAutomatica, Historico
 from datetime import datetime
-from ..utils import pegar_inflacao
+from .inflacao_services import periodo_ipca
+from .benchmarks_services import validar_benchmarks
 
 
-def criar_simulacao_automatica(nome, data_inicial, data_final, aplicacao_inicial, aplicacao_mensal, moeda_base, usuario):
+def criar_simulacao_automatica(nome, data_inicial, data_final, aplicacao_inicial, aplicacao_mensal, moeda_base, usuario,
+                               estrategia_rebalanceamento=None, banda_rebalanceamento=None, dividendos=None,
+                               benchmarks=None):
     """
     Cria uma simulação automática de investimentos para um usuário.
 
@@ -17,18 +20,33 @@ def criar_simulacao_automatica(nome, data_inicial, data_final, aplicacao_inicial
         aplicacao_mensal (float): Valor da aplicação mensal.
         moeda_base (str): Moeda base da simulação.
         usuario (User): Usuário que está criando a simulação.
+        estrategia_rebalanceamento (str, optional): Estratégia de rebalanceamento. Default é 'nenhum'.
+        banda_rebalanceamento (float, optional): Desvio máximo do peso na estratégia 'bandas'. Default é 0.05.
+        dividendos (str, optional): Tratamento dos dividendos ('ignorar', 'caixa' ou 'reinvestir'). Default é 'ignorar'.
+        benchmarks (list, optional): Referências de comparação ('ipca', 'sgs:<código>' ou tickers).
 
     Returns:
         tuple: Objeto da simulação automática e da carteira automática criados.
+
+    Raises:
+        ValueError: Se a estratégia de rebalanceamento, a banda, o tratamento dos dividendos ou os benchmarks forem inválidos.
     """
-    # Obter os dados de inflação desde a data inicial até a data atual
-    inflacao_total = pegar_inflacao(start_date=data_inicial, end_date=datetime.today().strftime('%Y-%m-%d'))
-    if inflacao_total is None:
-        raise Exception('Falha ao buscar dados de inflação')
+    estrategia_rebalanceamento = estrategia_rebalanceamento or SimulacaoAutomatica.SEM_REBALANCEAMENTO
+    if estrategia_rebalanceamento not in dict(SimulacaoAutomatica.ESTRATEGIAS_REBALANCEAMENTO):
+        raise ValueError(f'Estratégia de rebalanceamento inválida: {estrategia_rebalanceamento}')
+    banda_rebalanceamento = 0.05 if banda_rebalanceamento is None else float(banda_rebalanceamento)
+    if not 0 < banda_rebalanceamento < 1:
+        raise ValueError('A banda de rebalanceamento deve estar entre 0 e 1.')
+    dividendos = dividendos or SimulacaoAutomatica.DIVIDENDOS_IGNORAR
+    if dividendos not in dict(SimulacaoAutomatica.TRATAMENTOS_DIVIDENDOS):
+        raise ValueError(f'Tratamento de dividendos inválido: {dividendos}')
+    benchmarks = validar_benchmarks(benchmarks)
 
-    # Formatar a data no DataFrame de inflação e converter para um dicionário
-    inflacao_total['Data'] = inflacao_total['Data'].dt.strftime('%Y-%m-%d')
-    inflacao_dict = inflacao_total.to_dict(orient='records')
+    # Referenciar o trecho da tabela compartilhada de IPCA, da data inicial até o último mês publicado
+    periodo_inflacao = periodo_ipca(data_inicial)
+    if periodo_inflacao is None:
+        raise Exception('Falha ao buscar dados de inflação')
+    inflacao_inicio, inflacao_fim = periodo_inflacao
 
     # Criar a carteira automática associada à simulação
     carteira_automatica = CarteiraAutomatica.objects.create(
@@ -46,7 +64,12 @@ def criar_simulacao_automatica(nome, data_inicial, data_final, aplicacao_inicial
         aplicacao_mensal=aplicacao_mensal,
         carteira_automatica=carteira_automatica,
         usuario=usuario,
-        inflacao_total=inflacao_dict
+        inflacao_inicio=inflacao_inicio,
+        inflacao_fim=inflacao_fim,
+        estrategia_rebalanceamento=estrategia_rebalanceamento,
+        banda_rebalanceamento=banda_rebalanceamento,
+        dividendos=dividendos,
+        benchmarks=benchmarks
     )
 
     # Obter ou criar o histórico do usuário e associar a nova simulação automática
@@ -1,7 +1,7 @@
 from django.utils import timezone
 
 from ..models import CarteiraManual, SimulacaoManual, Historico
-from ..utils import pegar_inflacao
+from .inflacao_services import periodo_ipca
 
 from datetime import datetime
 
@@ -20,14 +20,11 @@ def criar_simulacao_manual(nome, data_inicial, moeda_base, usuario):
     Returns:
         tuple: Objeto da simulação manual e da carteira manual criados.
     """
-    # Obter os dados de inflação desde a data inicial até hoje
-    inflacao_total = pegar_inflacao(start_date=data_inicial, end_date=datetime.today().strftime('%Y-%m-%d'))
-    if inflacao_total is None:
+    # Referenciar o trecho da tabela compartilhada de IPCA, da data inicial até o último mês publicado
+    periodo_inflacao = periodo_ipca(data_inicial)
+    if periodo_inflacao is None:
         raise Exception('Failed to fetch inflation data')
-
-    # Formatar a data no DataFrame de inflação e converter para um dicionário
-    inflacao_total['Data'] = inflacao_total['Data'].dt.strftime('%Y-%m-%d')
-    inflacao_dict = inflacao_total.to_dict(orient='records')
+    inflacao_inicio, inflacao_fim = periodo_inflacao
 
     # Criar a carteira manual associada à simulação
     carteira_manual = CarteiraManual.objects.create(
@@ -42,7 +39,8 @@ def criar_simulacao_manual(nome, data_inicial, moeda_base, usuario):
         data_inicial=data_inicial,
         carteira_manual=carteira_manual,
         usuario=usuario,
-        inflacao_total=inflacao_dict,
+        inflacao_inicio=inflacao_inicio,
+        inflacao_fim=inflacao_fim,
         mes_atual=data_inicial
     )
 
@@ -0,0 +1,399 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+
+from ..models import SimulacaoAutomatica
+from .janelas_moveis_services import montar_matriz_precos_mensais
+from .taxas_services import obter_taxa_mensal
+
+
+# Cache em memória (por processo) das estimativas: (tickers ordenados, moeda, início, fim) -> entrada
+_cache = OrderedDict()
+_lock = threading.Lock()
+_contadores = {'acertos_memoria': 0, 'faltas': 0, 'despejos': 0}
+
+# Gradiente projetado acelerado da fronteira eficiente
+ITERACOES = 5000
+TOLERANCIA = 1e-10
+
+
+def _guardar_estimativa(chave, estimativa):
+    """
+    Guarda uma estimativa no cache em memória, despejando as menos usadas quando o limite é atingido.
+
+    Args:
+        chave (tuple): Conjunto de tickers, moeda e janela.
+        estimativa (dict): Média, covariância e meses usados.
+    """
+    ttl = getattr(settings, 'OTIMIZACAO_CACHE_TTL', 24 * 3600)
+    tamanho_maximo = getattr(settings, 'OTIMIZACAO_CACHE_TAMANHO', 128)
+
+    with _lock:
+        _cache[chave] = (estimativa, time.monotonic() + ttl)
+        _cache.move_to_end(chave)
+        while len(_cache) > tamanho_maximo:
+            _cache.popitem(last=False)
+            _contadores['despejos'] += 1
+
+
+def _ler_estimativa(chave):
+    with _lock:
+        entrada = _cache.get(chave)
+        if entrada is None or time.monotonic() >= entrada[1]:
+            _cache.pop(chave, None)
+            _contadores['faltas'] += 1
+            return None
+        _cache.move_to_end(chave)
+        _contadores['acertos_memoria'] += 1
+        return entrada[0]
+
+
+def estatisticas_otimizacao():
+    """
+    Retorna os contadores de acertos e faltas do cache de covariâncias deste processo.
+
+    Returns:
+        dict: Contadores do cache e quantidade de estimativas em memória.
+    """
+    with _lock:
+        estatisticas = dict(_contadores)
+        estatisticas['em_memoria'] = len(_cache)
+
+    total = estatisticas['acertos_memoria'] + estatisticas['faltas']
+    estatisticas['taxa_acerto'] = round(estatisticas['acertos_memoria'] / total, 4) if total else None
+    return estatisticas
+
+
+def encolher_covariancia(retornos):
+    """
+    Estima a covariância dos retornos com encolhimento de Ledoit-Wolf em direção à diagonal.
+
+    Com mais ativos que meses a covariância amostral é singular: a otimização encontra carteiras de
+    variância zero dentro da amostra. O encolhimento mistura a amostral com a matriz só com as variâncias,
+    com a intensidade que minimiza o erro quadrático esperado, e o resultado é sempre definido positivo
+    quando todos os ativos têm variância.
+
+    Args:
+        retornos (np.ndarray): Retornos mensais (meses x ativos).
+
+    Returns:
+        tuple: (np.ndarray com a covariância encolhida (ativos x ativos), intensidade do encolhimento entre 0 e 1).
+    """
+    n_meses = retornos.shape[0]
+    centrados = retornos - retornos.mean(axis=0)
+    amostral = centrados.T @ centrados / n_meses
+    diagonal = np.diag(np.diag(amostral))
+
+    # Variância da estimativa de cada covariância e distância da amostral ao alvo, ambas fora da diagonal
+    quadrados = centrados ** 2
+    variancias_estimativa = quadrados.T @ quadrados / n_meses - amostral ** 2
+    np.fill_diagonal(variancias_estimativa, 0.0)
+    distancia = float(((amostral - diagonal) ** 2).sum())
+    intensidade = 1.0 if distancia <= 0 else min(max(variancias_estimativa.sum() / n_meses / distancia, 0.0), 1.0)
+
+    return intensidade * diagonal + (1 - intensidade) * amostral, intensidade
+
+
+def estimar_retornos(tickers, moeda_base, inicio, fim):
+    """
+    Estima a média e a covariância dos retornos mensais de vários tickers, com cache por conjunto de tickers e janela.
+
+    Usa apenas os meses em que todos os tickers têm preço no mês e no anterior; a covariância é encolhida
+    em direção à diagonal (ver encolher_covariancia). A estimativa é guardada na ordem alfabética dos tickers
+    e devolvida na ordem pedida, de modo que a mesma lista em outra ordem reaproveita o cache. Estimativas
+    com tickers sem preço não são guardadas: a falha de um download não bloqueia a lista até o fim do TTL.
+
+    Args:
+        tickers (list): Lista de tickers.
+        moeda_base (str): Moeda da carteira.
+        inicio (datetime.date): Primeiro mês da janela.
+        fim (datetime.date): Último mês da janela (inclusivo).
+
+    Returns:
+        dict: 'media' (por ativo), 'covariancia' (ativos x ativos), 'encolhimento' (intensidade do
+        encolhimento), 'meses' (número de retornos usados), 'sem_precos' (tickers sem nenhum preço na janela)
+        e 'cache' (se veio do cache).
+    """
+    ordenados = sorted(tickers)
+    chave = (tuple(ordenados), moeda_base, inicio, fim)
+
+    estimativa = _ler_estimativa(chave)
+    em_cache = estimativa is not None
+    if estimativa is None:
+        _, precos = montar_matriz_precos_mensais(ordenados, moeda_base, inicio, fim)
+        validos = (precos[1:] > 0).all(axis=1) & (precos[:-1] > 0).all(axis=1)
+        retornos = precos[1:][validos] / precos[:-1][validos] - 1
+        n_ativos = len(ordenados)
+        covariancia, encolhimento = (
+            encolher_covariancia(retornos) if len(retornos) > 1 else (np.zeros((n_ativos, n_ativos)), 0.0)
+        )
+        estimativa = {
+            'media': retornos.mean(axis=0) if len(retornos) else np.zeros(n_ativos),
+            'covariancia': covariancia,
+            'encolhimento': encolhimento,
+            'meses': int(len(retornos)),
+            'sem_precos': [ticker for ticker, coluna in zip(ordenados, precos.T) if not (coluna > 0).any()],
+        }
+        if not estimativa['sem_precos']:
+            _guardar_estimativa(chave, estimativa)
+
+    ordem = np.array([ordenados.index(ticker) for ticker in tickers])
+    return {
+        'media': estimativa['media'][ordem],
+        'covariancia': estimativa['covariancia'][np.ix_(ordem, ordem)],
+        'encolhimento': estimativa['encolhimento'],
+        'meses': estimativa['meses'],
+        'sem_precos': estimativa['sem_precos'],
+        'cache': em_cache,
+    }
+
+
+def projetar_simplex(valores):
+    """
+    Projeta cada linha na simplex (pesos não negativos somando 1), todas de uma vez.
+
+    Args:
+        valores (np.ndarray): Matriz (linhas x ativos).
+
+    Returns:
+        np.ndarray: Projeção de cada linha.
+    """
+    n_ativos = valores.shape[1]
+    ordenados = -np.sort(-valores, axis=1)
+    acumulados = np.cumsum(ordenados, axis=1) - 1
+    posicoes = np.arange(1, n_ativos + 1)
+    positivos = ordenados - acumulados / posicoes > 0
+    # Último índice em que a condição vale, em cada linha
+    ultimo = n_ativos - 1 - np.argmax(positivos[:, ::-1], axis=1)
+    limiar = acumulados[np.arange(len(valores)), ultimo] / (ultimo + 1)
+    return np.maximum(valores - limiar[:, None], 0.0)
+
+
+def fronteira_eficiente(media, covariancia, aversoes, iniciais=None):
+    """
+    Calcula as carteiras sem venda a descoberto que minimizam w'Σw - λ μ'w para vários λ de uma só vez.
+
+    Usa gradiente projetado acelerado com reinício adaptativo: todas as carteiras avançam juntas em uma
+    matriz (λ x ativos), de modo que cada iteração é um único produto de matrizes. Com λ = 0 a solução é a de mínima variância;
+    λ maiores percorrem a fronteira eficiente até a carteira de maior retorno.
+
+    Args:
+        media (np.ndarray): Retorno médio de cada ativo.
+        covariancia (np.ndarray): Covariância dos retornos (ativos x ativos).
+        aversoes (np.ndarray): Valores de λ.
+        iniciais (np.ndarray, optional): Pesos iniciais (λ x ativos). Default são pesos iguais.
+
+    Returns:
+        np.ndarray: Pesos (λ x ativos).
+    """
+    n_ativos = len(media)
+    aversoes = np.asarray(aversoes, dtype=float)
+    passo = 1 / max(2 * np.linalg.eigvalsh(covariancia)[-1], 1e-18)
+
+    pesos = np.full((len(aversoes), n_ativos), 1 / n_ativos) if iniciais is None else np.array(iniciais, dtype=float)
+    inclinacao = aversoes[:, None] * media[None, :]
+    auxiliar = pesos.copy()
+    momento = np.ones(len(aversoes))
+    for _ in range(ITERACOES):
+        anteriores = pesos
+        pesos = projetar_simplex(auxiliar - passo * (2 * auxiliar @ covariancia - inclinacao))
+        # Reinício adaptativo: a inércia é zerada nas linhas em que o passo passou a ir contra o gradiente
+        momento = np.where(((auxiliar - pesos) * (pesos - anteriores)).sum(axis=1) > 0, 1.0, momento)
+        proximo = (1 + np.sqrt(1 + 4 * momento ** 2)) / 2
+        auxiliar = pesos + ((momento - 1) / proximo)[:, None] * (pesos - anteriores)
+        momento = proximo
+        if np.abs(pesos - anteriores).max() < TOLERANCIA:
+            break
+    return pesos
+
+
+def paridade_risco(covariancia, iteracoes=100):
+    """
+    Calcula os pesos em que cada ativo contribui igualmente para o risco da carteira.
+
+    Resolve por Newton a formulação convexa min ½ y'Σy - Σ log(y_i) / n (os pesos são y normalizado),
+    com passos reduzidos à metade enquanto algum y ficaria negativo.
+
+    Args:
+        covariancia (np.ndarray): Covariância dos retornos (ativos x ativos).
+        iteracoes (int, optional): Número máximo de iterações. Default é 100.
+
+    Returns:
+        np.ndarray: Pesos de cada ativo.
+    """
+    n_ativos = covariancia.shape[0]
+    orcamento = np.full(n_ativos, 1 / n_ativos)
+    # Regularização mínima para ativos sem variância
+    covariancia = covariancia + np.eye(n_ativos) * 1e-12 * max(np.trace(covariancia), 1e-12)
+    y = 1 / np.sqrt(np.maximum(np.diag(covariancia), 1e-18))
+    y = y / np.sqrt(y @ covariancia @ y)
+
+    for _ in range(iteracoes):
+        gradiente = covariancia @ y - orcamento / y
+        if np.abs(gradiente * y).max() < 1e-12:
+            break
+        direcao = np.linalg.solve(covariancia + np.diag(orcamento / y ** 2), gradiente)
+        passo = 1.0
+        while (y - passo * direcao <= 0).any():
+            passo /= 2
+        y = y - passo * direcao
+    return y / y.sum()
+
+
+def _resumir(pesos, media, covariancia, taxa_livre, tickers, contribuicoes_risco=True):
+    """
+    Resume uma carteira: pesos relevantes, retorno e volatilidade anuais, Sharpe e contribuição de cada ativo ao risco.
+
+    Args:
+        pesos (np.ndarray): Pesos de cada ativo.
+        media (np.ndarray): Retorno médio mensal de cada ativo.
+        covariancia (np.ndarray): Covariância mensal dos retornos.
+        taxa_livre (float): Taxa livre de risco mensal.
+        tickers (list): Tickers dos ativos.
+        contribuicoes_risco (bool, optional): Se as contribuições ao risco devem ser incluídas. Default é True.
+
+    Returns:
+        dict: Resumo da carteira.
+    """
+    marginais = covariancia @ pesos
+    variancia = float(pesos @ marginais)
+    retorno = 12 * float(media @ pesos)
+    volatilidade = float(np.sqrt(max(variancia, 0.0) * 12))
+    contribuicoes = pesos * marginais / variancia if variancia > 0 else np.zeros(len(pesos))
+    relevantes = pesos > 1e-6
+    resumo = {
+        'pesos': {ticker: round(float(peso), 6) for ticker, peso, relevante in zip(tickers, pesos, relevantes) if relevante},
+        'retorno_anual': round(retorno, 6),
+        'volatilidade_anual': round(volatilidade, 6),
+        'sharpe': round((retorno - 12 * taxa_livre) / volatilidade, 6) if volatilidade > 1e-12 else None,
+    }
+    if contribuicoes_risco:
+        resumo['contribuicoes_risco'] = {
+            ticker: round(float(contribuicao), 6)
+            for ticker, contribuicao, relevante in zip(tickers, contribuicoes, relevantes) if relevante
+        }
+    return resumo
+
+
+def otimizar_carteira(tickers, user=None, simulacao_id=None, data_inicial=None, data_final=None, janela_meses=None,
+                      moeda_base=None, pontos_fronteira=30, taxa_livre=None):
+    """
+    Calcula a fronteira eficiente e as carteiras de mínima variância, máximo Sharpe e paridade de risco
+    para uma lista de ativos, sem venda a descoberto.
+
+    A média e a covariância dos retornos mensais vêm do armazém compartilhado de preços e ficam em cache
+    por conjunto de tickers e janela; a covariância é encolhida em direção à diagonal, o que mantém a
+    otimização bem definida com mais ativos que meses. Com uma simulação automática, a janela padrão são os 'janela_meses'
+    meses anteriores à data inicial da simulação (sem usar preços do período simulado) e a moeda é a da carteira.
+    A carteira de máximo Sharpe é a melhor da fronteira, refinada entre os pontos vizinhos.
+
+    Args:
+        tickers (list): Lista de tickers candidatos.
+        user (User, optional): Usuário autenticado, necessário com 'simulacao_id'.
+        simulacao_id (int, optional): ID de uma simulação automática que define a janela e a moeda padrão.
+        data_inicial (str, optional): Primeiro mês da janela; por padrão, 'janela_meses' antes da data final.
+        data_final (str, optional): Último mês da janela; por padrão, o mês anterior à data inicial da
+            simulação ou o mês anterior ao atual.
+        janela_meses (int, optional): Tamanho da janela quando 'data_inicial' é omitida. Default é OTIMIZACAO_JANELA_MESES.
+        moeda_base (str, optional): Moeda da carteira. Default é a da simulação ou 'BRL'.
+        pontos_fronteira (int, optional): Número de pontos da fronteira. Default é 30.
+        taxa_livre (float, optional): Taxa livre de risco anual (ex.: 0.1 para 10%). Default é a média da
+            série METRICAS_CODIGO_TAXA_LIVRE na janela.
+
+    Returns:
+        tuple: Dicionário com as carteiras, a fronteira e as estatísticas de cada ativo, e código de status HTTP.
+    """
+    try:
+        fim_padrao = pd.Timestamp.today().to_period('M').start_time.date() - relativedelta(months=1)
+        if simulacao_id:
+            simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id, usuario=user)
+            fim_padrao = simulacao.data_inicial.replace(day=1) - relativedelta(months=1)
+            moeda_base = moeda_base or simulacao.carteira_automatica.moeda_base
+
+        try:
+            tickers = list(dict.fromkeys(str(ticker).strip().upper() for ticker in tickers or []))
+            fim = pd.Timestamp(data_final).to_period('M').start_time.date() if data_final else fim_padrao
+            janela = int(janela_meses or getattr(settings, 'OTIMIZACAO_JANELA_MESES', 60))
+            inicio = (
+                pd.Timestamp(data_inicial).to_period('M').start_time.date() if data_inicial
+                else fim - relativedelta(months=janela - 1)
+            )
+            pontos = int(pontos_fronteira)
+            taxa_livre = float(taxa_livre) if taxa_livre is not None else None
+        except (TypeError, ValueError) as e:
+            return {'error': f'Parâmetros inválidos: {e}'}, 400
+
+        maximo = getattr(settings, 'OTIMIZACAO_MAX_ATIVOS', 500)
+        if not 2 <= len(tickers) <= maximo:
+            return {'error': f'Informe entre 2 e {maximo} ativos.'}, 400
+        if inicio >= fim:
+            return {'error': 'A janela deve ter ao menos dois meses.'}, 400
+        if not 2 <= pontos <= 200:
+            return {'error': 'A fronteira deve ter entre 2 e 200 pontos.'}, 400
+
+        estimativa = estimar_retornos(tickers, moeda_base or 'BRL', inicio, fim)
+        if estimativa['sem_precos']:
+            return {'error': f'Sem preços na janela: {", ".join(estimativa["sem_precos"])}'}, 400
+        if estimativa['meses'] < 2:
+            return {'error': 'Histórico insuficiente: são necessários ao menos dois meses com preço de todos os ativos.'}, 400
+
+        media = estimativa['media']
+        covariancia = estimativa['covariancia']
+
+        if taxa_livre is not None:
+            taxa_mensal = (1 + taxa_livre) ** (1 / 12) - 1
+        else:
+            codigo = getattr(settings, 'METRICAS_CODIGO_TAXA_LIVRE', 4391)
+            taxas = obter_taxa_mensal(codigo, inicio, fim) if codigo else pd.Series(dtype=float)
+            taxa_mensal = float(taxas.mean()) / 100 if len(taxas) else 0.0
+
+        # λ de zero (mínima variância) até valores em que o retorno domina, na escala da covariância e das médias
+        amplitude = max(float(media.max() - media.min()), 1e-12)
+        escala = 2 * max(float(np.linalg.eigvalsh(covariancia)[-1]), 1e-18) / amplitude
+        aversoes = np.concatenate(([0.0], escala * np.geomspace(1e-3, 1e3, pontos - 1)))
+        fronteira = fronteira_eficiente(media, covariancia, aversoes)
+
+        retornos = fronteira @ media
+        volatilidades = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', fronteira, covariancia, fronteira), 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpes = np.where(volatilidades > 1e-12, (retornos - taxa_mensal) / volatilidades, -np.inf)
+
+        # Refino do máximo Sharpe entre os vizinhos do melhor ponto da fronteira
+        melhor = int(np.argmax(sharpes))
+        refinadas = np.linspace(aversoes[max(melhor - 1, 0)], aversoes[min(melhor + 1, pontos - 1)], pontos)
+        candidatas = fronteira_eficiente(media, covariancia, refinadas, np.repeat(fronteira[[melhor]], pontos, axis=0))
+        variancias = np.einsum('ij,jk,ik->i', candidatas, covariancia, candidatas)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpes_refinados = np.where(variancias > 1e-24, (candidatas @ media - taxa_mensal) / np.sqrt(variancias), -np.inf)
+        maximo_sharpe = candidatas[int(np.argmax(sharpes_refinados))]
+
+        desvios = np.sqrt(np.diag(covariancia) * 12)
+        return {
+            'tickers': tickers,
+            'moeda_base': moeda_base or 'BRL',
+            'inicio': inicio.strftime('%Y-%m-%d'),
+            'fim': fim.strftime('%Y-%m-%d'),
+            'meses': estimativa['meses'],
+            'encolhimento': round(estimativa['encolhimento'], 6),
+            'cache': estimativa['cache'],
+            'taxa_livre_anual': round((1 + taxa_mensal) ** 12 - 1, 6),
+            'ativos': [
+                {'ticker': ticker, 'retorno_anual': round(12 * float(retorno), 6), 'volatilidade_anual': round(float(desvio), 6)}
+                for ticker, retorno, desvio in zip(tickers, media, desvios)
+            ],
+            'minima_variancia': _resumir(fronteira[0], media, covariancia, taxa_mensal, tickers),
+            'maximo_sharpe': _resumir(maximo_sharpe, media, covariancia, taxa_mensal, tickers),
+            'paridade_risco': _resumir(paridade_risco(covariancia), media, covariancia, taxa_mensal, tickers),
+            'fronteira': [_resumir(pesos, media, covariancia, taxa_mensal, tickers, False) for pesos in fronteira],
+        }, 200
+
+    except SimulacaoAutomatica.DoesNotExist:
+        return {'error': 'SimulacaoAutomatica não encontrada'}, 404
+    except Exception as e:
+        return {'error': str(e)}, 500
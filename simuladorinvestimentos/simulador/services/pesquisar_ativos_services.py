@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-import yfinance as yf
+
+from .diretorio_simbolos_services import consultar_simbolo, buscar_simbolos
+from .precos_services import obter_precos
 
 
 def pesquisar_ativo_por_ticker(ticker):
@@ -7,31 +9,40 @@ def pesquisar_ativo_por_ticker(ticker):
         return {'error': 'Ticker is required'}, 400
 
     try:
-        stock = yf.Ticker(ticker)
-        stock_info = stock.info
+        # Tickers já conhecidos são respondidos pelo diretório local, sem acessar a rede
+        simbolo = consultar_simbolo(ticker)
 
-        # Verificando se o ticker é válido
-        if 'longName' in stock_info:
-            stock_name = stock_info['longName']
-        else:
-            stock_name = 'Unknown'
-
-        # Definindo o período para obter os dados históricos do ticker
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-
-        # Baixa os dados do ativo com intervalo diário
-        stock_data = yf.download(ticker, start=start_date, end=end_date, interval='1d')
-
-        # Verificando se há dados retornados
-        if not stock_data.empty:
-            adj_close = stock_data['Adj Close'].iloc[-1]  # Último valor de 'Adj Close'
-            if adj_close > 0:
-                return {'exists': True, 'ticker': ticker, 'name': stock_name}, 200
-            else:
-                return {'exists': False, 'ticker': ticker, 'name': stock_name}, 404
+        if simbolo is None:
+            return {'exists': False, 'ticker': ticker, 'name': 'Unknown'}, 404
+        stock_name = simbolo['nome']
+
+        # O ativo só é considerado negociável se teve 'Adj Close' positivo nos últimos 30 dias
+        # (as barras vêm do armazém de preços, que só vai à rede para as datas que faltam)
+        end_date = datetime.now() + timedelta(days=1)
+        start_date = datetime.now() - timedelta(days=30)
+        stock_data = obter_precos(ticker, start_date, end_date, '1d')
+
+        if not stock_data.empty and stock_data['Adj Close'].iloc[-1] > 0:
+            return {'exists': True, 'ticker': ticker, 'name': stock_name}, 200
         else:
             return {'exists': False, 'ticker': ticker, 'name': stock_name}, 404
     except Exception as e:
         print(f"Error checking ticker: {e}")
         return {'exists': False, 'ticker': ticker, 'error': str(e)}, 500
+
+
+def pesquisar_simbolos(termo, limite=10):
+    """
+    Busca tickers pelo início do ticker ou pelo nome do ativo no diretório local de símbolos.
+
+    Args:
+        termo (str): Texto digitado pelo usuário.
+        limite (int, optional): Número máximo de resultados. Default é 10.
+
+    Returns:
+        tuple: Dados da resposta e status HTTP (200 em caso de sucesso, 400 se o termo estiver vazio).
+    """
+    if not termo or not termo.strip():
+        return {'error': 'Termo de busca não fornecido.'}, 400
+
+    return {'resultados': buscar_simbolos(termo, limite)}, 200
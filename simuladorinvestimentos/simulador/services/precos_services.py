@@ -0,0 +1,348 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import SeriePrecos, BarraPreco
+from ..utils import executar_em_paralelo
+from ..coalescencia import arrendamentos
+from ..codec_precos import codificar_serie, decodificar_serie
+from ..provedores import obter_provedor, COLUNAS_PRECOS
+
+
+logger = logging.getLogger(__name__)
+
+# Campos da tabela correspondentes a COLUNAS_PRECOS (formato do yfinance, que os serviços continuam lendo)
+CAMPOS_BARRA = ['abertura', 'maxima', 'minima', 'fechamento', 'fechamento_ajustado', 'volume']
+
+# Mesma data usada pelo yfinance para period='max'
+DATA_MINIMA = date(1900, 1, 1)
+
+
+def para_data(valor):
+    """
+    Converte strings, datetimes e Timestamps em datetime.date.
+
+    Args:
+        valor (str, datetime, date ou pd.Timestamp): Valor a ser convertido.
+
+    Returns:
+        datetime.date: Data correspondente.
+    """
+    if isinstance(valor, str):
+        return datetime.strptime(valor[:10], '%Y-%m-%d').date()
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor
+
+
+def inicio_periodo_aberto(intervalo):
+    """
+    Retorna a primeira data cujo candle ainda pode mudar (dia atual ou mês atual).
+
+    Args:
+        intervalo (str): Intervalo das barras ('1d' ou '1mo').
+
+    Returns:
+        datetime.date: Início do período ainda em aberto.
+    """
+    hoje = date.today()
+    if intervalo == '1mo':
+        return hoje.replace(day=1)
+    return hoje
+
+
+def _lacunas(serie, inicio, fim, intervalo):
+    """
+    Calcula os trechos de [inicio, fim) que ainda não estão no armazém.
+
+    Os trechos são sempre adjacentes à cobertura existente, para que ela continue contígua.
+
+    Args:
+        serie (SeriePrecos ou None): Cobertura atual do ticker.
+        inicio (datetime.date): Data inicial pedida.
+        fim (datetime.date): Data final pedida (exclusiva).
+        intervalo (str): Intervalo das barras.
+
+    Returns:
+        list: Lista de tuplas (inicio, fim) a serem baixadas.
+    """
+    if serie is None:
+        return [(inicio, fim)]
+
+    lacunas = []
+    if inicio < serie.inicio:
+        lacunas.append((inicio, serie.inicio))
+
+    if fim > serie.fim:
+        # O período em aberto só é baixado de novo depois que o TTL expira
+        ttl = timedelta(seconds=getattr(settings, 'PRECOS_TTL_PERIODO_ABERTO', 900))
+        recente = timezone.now() - serie.atualizado_em < ttl
+        if not (serie.fim >= inicio_periodo_aberto(intervalo) and recente):
+            lacunas.append((serie.fim, fim))
+
+    return lacunas
+
+
+def _baixar_precos(ticker, inicio, fim, intervalo):
+    """
+    Baixa as barras de um ticker no provedor de dados de mercado configurado.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        inicio (datetime.date): Data inicial.
+        fim (datetime.date): Data final (exclusiva).
+        intervalo (str): Intervalo das barras.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas de COLUNAS_PRECOS indexado por data.
+    """
+    return obter_provedor().precos(ticker, inicio, fim, intervalo)
+
+
+def _salvar_barras(ticker, intervalo, df):
+    """
+    Grava (ou atualiza) as barras de um DataFrame no armazém.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        intervalo (str): Intervalo das barras.
+        df (pd.DataFrame): DataFrame no formato do yfinance.
+
+    Returns:
+        int: Quantidade de barras gravadas.
+    """
+    if df is None or df.empty:
+        return 0
+
+    # Meses sem nenhum preço também são gravados: as séries são indexadas pela posição desde o lançamento,
+    # e os leitores preenchem as lacunas com o último preço conhecido (ffill), como antes do armazém
+    df = df.reindex(columns=COLUNAS_PRECOS)
+    barras = [
+        BarraPreco(
+            ticker=ticker,
+            intervalo=intervalo,
+            data=pd.Timestamp(index).date(),
+            **{
+                campo: (None if pd.isna(valor) else float(valor))
+                for campo, valor in zip(CAMPOS_BARRA, row)
+            }
+        )
+        for index, row in zip(df.index, df.itertuples(index=False))
+    ]
+    BarraPreco.objects.bulk_create(
+        barras,
+        update_conflicts=True,
+        unique_fields=['ticker', 'intervalo', 'data'],
+        update_fields=CAMPOS_BARRA
+    )
+    return len(barras)
+
+
+def _atualizar_cobertura(serie, ticker, intervalo, inicio, fim):
+    """
+    Estende a cobertura da série após um download bem-sucedido.
+
+    Args:
+        serie (SeriePrecos ou None): Cobertura atual do ticker.
+        ticker (str): Ticker do ativo.
+        intervalo (str): Intervalo das barras.
+        inicio (datetime.date): Início do trecho baixado.
+        fim (datetime.date): Fim do trecho baixado (exclusivo).
+
+    Returns:
+        SeriePrecos: Cobertura atualizada.
+    """
+    # Barras do período em aberto são gravadas, mas não contam como cobertas
+    fim = max(min(fim, inicio_periodo_aberto(intervalo)), inicio)
+
+    if serie is None:
+        return SeriePrecos.objects.create(ticker=ticker, intervalo=intervalo, inicio=inicio, fim=fim)
+
+    serie.inicio = min(serie.inicio, inicio)
+    serie.fim = max(serie.fim, fim)
+    serie.compactado = None  # A cópia compactada é recriada na próxima leitura
+    serie.save()
+    return serie
+
+
+def invalidar_precos(ticker):
+    """
+    Descarta as barras gravadas de um ticker (todos os intervalos), para que sejam baixadas de novo.
+
+    Usado quando surge um desdobramento: as barras antigas estão em outra escala de preço e não podem
+    ser misturadas às novas. As séries continuam existindo (referenciadas pelos ativos), com cobertura vazia.
+
+    Args:
+        ticker (str): Ticker do ativo.
+
+    Returns:
+        int: Quantidade de barras descartadas.
+    """
+    descartadas, _ = BarraPreco.objects.filter(ticker=ticker).delete()
+    # update() não aciona o auto_now: atualizado_em é renovado à mão para que leitores que carregaram a série
+    # antes da invalidação não gravem a cópia compactada antiga (ver _ler_serie_compactada)
+    SeriePrecos.objects.filter(ticker=ticker).update(
+        inicio=DATA_MINIMA, fim=DATA_MINIMA, compactado=None, atualizado_em=timezone.now()
+    )
+    return descartadas
+
+
+def garantir_precos_em_lote(tickers, inicio, fim, intervalo='1d'):
+    """
+    Garante que o armazém tenha as barras de [inicio, fim) de vários tickers.
+
+    As lacunas de todos os tickers são baixadas de uma só vez, em paralelo e com concorrência limitada,
+    de modo que o tempo total acompanha o ticker mais lento, e não a soma de todos. Se outra requisição
+    (de qualquer worker) já estiver baixando um dos tickers, espera por ela e reaproveita o resultado.
+
+    Args:
+        tickers (list): Lista de tickers (ativos ou pares de câmbio).
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras. Default é '1d'.
+
+    Returns:
+        int: Quantidade de barras baixadas da rede.
+    """
+    inicio = para_data(inicio)
+    fim = para_data(fim)
+    if fim <= inicio or not tickers:
+        return 0
+
+    series = {
+        serie.ticker: serie
+        for serie in SeriePrecos.objects.filter(ticker__in=tickers, intervalo=intervalo)
+    }
+    pendentes = [ticker for ticker in dict.fromkeys(tickers) if _lacunas(series.get(ticker), inicio, fim, intervalo)]
+    if not pendentes:
+        return 0
+
+    # Requisições simultâneas pelos mesmos tickers esperam o primeiro download terminar
+    with arrendamentos(f'precos:{ticker}:{intervalo}' for ticker in pendentes) as esperou:
+        if esperou:
+            # Outra requisição pode ter preenchido as lacunas enquanto esperávamos
+            series = {
+                serie.ticker: serie
+                for serie in SeriePrecos.objects.filter(ticker__in=pendentes, intervalo=intervalo)
+            }
+        tarefas = [
+            (ticker, inicio_lacuna, fim_lacuna)
+            for ticker in pendentes
+            for inicio_lacuna, fim_lacuna in _lacunas(series.get(ticker), inicio, fim, intervalo)
+        ]
+
+        # Só o download roda em paralelo; a gravação no banco fica na thread da requisição
+        resultados = executar_em_paralelo(
+            lambda tarefa: _baixar_precos(tarefa[0], tarefa[1], tarefa[2], intervalo),
+            tarefas,
+            max_workers=getattr(settings, 'PRECOS_MAX_DOWNLOADS_PARALELOS', 8)
+        )
+
+        baixadas = 0
+        for (ticker, inicio_lacuna, fim_lacuna), df in resultados.items():
+            if isinstance(df, Exception):
+                logger.warning(f'Erro ao baixar preços de {ticker} ({intervalo}): {df}')
+                continue
+
+            baixadas += _salvar_barras(ticker, intervalo, df)
+            series[ticker] = _atualizar_cobertura(series.get(ticker), ticker, intervalo, inicio_lacuna, fim_lacuna)
+
+    return baixadas
+
+
+def garantir_precos(ticker, inicio, fim, intervalo='1d'):
+    """
+    Garante que o armazém tenha as barras de [inicio, fim), baixando apenas as datas que faltam.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras. Default é '1d'.
+
+    Returns:
+        int: Quantidade de barras baixadas da rede.
+    """
+    return garantir_precos_em_lote([ticker], inicio, fim, intervalo)
+
+
+def _ler_serie_compactada(ticker, intervalo):
+    """
+    Lê todas as barras de um ticker a partir da cópia compactada da série, recriando-a se estiver vencida.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        intervalo (str): Intervalo das barras.
+
+    Returns:
+        tuple ou None: (datas, colunas) como em decodificar_serie, ou None se o ticker não estiver no armazém.
+    """
+    serie = SeriePrecos.objects.filter(ticker=ticker, intervalo=intervalo).first()
+    if serie is None:
+        return None
+    if serie.compactado is not None:
+        return decodificar_serie(serie.compactado)
+
+    linhas = list(
+        BarraPreco.objects.filter(ticker=ticker, intervalo=intervalo).order_by('data').values_list('data', *CAMPOS_BARRA)
+    )
+    datas = np.array([linha[0] for linha in linhas], dtype='datetime64[D]')
+    valores = np.array([linha[1:] for linha in linhas], dtype=float).reshape(len(linhas), len(CAMPOS_BARRA))
+    colunas = {coluna: valores[:, posicao] for posicao, coluna in enumerate(COLUNAS_PRECOS)}
+
+    # Só grava se nenhum download alterou a série desde a leitura acima
+    SeriePrecos.objects.filter(pk=serie.pk, atualizado_em=serie.atualizado_em).update(
+        compactado=codificar_serie(datas, colunas)
+    )
+    return datas, colunas
+
+
+def ler_precos(ticker, inicio, fim, intervalo='1d'):
+    """
+    Lê do armazém as barras de [inicio, fim), sem acessar a rede.
+
+    As barras vêm da cópia compactada da série, fatiada por busca binária nas datas.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras. Default é '1d'.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas de COLUNAS_PRECOS indexado por 'Date'.
+    """
+    serie = _ler_serie_compactada(ticker, intervalo)
+    if serie is None:
+        serie = (np.array([], dtype='datetime64[D]'), {coluna: np.array([], dtype=float) for coluna in COLUNAS_PRECOS})
+    datas, colunas = serie
+
+    primeira = np.searchsorted(datas, np.datetime64(para_data(inicio), 'D'), side='left')
+    ultima = np.searchsorted(datas, np.datetime64(para_data(fim), 'D'), side='left')
+
+    return pd.DataFrame(
+        {coluna: colunas[coluna][primeira:ultima].copy() for coluna in COLUNAS_PRECOS},
+        index=pd.DatetimeIndex(datas[primeira:ultima].astype('datetime64[ns]'), name='Date')
+    )
+
+
+def obter_precos(ticker, inicio, fim, intervalo='1d'):
+    """
+    Obtém as barras de um ticker lendo do armazém local e indo à rede apenas para as datas que faltam.
+
+    Args:
+        ticker (str): Ticker do ativo.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (exclusiva).
+        intervalo (str, optional): Intervalo das barras ('1d' ou '1mo'). Default é '1d'.
+
+    Returns:
+        pd.DataFrame: DataFrame no formato do yfinance (Open, High, Low, Close, Adj Close, Volume).
+    """
+    garantir_precos(ticker, inicio, fim, intervalo)
+    return ler_precos(ticker, inicio, fim, intervalo)
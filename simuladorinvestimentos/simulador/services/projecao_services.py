@@ -0,0 +1,265 @@
+import os
+import time
+import logging
+import functools
+import threading
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from ..models import SimulacaoAutomatica
+from ..utils import arredondar_para_baixo
+from .motor_simulacao_services import montar_matriz_precos, projetar_caminhos, PERIODOS_REBALANCEAMENTO
+from .resultado_simulacao_automatica_services import preparar_simulacao
+from .janelas_moveis_services import PERCENTIS, _distribuicao
+
+
+logger = logging.getLogger(__name__)
+
+METODOS = ('parametrico', 'bootstrap')
+
+# Pool de processos compartilhado entre as requisições, criado no primeiro uso
+_pool = None
+_pool_processos = 0
+_lock = threading.Lock()
+
+
+def _obter_pool(processos):
+    """
+    Retorna o pool de processos das projeções, criando-o (ou recriando-o com outro tamanho) se necessário.
+
+    Os processos são iniciados com 'spawn': não herdam as conexões com o banco nem os locks das threads do servidor.
+
+    Args:
+        processos (int): Número de processos.
+
+    Returns:
+        ProcessPoolExecutor: Pool de processos.
+    """
+    global _pool, _pool_processos
+    with _lock:
+        if _pool is None or _pool_processos != processos:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+            _pool_processos = processos
+        return _pool
+
+
+def _descartar_pool():
+    """
+    Descarta o pool de processos (ex.: depois que um processo morreu), para que o próximo uso crie outro.
+    """
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _executar_lotes(gerar, tamanhos, sementes):
+    """
+    Executa os lotes de caminhos no pool de processos, ou no próprio processo se houver um único lote
+    ou PROJECAO_PROCESSOS for 1.
+
+    Args:
+        gerar (callable): Função que recebe o tamanho e a semente de um lote e retorna seus caminhos.
+        tamanhos (list): Número de caminhos de cada lote.
+        sementes (list): Semente de cada lote.
+
+    Returns:
+        tuple: (np.ndarray com os caminhos de todos os lotes, na ordem dos lotes, número de processos usados).
+    """
+    processos = getattr(settings, 'PROJECAO_PROCESSOS', 0) or os.cpu_count() or 1
+    processos = min(processos, len(tamanhos))
+    if processos <= 1:
+        return np.vstack([gerar(tamanho, semente) for tamanho, semente in zip(tamanhos, sementes)]), 1
+
+    try:
+        return np.vstack(list(_obter_pool(processos).map(gerar, tamanhos, sementes))), processos
+    except BrokenProcessPool:
+        logger.warning('Pool de processos das projeções interrompido; executando os lotes no próprio processo.')
+        _descartar_pool()
+        return np.vstack([gerar(tamanho, semente) for tamanho, semente in zip(tamanhos, sementes)]), 1
+
+
+def retornos_historicos(dados, ativos):
+    """
+    Calcula os retornos mensais históricos dos ativos no período da simulação, com os dividendos quando eles
+    não estão embutidos nos preços.
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        ativos (list): Ativos considerados (colunas da matriz de preços de dados['ativos']).
+
+    Returns:
+        tuple: (np.ndarray de retornos dos meses em que todos os ativos têm preço no mês e no anterior
+        (meses x ativos), np.ndarray de preços do último mês).
+    """
+    precos, disponivel = montar_matriz_precos(dados['ativos'], dados['datas_validas'])
+    colunas = [dados['ativos'].index(ativo) for ativo in ativos]
+    precos = np.where(disponivel, precos, 0.0)[:, colunas]
+
+    proventos = np.zeros_like(precos)
+    if dados['dividendos'] is not None:
+        proventos = np.asarray(dados['dividendos'], dtype=float)[:, colunas]
+
+    validos = (precos[1:] > 0).all(axis=1) & (precos[:-1] > 0).all(axis=1)
+    retornos = (precos[1:][validos] + proventos[1:][validos]) / precos[:-1][validos] - 1
+    return retornos, precos[-1] if len(precos) else np.zeros(len(colunas))
+
+
+def projetar_simulacao(simulacao_id, user, horizonte_meses, metodo='bootstrap', n_caminhos=None, semente=None,
+                       bloco=12, valor_alvo=None, valor_inicial=None, aplicacao_mensal=None, janela_meses=None,
+                       percentis=None):
+    """
+    Projeta o valor futuro da carteira de uma simulação automática por Monte Carlo, a partir da data final.
+
+    Os retornos mensais dos ativos são estimados da matriz de preços do período da simulação (carregada do
+    armazém compartilhado). Os caminhos são gerados em lotes vetorizados (ver projetar_caminhos) distribuídos
+    em um pool de processos. Cada lote tem a sua semente derivada da semente da projeção, de modo que o
+    resultado depende apenas da semente e do número de caminhos, e não do número de processos.
+
+    A projeção parte das posições finais do último cálculo do resultado (ou da aplicação inicial, se o
+    resultado ainda não foi calculado), com o aporte mensal e a estratégia de rebalanceamento da simulação.
+    Os valores são nominais e os dividendos são sempre reinvestidos.
+
+    Args:
+        simulacao_id (int): ID da simulação automática.
+        user (User): Usuário autenticado.
+        horizonte_meses (int): Número de meses projetados.
+        metodo (str, optional): 'parametrico' ou 'bootstrap'. Default é 'bootstrap'.
+        n_caminhos (int, optional): Número de caminhos. Default é PROJECAO_CAMINHOS_PADRAO.
+        semente (int, optional): Semente dos sorteios; se omitida, uma nova é gerada e retornada.
+        bloco (int, optional): Tamanho dos blocos do bootstrap, em meses. Default é 12.
+        valor_alvo (float, optional): Meta para o cálculo da probabilidade de atingi-la.
+        valor_inicial (float, optional): Valor inicial, distribuído pelos pesos; substitui as posições finais.
+        aplicacao_mensal (float, optional): Aporte mensal. Default é o da simulação.
+        janela_meses (int, optional): Usa apenas os últimos meses do histórico na estimativa.
+        percentis (list, optional): Percentis do leque. Default é PERCENTIS.
+
+    Returns:
+        tuple: Dicionário com o leque de percentis de cada mês, a distribuição do valor final, a probabilidade
+        de atingir a meta e os parâmetros da execução, e código de status HTTP.
+    """
+    try:
+        simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id, usuario=user)
+
+        try:
+            horizonte = int(horizonte_meses)
+            n_caminhos = int(n_caminhos or getattr(settings, 'PROJECAO_CAMINHOS_PADRAO', 10000))
+            bloco = int(bloco)
+            semente = int(semente) if semente is not None else None
+            valor_alvo = float(valor_alvo) if valor_alvo is not None else None
+            valor_inicial = float(valor_inicial) if valor_inicial is not None else None
+            aporte = float(simulacao.aplicacao_mensal if aplicacao_mensal is None else aplicacao_mensal)
+            janela_meses = int(janela_meses) if janela_meses else None
+            percentis = tuple(float(percentil) for percentil in (percentis or PERCENTIS))
+        except (TypeError, ValueError) as e:
+            return {'error': f'Parâmetros inválidos: {e}'}, 400
+
+        if metodo not in METODOS:
+            return {'error': f'Método inválido: {metodo}. Use {", ".join(METODOS)}.'}, 400
+        maximo_meses = getattr(settings, 'PROJECAO_MAX_MESES', 600)
+        if not 1 <= horizonte <= maximo_meses:
+            return {'error': f'O horizonte deve ter entre 1 e {maximo_meses} meses.'}, 400
+        maximo_caminhos = getattr(settings, 'PROJECAO_MAX_CAMINHOS', 50000)
+        if not 1 <= n_caminhos <= maximo_caminhos:
+            return {'error': f'O número de caminhos deve estar entre 1 e {maximo_caminhos}.'}, 400
+        if bloco < 1:
+            return {'error': 'O bloco deve ter ao menos um mês.'}, 400
+        if semente is not None and semente < 0:
+            return {'error': 'A semente deve ser um inteiro não negativo.'}, 400
+        if aporte < 0 or (valor_inicial is not None and valor_inicial < 0):
+            return {'error': 'Os valores aplicados não podem ser negativos.'}, 400
+        if not all(0 <= percentil <= 100 for percentil in percentis):
+            return {'error': 'Os percentis devem estar entre 0 e 100.'}, 400
+
+        dados = preparar_simulacao(simulacao)
+        if dados is None:
+            return {'error': 'Formato de data inválido'}, 400
+        if len(dados['datas_validas']) == 0:
+            return {'error': 'Não há meses de inflação no período da simulação.'}, 400
+
+        ativos = [ativo for ativo in dados['ativos'] if ativo.peso > 0]
+        if not ativos:
+            return {'error': 'A carteira não tem ativos com peso.'}, 400
+        pesos = np.array([ativo.peso for ativo in ativos], dtype=float)
+        pesos = pesos / pesos.sum()
+
+        retornos, ultimos_precos = retornos_historicos(dados, ativos)
+        if janela_meses:
+            retornos = retornos[-janela_meses:]
+        if len(retornos) < 2:
+            return {'error': 'Histórico insuficiente: são necessários ao menos dois meses com preço de todos os ativos.'}, 400
+
+        if valor_inicial is not None:
+            posicoes = valor_inicial * pesos
+        else:
+            posicoes = np.array([ativo.posse for ativo in ativos], dtype=float) * ultimos_precos
+            if posicoes.sum() <= 0:
+                posicoes = float(simulacao.aplicacao_inicial or 0) * pesos
+
+        meses = pd.date_range(dados['datas_validas'][-1], periods=horizonte + 1, freq='MS')[1:]
+        periodo = PERIODOS_REBALANCEAMENTO.get(dados['estrategia'])
+        inicio_do_periodo = (meses.month.to_numpy() - 1) % periodo == 0 if periodo else None
+
+        # Lotes de tamanho fixo, cada um com uma semente filha: o resultado não depende do número de processos
+        if semente is None:
+            semente = int(np.random.SeedSequence().entropy % 2 ** 63)
+        tamanho_lote = max(getattr(settings, 'PROJECAO_TAMANHO_LOTE', 2500), 1)
+        tamanhos = [min(tamanho_lote, n_caminhos - inicio) for inicio in range(0, n_caminhos, tamanho_lote)]
+        sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+
+        # A função enviada aos processos é a do motor, que não depende do Django
+        gerar = functools.partial(
+            projetar_caminhos, retornos, pesos, posicoes, aporte, horizonte, metodo=metodo,
+            bloco=min(bloco, len(retornos)), estrategia=dados['estrategia'], banda=dados['banda'],
+            inicio_do_periodo=inicio_do_periodo
+        )
+        inicio = time.perf_counter()
+        valores, processos = _executar_lotes(gerar, tamanhos, sementes)
+        duracao = time.perf_counter() - inicio
+
+        leque = np.percentile(valores, percentis, axis=0)
+        finais = valores[:, -1].astype(float)
+        atingem = valores >= valor_alvo if valor_alvo is not None else None
+
+        linhas = []
+        for mes, data in enumerate(meses.strftime('%Y-%m-%d')):
+            linha = {'Data': data}
+            linha.update({f'p{percentil:g}': float(arredondar_para_baixo(leque[indice, mes])) for indice, percentil in enumerate(percentis)})
+            if atingem is not None:
+                linha['probabilidade_meta'] = round(float(atingem[:, mes].mean()), 6)
+            linhas.append(linha)
+
+        return {
+            'simulacao_id': simulacao.id,
+            'metodo': metodo,
+            'caminhos': n_caminhos,
+            'semente': semente,
+            'bloco': min(bloco, len(retornos)) if metodo == 'bootstrap' else None,
+            'horizonte_meses': horizonte,
+            'meses_historico': int(len(retornos)),
+            'pesos': dict(zip([ativo.ticker for ativo in ativos], pesos.round(6).tolist())),
+            'valor_inicial': float(arredondar_para_baixo(posicoes.sum())),
+            'aplicacao_mensal': aporte,
+            'total_aportado': float(arredondar_para_baixo(posicoes.sum() + aporte * horizonte)),
+            'valor_final': _distribuicao(finais, percentis),
+            'probabilidade_meta': round(float(atingem[:, -1].mean()), 6) if atingem is not None else None,
+            'leque': linhas,
+            'lotes': len(tamanhos),
+            'processos': processos,
+            'duracao_segundos': round(duracao, 3),
+        }, 200
+
+    except SimulacaoAutomatica.DoesNotExist:
+        return {'error': 'SimulacaoAutomatica não encontrada'}, 404
+    except Exception as e:
+        return {'error': str(e)}, 500
+
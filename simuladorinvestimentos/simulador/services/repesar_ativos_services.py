@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from ..models import SimulacaoAutomatica
+from ..codec_precos import decodificar_serie
+from ..utils import arredondar_para_baixo
+from .resultado_simulacao_automatica_services import preparar_simulacao
+from .varredura_simulacao_services import avaliar_variantes, validar_pesos
+
+
+COLUNAS_FIXAS = ('investido', 'compraveis')
+
+
+def repesar_ativos(simulacao_id, user, pesos, serie=False):
+    """
+    Recalcula o resultado de uma simulação automática com outros pesos, sem simular novamente.
+
+    O valor da carteira em cada mês é o caixa distribuído mais o produto da matriz de contribuições por
+    unidade de peso (gravada no último cálculo do resultado) pelo vetor de pesos. Isso vale (a menos dos
+    arredondamentos de centavos) quando todos os ativos têm preço em todo o período e a soma dos pesos não
+    muda. Nos demais casos (inclusive com rebalanceamento ou dividendos creditados à parte) a nova variante é simulada no motor vetorizado,
+    sem gravar nada no banco ('metodo' indica qual cálculo foi usado).
+
+    Args:
+        simulacao_id (int): ID da simulação automática.
+        user (User): Usuário autenticado.
+        pesos (dict): Ticker -> novo peso; tickers omitidos mantêm o peso atual.
+        serie (bool, optional): Se a série mensal do valor da carteira deve ser retornada. Default é False.
+
+    Returns:
+        tuple: Dicionário com o valor final, a sensibilidade do valor final a cada peso e, opcionalmente,
+        a série mensal, e código de status HTTP.
+    """
+    try:
+        simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id, usuario=user)
+        pesos_atuais = dict(simulacao.carteira_automatica.ativos.values_list('ticker', 'peso'))
+
+        # Com rebalanceamento ou dividendos não há decomposição linear: a variante é sempre simulada
+        nao_linear = (
+            simulacao.estrategia_rebalanceamento != SimulacaoAutomatica.SEM_REBALANCEAMENTO
+            or simulacao.dividendos != SimulacaoAutomatica.DIVIDENDOS_IGNORAR
+        )
+        if nao_linear:
+            tickers = list(pesos_atuais)
+        elif simulacao.contribuicoes_ativos is None:
+            return {'error': 'Calcule o resultado da simulação antes de alterar os pesos.'}, 400
+        else:
+            datas, colunas = decodificar_serie(simulacao.contribuicoes_ativos)
+            tickers = [coluna for coluna in colunas if coluna not in COLUNAS_FIXAS]
+
+        pesos = pesos or {}
+        if not isinstance(pesos, dict):
+            return {'error': 'Os pesos devem ser um objeto ticker -> peso'}, 400
+
+        # Os pesos informados substituem os atuais; o conjunto resultante é validado como na varredura
+        try:
+            pesos = validar_pesos(
+                {**{ticker: pesos_atuais.get(ticker, 0.0) for ticker in tickers}, **pesos}, tickers
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        atuais = np.array([pesos_atuais.get(ticker, 0.0) for ticker in tickers], dtype=float)
+        novos = np.array([pesos[ticker] for ticker in tickers], dtype=float)
+
+        linear = not nao_linear and bool(np.array_equal(novos, atuais) or (
+            np.all(colunas['compraveis'] == len(tickers)) and np.isclose(novos.sum(), atuais.sum())
+        ))
+
+        resposta = {
+            'simulacao_id': simulacao.id,
+            'pesos': dict(zip(tickers, novos.tolist())),
+            'metodo': 'linear' if linear else 'simulacao',
+        }
+
+        if not nao_linear:
+            matriz = np.column_stack([colunas[ticker] for ticker in tickers]) if tickers else np.zeros((len(datas), 0))
+            resposta['valor_final_original'] = float(arredondar_para_baixo(colunas['investido'][-1] + matriz[-1] @ atuais))
+            # Variação do valor final por unidade de peso de cada ativo
+            resposta['sensibilidades'] = dict(zip(tickers, np.round(matriz[-1], 2).tolist()))
+
+        if linear:
+            valores = colunas['investido'] + matriz @ novos
+        else:
+            dados = preparar_simulacao(simulacao)
+            if dados is None or len(dados['datas_validas']) == 0:
+                return {'error': 'Não há meses de inflação no período da simulação.'}, 400
+            variante = {
+                'aplicacao_inicial': simulacao.aplicacao_inicial,
+                'aplicacao_mensal': simulacao.aplicacao_mensal,
+                'pesos': dict(zip(tickers, novos.tolist())),
+            }
+            resultado, _, _ = avaliar_variantes(dados, [variante])
+            valores = resultado['valor'][0]
+            datas = dados['datas_validas'].values
+
+        resposta['valor_final'] = float(arredondar_para_baixo(valores[-1]))
+        if serie:
+            resposta['resultado'] = [
+                {'Data': data, 'Valor': valor}
+                for data, valor in zip(
+                    pd.DatetimeIndex(datas).strftime('%Y-%m-%d'), arredondar_para_baixo(valores).tolist()
+                )
+            ]
+
+        return resposta, 200
+
+    except SimulacaoAutomatica.DoesNotExist:
+        return {'error': 'SimulacaoAutomatica não encontrada'}, 404
+    except Exception as e:
+        return {'error': str(e)}, 500
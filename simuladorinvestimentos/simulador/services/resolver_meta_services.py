@@ -0,0 +1,289 @@
+import math
+import numpy as np
+import pandas as pd
+
+from ..models import SimulacaoAutomatica
+from ..codec_precos import decodificar_serie
+from ..utils import arredondar_para_baixo
+from .motor_simulacao_services import (
+    montar_matriz_precos, simular_rebalanceamento, fatores_crescimento, contribuicoes_ativos
+)
+from .resultado_simulacao_automatica_services import preparar_simulacao
+from .simular_aportes_services import _mes
+
+
+INCOGNITAS = ('aplicacao_mensal', 'aplicacao_inicial', 'horizonte')
+
+# Bisseção em lote das simulações não lineares: cada rodada avalia CANDIDATOS valores em uma única execução do motor
+CANDIDATOS = 32
+RODADAS = 5
+MAX_DOBRAS = 40
+
+
+def _arredondar_para_cima(valor):
+    """
+    Arredonda um valor para cima com duas casas, para que o valor encontrado atinja a meta.
+
+    Args:
+        valor (float): Valor a ser arredondado.
+
+    Returns:
+        float: Valor arredondado.
+    """
+    return math.ceil(round(valor * 100, 6)) / 100
+
+
+def _indice_fim(datas, data_alvo):
+    """
+    Localiza o mês da meta na série da simulação.
+
+    Args:
+        datas (pd.DatetimeIndex): Meses da simulação.
+        data_alvo (str ou None): Mês da meta; None usa o último mês.
+
+    Returns:
+        int: Posição do mês na série.
+
+    Raises:
+        ValueError: Se o mês estiver fora do período da simulação.
+    """
+    if not data_alvo:
+        return len(datas) - 1
+    mes = pd.Timestamp(_mes(data_alvo))
+    posicao = datas.searchsorted(mes)
+    if posicao >= len(datas) or datas[posicao] != mes:
+        raise ValueError(f'Mês fora do período da simulação: {data_alvo}')
+    return int(posicao)
+
+
+def _caminhos(dados, precos, disponivel, pesos, aportes, iniciais, nao_linear):
+    """
+    Calcula o valor da carteira em cada mês para vários cronogramas de aportes, sem arredondar os aportes.
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        pesos (np.ndarray): Peso de cada ativo.
+        aportes (np.ndarray): Aportes de cada cronograma (cronogramas x meses).
+        iniciais (np.ndarray): Aplicação inicial de cada cronograma.
+        nao_linear (bool): Se a simulação tem rebalanceamento ou dividendos fora do preço.
+
+    Returns:
+        np.ndarray: Valores (cronogramas x meses).
+    """
+    n_cronogramas, n_meses = aportes.shape
+    if nao_linear:
+        dividendos = dados['dividendos']
+        return simular_rebalanceamento(
+            precos, disponivel, np.broadcast_to(pesos, (n_cronogramas, len(pesos))), aportes, iniciais,
+            dados['datas_validas'][:n_meses], dados['estrategia'], dados['banda'],
+            dividendos=None if dividendos is None else dividendos[:n_meses], reinvestir=dados['reinvestir']
+        )['valor']
+
+    # Sem rebalanceamento o valor é linear nos aportes: basta a decomposição por ativo de cada cronograma
+    valores = np.empty((n_cronogramas, n_meses))
+    for indice in range(n_cronogramas):
+        cronograma = aportes[indice].copy()
+        cronograma[0] += iniciais[indice]
+        investido, matriz = contribuicoes_ativos(precos, disponivel, pesos, cronograma)
+        valores[indice] = investido + matriz @ pesos
+    return valores
+
+
+def _bissectar(avaliar, alvo):
+    """
+    Encontra o menor valor não negativo cujo resultado atinge a meta, supondo o resultado crescente no valor.
+
+    Cada rodada avalia CANDIDATOS pontos igualmente espaçados do intervalo de uma só vez e mantém o trecho
+    em que a meta é cruzada, o que reduz o intervalo CANDIDATOS vezes por execução do motor.
+
+    Args:
+        avaliar (callable): Recebe um np.ndarray de valores e retorna o resultado de cada um.
+        alvo (float): Meta.
+
+    Returns:
+        float: Valor encontrado.
+
+    Raises:
+        ValueError: Se a meta não for atingida nem com valores muito altos.
+    """
+    baixo, alto = 0.0, max(float(alvo), 1.0)
+    for _ in range(MAX_DOBRAS):
+        if avaliar(np.array([alto]))[0] >= alvo:
+            break
+        baixo, alto = alto, alto * 2
+    else:
+        raise ValueError('A meta não é atingível com os preços do período.')
+
+    for _ in range(RODADAS):
+        candidatos = np.linspace(baixo, alto, CANDIDATOS + 1)[1:]
+        atingem = avaliar(candidatos) >= alvo
+        primeiro = int(np.argmax(atingem))
+        alto = candidatos[primeiro]
+        baixo = candidatos[primeiro - 1] if primeiro > 0 else baixo
+    return alto
+
+
+def resolver_meta(simulacao_id, user, valor_alvo, incognita='aplicacao_mensal', data_alvo=None, ajustar_inflacao=False):
+    """
+    Calcula o aporte mensal, a aplicação inicial ou o prazo necessários para que uma simulação automática
+    atinja um valor alvo, sem gravar nada no banco.
+
+    O aporte mensal e a aplicação inicial saem direto dos fatores de crescimento da carteira (ver
+    fatores_crescimento), calculados uma única vez: sem rebalanceamento o valor final é linear nos aportes.
+    Na data final da simulação são usados os fatores gravados no último cálculo do resultado, sem carregar
+    preços. Com rebalanceamento ou dividendos fora do preço o valor é encontrado por bisseção, com os
+    candidatos simulados juntos no motor vetorizado. O prazo é o primeiro mês em que o valor da carteira,
+    com a aplicação inicial e o aporte mensal da simulação, atinge a meta.
+
+    Como na simulação, os valores são corrigidos pela inflação até o mês da meta e os arredondamentos de
+    centavos feitos a cada mês não são considerados.
+
+    Args:
+        simulacao_id (int): ID da simulação automática.
+        user (User): Usuário autenticado.
+        valor_alvo (float): Valor que a carteira deve atingir.
+        incognita (str, optional): 'aplicacao_mensal', 'aplicacao_inicial' ou 'horizonte'. Default é 'aplicacao_mensal'.
+        data_alvo (str, optional): Mês da meta ('AAAA-MM' ou 'AAAA-MM-DD'), dentro do período da simulação;
+            ignorado no 'horizonte'. Default é a data final.
+        ajustar_inflacao (bool, optional): Se o valor alvo está em dinheiro do primeiro mês da simulação e deve
+            ser corrigido pela inflação até o mês da meta. Default é False.
+
+    Returns:
+        tuple: Dicionário com o valor encontrado, o valor final estimado e o total aportado, e código de status HTTP.
+    """
+    try:
+        simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id, usuario=user)
+
+        if incognita not in INCOGNITAS:
+            return {'error': f'Incógnita inválida: {incognita}. Use {", ".join(INCOGNITAS)}.'}, 400
+        try:
+            valor_alvo = float(valor_alvo)
+        except (TypeError, ValueError):
+            return {'error': 'Valor alvo inválido.'}, 400
+        if valor_alvo <= 0:
+            return {'error': 'O valor alvo deve ser positivo.'}, 400
+
+        nao_linear = (
+            simulacao.estrategia_rebalanceamento != SimulacaoAutomatica.SEM_REBALANCEAMENTO
+            or simulacao.dividendos != SimulacaoAutomatica.DIVIDENDOS_IGNORAR
+        )
+        aplicacao_inicial = float(simulacao.aplicacao_inicial or 0)
+        aplicacao_mensal = float(simulacao.aplicacao_mensal or 0)
+
+        resposta = {
+            'simulacao_id': simulacao.id,
+            'incognita': incognita,
+            'valor_alvo': valor_alvo,
+            'metodo': 'caminho' if incognita == 'horizonte' else 'bissecao' if nao_linear else 'analitico',
+        }
+
+        if not nao_linear and incognita != 'horizonte' and not data_alvo and simulacao.fatores_crescimento is not None:
+            # Fatores gravados no último cálculo: a meta é resolvida sem carregar preços
+            datas, colunas = decodificar_serie(simulacao.fatores_crescimento)
+            datas = pd.DatetimeIndex(datas)
+            fatores = colunas['Fator']
+            inflacao = colunas['Inflacao']
+            resposta['metodo'] = 'fatores_gravados'
+        else:
+            dados = preparar_simulacao(simulacao)
+            if dados is None:
+                return {'error': 'Formato de data inválido'}, 400
+            datas = dados['datas_validas']
+            if len(datas) == 0:
+                return {'error': 'Não há meses de inflação no período da simulação.'}, 400
+            try:
+                fim = len(datas) - 1 if incognita == 'horizonte' else _indice_fim(datas, data_alvo)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+
+            datas = datas[:fim + 1]
+            precos, disponivel = montar_matriz_precos(dados['ativos'], datas)
+            pesos = np.array([ativo.peso for ativo in dados['ativos']], dtype=float)
+
+            # Inflação acumulada do primeiro mês até cada mês; a de um mês t até o mês e é acumulada[e] / acumulada[t - 1]
+            acumulada = np.nan_to_num(dados['indice_inflacao'].fatores(datas[0], datas), nan=1.0)
+            anterior = np.concatenate(([1.0], acumulada[:-1]))
+            inflacao = acumulada[-1] / anterior
+            fatores = None if nao_linear else fatores_crescimento(precos, disponivel, pesos)
+
+        if incognita == 'horizonte':
+            # Um único cronograma em dinheiro do primeiro mês: o valor corrigido até cada mês e é o caminho dividido
+            # pela inflação acumulada até e, pois multiplicar todos os aportes por uma constante multiplica o valor
+            caminho = _caminhos(
+                dados, precos, disponivel, pesos, (aplicacao_mensal * anterior)[None, :],
+                np.array([aplicacao_inicial]), nao_linear
+            )[0]
+            valores = caminho / acumulada
+            alvos = valor_alvo * acumulada if ajustar_inflacao else np.full(len(datas), valor_alvo)
+            atingem = valores >= alvos
+            mes = int(np.argmax(atingem)) if atingem.any() else len(datas) - 1
+            totais = (aplicacao_inicial + aplicacao_mensal * np.cumsum(anterior)) / acumulada
+
+            resposta.update({
+                'atingida': bool(atingem.any()),
+                'horizonte_meses': mes + 1 if atingem.any() else None,
+                'data_alvo': datas[mes].strftime('%Y-%m-%d'),
+                'valor_alvo_nominal': float(arredondar_para_baixo(alvos[mes])),
+                'aplicacao_inicial': aplicacao_inicial,
+                'aplicacao_mensal': aplicacao_mensal,
+                'valor_final': float(arredondar_para_baixo(valores[mes])),
+                'total_aportado': float(arredondar_para_baixo(totais[mes])),
+            })
+            return resposta, 200
+
+        # Meta em dinheiro do mês da meta
+        alvo = valor_alvo * inflacao[0] if ajustar_inflacao else valor_alvo
+        inicial = incognita == 'aplicacao_inicial'
+
+        if fatores is not None:
+            # Valor final = inicial * coeficiente_inicial + mensal * coeficiente_mensal
+            coeficiente_inicial = fatores[0] / inflacao[0]
+            coeficiente_mensal = float(np.sum(fatores / inflacao))
+            coeficiente = coeficiente_inicial if inicial else coeficiente_mensal
+            if coeficiente <= 0:
+                return {'error': 'A meta não é atingível com os preços do período.'}, 400
+            fixo = aplicacao_mensal * coeficiente_mensal if inicial else aplicacao_inicial * coeficiente_inicial
+            valor = max((alvo - fixo) / coeficiente, 0.0)
+        else:
+            def avaliar(candidatos):
+                if inicial:
+                    aportes = np.broadcast_to(aplicacao_mensal / inflacao, (len(candidatos), len(inflacao)))
+                    iniciais = candidatos / inflacao[0]
+                else:
+                    aportes = candidatos[:, None] / inflacao[None, :]
+                    iniciais = np.full(len(candidatos), aplicacao_inicial / inflacao[0])
+                return _caminhos(dados, precos, disponivel, pesos, aportes, iniciais, True)[:, -1]
+
+            try:
+                valor = 0.0 if avaliar(np.zeros(1))[0] >= alvo else _bissectar(avaliar, alvo)
+            except ValueError as e:
+                return {'error': str(e)}, 400
+
+        valor = _arredondar_para_cima(valor)
+        if inicial:
+            aplicacao_inicial = valor
+        else:
+            aplicacao_mensal = valor
+
+        if fatores is not None:
+            valor_final = aplicacao_inicial * coeficiente_inicial + aplicacao_mensal * coeficiente_mensal
+        else:
+            valor_final = avaliar(np.array([valor]))[0]
+
+        resposta.update({
+            'data_alvo': datas[-1].strftime('%Y-%m-%d'),
+            'valor_alvo_nominal': float(arredondar_para_baixo(alvo)),
+            'aplicacao_inicial': aplicacao_inicial,
+            'aplicacao_mensal': aplicacao_mensal,
+            'meta_sem_aporte': valor == 0,
+            'valor_final': float(arredondar_para_baixo(valor_final)),
+            'total_aportado': float(arredondar_para_baixo(aplicacao_inicial / inflacao[0] + np.sum(aplicacao_mensal / inflacao))),
+        })
+        return resposta, 200
+
+    except SimulacaoAutomatica.DoesNotExist:
+        return {'error': 'SimulacaoAutomatica não encontrada'}, 404
+    except Exception as e:
+        return {'error': str(e)}, 500
@@ -1,12 +1,29 @@
-import json
-
+import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
 
-from ..models import SimulacaoAutomatica
-from ..utils import ajustar_inflacao_automatica, arredondar_para_baixo
+from .precos_services import garantir_precos_em_lote
+from .cambio_services import ticker_par, ler_precos_convertidos, serie_cambio
+from .eventos_services import garantir_eventos_em_lote, dividendos_mensais
+from .inflacao_services import obter_ipca_simulacao
+from .taxas_services import obter_taxa_mensal
+from .metricas_services import calcular_metricas, resumir_metricas
+from .benchmarks_services import calcular_benchmarks
+from .motor_simulacao_services import (
+    simular_aportes_vetorizado, simular_rebalanceamento, montar_matriz_precos, fatores_crescimento, contribuicoes_ativos
+)
+from ..models import Ativo, SimulacaoAutomatica
+from ..codec_precos import codificar_serie, decodificar_serie
+from ..utils import arredondar_para_baixo
+from ..indice_inflacao import IndiceInflacaoAcumulado
 
 
+logger = logging.getLogger(__name__)
+
 def safe_strptime(date_str, format='%Y-%m-%d'):
     """
     Faz a conversão segura de uma string para um objeto datetime.date.
@@ -26,70 +43,60 @@ def safe_strptime(date_str, format='%Y-%m-%d'):
 
 def get_ipca_data(simulacao):
     """
-    Obtém os dados de IPCA de uma simulação.
+    Obtém os dados de IPCA de uma simulação, a partir do trecho da tabela compartilhada que ela referencia.
 
     Args:
         simulacao (SimulacaoAutomatica): Objeto da simulação automática.
 
     Returns:
         pd.DataFrame: DataFrame contendo os dados do IPCA.
+
+    Raises:
+        Exception: Se não houver dados de inflação para o período da simulação.
     """
-    ipca_data = pd.DataFrame(simulacao.inflacao_total)
-    ipca_data['Data'] = pd.to_datetime(ipca_data['Data'], format='%Y-%m-%d')
-    ipca_data.set_index('Data', inplace=True)
+    ipca_data = obter_ipca_simulacao(simulacao)
+    if ipca_data is None:
+        raise Exception('Falha ao buscar dados de inflação')
     return ipca_data
 
 
-def adjust_initial_application(simulacao, ipca_data, data_inicial, data_final):
+def adjust_initial_application(simulacao, indice_inflacao, data_inicial, data_final):
     """
     Ajusta a aplicação inicial de acordo com a inflação acumulada.
 
     Args:
         simulacao (SimulacaoAutomatica): Objeto da simulação automática.
-        ipca_data (pd.DataFrame): DataFrame com os dados do IPCA.
+        indice_inflacao (IndiceInflacaoAcumulado): Índice acumulado do IPCA.
         data_inicial (datetime): Data inicial.
         data_final (datetime): Data final.
 
     Returns:
         float: Valor ajustado da aplicação inicial.
     """
-    return ajustar_inflacao_automatica(
-        periodo_inicial=data_inicial,
-        ipca_data=ipca_data,
-        coluna_ipca='Valor',
-        valor=simulacao.aplicacao_inicial,
-        data_final=data_final
-    ) or 0
+    return indice_inflacao.deflacionar(simulacao.aplicacao_inicial, data_inicial, data_final) or 0
 
 
-def adjust_monthly_applications(simulacao, ipca_data, data_inicial, data_final):
+def adjust_monthly_applications(simulacao, ipca_data, indice_inflacao, data_inicial, data_final):
     """
-    Ajusta as aplicações mensais com base na inflação.
+    Ajusta as aplicações mensais com base na inflação, todas de uma vez.
 
     Args:
         simulacao (SimulacaoAutomatica): Objeto da simulação automática.
         ipca_data (pd.DataFrame): DataFrame com os dados do IPCA.
+        indice_inflacao (IndiceInflacaoAcumulado): Índice acumulado do IPCA.
         data_inicial (datetime): Data inicial.
         data_final (datetime): Data final.
 
     Returns:
         tuple: Lista das aplicações mensais ajustadas e datas válidas.
     """
-    aplicacoes_mensais_ajustadas = []
     datas_validas = ipca_data.loc[
         (ipca_data.index >= data_inicial) & (ipca_data.index <= data_final)].index
 
-    for data_corrente in datas_validas:
-        aplicacao_mensal_ajustada = ajustar_inflacao_automatica(
-            periodo_inicial=data_corrente,
-            ipca_data=ipca_data,
-            coluna_ipca='Valor',
-            valor=simulacao.aplicacao_mensal,
-            data_final=data_final
-        ) or 0
-        aplicacao_mensal_ajustada = arredondar_para_baixo(aplicacao_mensal_ajustada)
-        aplicacoes_mensais_ajustadas.append(aplicacao_mensal_ajustada)
-    return aplicacoes_mensais_ajustadas, datas_validas
+    # Cada aplicação é corrigida da sua data até a data final
+    aplicacoes_mensais_ajustadas = indice_inflacao.deflacionar_vetor(simulacao.aplicacao_mensal, datas_validas, data_final)
+    aplicacoes_mensais_ajustadas = arredondar_para_baixo(np.nan_to_num(aplicacoes_mensais_ajustadas))
+    return aplicacoes_mensais_ajustadas.tolist(), datas_validas
 
 
 def calculate_meses_desde_lancamento(data_corrente, data_lancamento):
@@ -117,9 +124,9 @@ def get_preco_ativo(ativo, meses_desde_lancamento):
     Returns:
         float ou None: Preço do ativo, ou None se não estiver disponível.
     """
-    precos = ativo.precos_json
+    precos = ativo.precos_ajustados
     if meses_desde_lancamento < len(precos):
-        valor_adj_close = precos[meses_desde_lancamento].get('Adj Close', 0)
+        valor_adj_close = precos[meses_desde_lancamento]
 
         # Verificar se o valor é NaN usando pd.isna()
         if pd.isna(valor_adj_close):
@@ -130,6 +137,83 @@ def get_preco_ativo(ativo, meses_desde_lancamento):
         return None
 
 
+def carregar_precos_ativos(ativos, simulacao):
+    """
+    Carrega a série mensal de preços de cada ativo, já na moeda da carteira.
+
+    Usa o 'Adj Close', que já embute os dividendos, ou o 'Close' quando a simulação credita os dividendos
+    à parte. Os preços são lidos do armazém compartilhado; ativos criados antes do armazém usam a série
+    compactada guardada no próprio ativo, que só tem o 'Adj Close' (marcados com 'dividendos_embutidos').
+
+    Args:
+        ativos (list): Lista de ativos da carteira automática.
+        simulacao (SimulacaoAutomatica): Objeto da simulação automática.
+    """
+    coluna = 'Adj Close' if simulacao.dividendos == SimulacaoAutomatica.DIVIDENDOS_IGNORAR else 'Close'
+
+    moeda_carteira = simulacao.carteira_automatica.moeda_base
+    inicio = simulacao.data_inicial
+    fim = simulacao.data_final + relativedelta(months=1)
+
+    do_armazem = [ativo for ativo in ativos if ativo.precos_compactos is None]
+    pares_cambio = {
+        ticker_par(ativo.moeda, moeda_carteira)
+        for ativo in do_armazem
+        if ativo.moeda and ativo.moeda != moeda_carteira
+    }
+    garantir_precos_em_lote([ativo.ticker for ativo in do_armazem] + list(pares_cambio), inicio, fim, intervalo='1mo')
+
+    for ativo in ativos:
+        if ativo.precos_compactos is not None:
+            _, colunas = decodificar_serie(ativo.precos_compactos)
+            ativo.precos_ajustados = colunas['Adj Close']
+            ativo.dividendos_embutidos = True
+        else:
+            ativo.precos_ajustados = ler_precos_convertidos(
+                ativo.ticker, ativo.moeda or moeda_carteira, moeda_carteira, inicio, fim, intervalo='1mo', coluna=coluna
+            ).tolist()
+            ativo.dividendos_embutidos = coluna == 'Adj Close'
+
+
+def carregar_dividendos_ativos(ativos, simulacao, datas_validas):
+    """
+    Monta a matriz de dividendos por ação pagos em cada mês da simulação, já na moeda da carteira.
+
+    Os eventos vêm do armazém de eventos corporativos (baixados apenas se ausentes ou vencidos) e são
+    somados por mês de uma só vez. Ativos cujos preços já embutem os dividendos ficam com zero.
+
+    Args:
+        ativos (list): Lista de ativos, com 'dividendos_embutidos' (ver carregar_precos_ativos).
+        simulacao (SimulacaoAutomatica): Objeto da simulação automática.
+        datas_validas (pd.DatetimeIndex): Meses da simulação.
+
+    Returns:
+        np.ndarray: Dividendos por ação (meses x ativos).
+    """
+    moeda_carteira = simulacao.carteira_automatica.moeda_base
+    inicio = simulacao.data_inicial
+    fim = simulacao.data_final + relativedelta(months=1)
+
+    tickers = [ativo.ticker for ativo in ativos if not ativo.dividendos_embutidos]
+    garantir_eventos_em_lote(tickers)
+    por_ticker = dividendos_mensais(tickers, datas_validas, inicio, fim)
+
+    dividendos = np.zeros((len(datas_validas), len(ativos)))
+    coluna_ticker = {ticker: coluna for coluna, ticker in enumerate(tickers)}
+    for coluna, ativo in enumerate(ativos):
+        if ativo.dividendos_embutidos:
+            continue
+        valores = por_ticker[:, coluna_ticker[ativo.ticker]]
+        moeda_ativo = ativo.moeda or moeda_carteira
+        if moeda_ativo != moeda_carteira and valores.any():
+            # Taxa de câmbio do mês (ou a anterior mais próxima), a mesma usada na conversão dos preços
+            taxas = serie_cambio(moeda_ativo, moeda_carteira, inicio, fim, '1mo').reindex(datas_validas, method='ffill')
+            valores = valores * np.nan_to_num(taxas.to_numpy(dtype=float))
+        dividendos[:, coluna] = valores
+
+    return dividendos
+
+
 def update_ativos_for_date(ativos, data_corrente, valor_inicial_mes, valor_total_carteira):
     """
     Atualiza a quantidade de ativos para uma data específica.
@@ -267,6 +351,197 @@ def collect_ativos_info(ativos):
     return ativos_info
 
 
+def preparar_simulacao(simulacao):
+    """
+    Reúne, sem gravar nada no banco, os dados de entrada do motor para uma simulação automática:
+    IPCA, índice de inflação acumulado, meses da simulação e ativos com os preços carregados.
+
+    Args:
+        simulacao (SimulacaoAutomatica): Objeto da simulação automática.
+
+    Returns:
+        dict ou None: Dicionário com 'ipca_data', 'indice_inflacao', 'data_inicial', 'data_final',
+        'datas_validas', 'ativos', 'estrategia' e 'banda' (rebalanceamento), 'dividendos' (matriz de
+        dividendos por ação, ou None se já estão embutidos nos preços) e 'reinvestir', ou None se as datas
+        forem inválidas.
+    """
+    ipca_data = get_ipca_data(simulacao)
+
+    data_inicial = pd.to_datetime(simulacao.data_inicial)
+    data_final = pd.to_datetime(simulacao.data_final)
+
+    if data_inicial is None or data_final is None:
+        return None
+
+    datas_validas = ipca_data.loc[
+        (ipca_data.index >= data_inicial) & (ipca_data.index <= data_final)].index
+
+    ativos = list(simulacao.carteira_automatica.ativos.all())
+    carregar_precos_ativos(ativos, simulacao)
+    for ativo in ativos:
+        ativo.data_lancamento_ts = pd.Timestamp(ativo.data_lancamento) if ativo.data_lancamento else None
+
+    dividendos = None
+    if simulacao.dividendos != SimulacaoAutomatica.DIVIDENDOS_IGNORAR:
+        dividendos = carregar_dividendos_ativos(ativos, simulacao, datas_validas)
+
+    return {
+        'ipca_data': ipca_data,
+        # Índice acumulado calculado uma única vez para todos os ajustes da simulação
+        'indice_inflacao': IndiceInflacaoAcumulado.de_dataframe(ipca_data),
+        'data_inicial': data_inicial,
+        'data_final': data_final,
+        'datas_validas': datas_validas,
+        'ativos': ativos,
+        'estrategia': simulacao.estrategia_rebalanceamento,
+        'banda': simulacao.banda_rebalanceamento,
+        'dividendos': dividendos,
+        'reinvestir': simulacao.dividendos == SimulacaoAutomatica.DIVIDENDOS_REINVESTIR,
+    }
+
+
+def simular_com_rebalanceamento(dados, aplicacoes_mensais_ajustadas, aplicacao_inicial_ajustada):
+    """
+    Simula a carteira com a estratégia de rebalanceamento e o tratamento de dividendos da simulação,
+    atualizando a posse final dos ativos.
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        aplicacoes_mensais_ajustadas (list): Lista de aplicações mensais ajustadas.
+        aplicacao_inicial_ajustada (float): Aplicação inicial ajustada.
+
+    Returns:
+        tuple: Lista com o valor total da carteira em cada mês e dicionário com o número de
+        rebalanceamentos, o valor total vendido ('giro') e o total de dividendos recebidos ('proventos').
+    """
+    ativos = dados['ativos']
+    datas_validas = dados['datas_validas']
+    if len(datas_validas) == 0:
+        return [], {'rebalanceamentos': 0, 'giro': 0.0, 'proventos': 0.0}
+
+    precos, disponivel = montar_matriz_precos(ativos, datas_validas)
+    resultado = simular_rebalanceamento(
+        precos,
+        disponivel,
+        pesos=[[ativo.peso for ativo in ativos]],
+        aportes=[aplicacoes_mensais_ajustadas],
+        aplicacao_inicial=[aplicacao_inicial_ajustada],
+        datas=datas_validas,
+        estrategia=dados['estrategia'],
+        banda=dados['banda'],
+        dividendos=dados['dividendos'],
+        reinvestir=dados['reinvestir']
+    )
+
+    for coluna, ativo in enumerate(ativos):
+        ativo.posse = float(resultado['posses'][0, coluna])
+
+    adjclose_carteira = list(zip(datas_validas, resultado['valor'][0].tolist()))
+    return adjclose_carteira, {
+        'rebalanceamentos': int(resultado['rebalanceamentos'][0]),
+        'giro': float(arredondar_para_baixo(resultado['giro'][0])),
+        'proventos': float(arredondar_para_baixo(resultado['proventos'][0])),
+    }
+
+
+def codificar_fatores_crescimento(dados, precos, disponivel, aportes):
+    """
+    Calcula e codifica, por mês, o fator de crescimento de uma unidade aportada, o fator de inflação até a
+    data final e o aporte corrigido usado no resultado.
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        aportes (np.ndarray): Aporte corrigido de cada mês (a aplicação inicial entra no primeiro mês).
+
+    Returns:
+        bytes: Série codificada com as colunas 'Fator', 'Inflacao' e 'Aporte'.
+    """
+    return codificar_serie(dados['datas_validas'].values, {
+        'Fator': fatores_crescimento(precos, disponivel, [ativo.peso for ativo in dados['ativos']]),
+        'Inflacao': dados['indice_inflacao'].fatores(dados['datas_validas'], dados['data_final']),
+        'Aporte': aportes,
+    })
+
+
+def codificar_contribuicoes_ativos(dados, precos, disponivel, aportes):
+    """
+    Calcula e codifica, por mês, o caixa distribuído ('investido'), o número de ativos com preço ('compraveis')
+    e a contribuição por unidade de peso de cada ativo (uma coluna por ticker).
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        precos (np.ndarray): Preços (meses x ativos).
+        disponivel (np.ndarray): Máscara de meses em que cada ativo tem preço (meses x ativos).
+        aportes (np.ndarray): Aporte corrigido de cada mês (a aplicação inicial entra no primeiro mês).
+
+    Returns:
+        bytes: Série codificada.
+    """
+    ativos = dados['ativos']
+    investido, contribuicoes = contribuicoes_ativos(precos, disponivel, [ativo.peso for ativo in ativos], aportes)
+
+    colunas = {
+        'investido': investido,
+        'compraveis': (disponivel & (precos > 0)).sum(axis=1),
+    }
+    for coluna, ativo in enumerate(ativos):
+        colunas[ativo.ticker] = contribuicoes[:, coluna]
+    return codificar_serie(dados['datas_validas'].values, colunas)
+
+
+def taxa_livre_de_risco(datas):
+    """
+    Obtém a taxa livre de risco de cada mês (série do SGS em METRICAS_CODIGO_TAXA_LIVRE, por padrão o CDI).
+
+    Args:
+        datas (pd.DatetimeIndex): Meses da simulação.
+
+    Returns:
+        np.ndarray ou None: Taxa de cada mês, em fração, ou None se a série não estiver configurada ou
+        não cobrir todos os meses.
+    """
+    codigo = getattr(settings, 'METRICAS_CODIGO_TAXA_LIVRE', 4391)
+    if not codigo or len(datas) == 0:
+        return None
+
+    try:
+        serie = obter_taxa_mensal(codigo, datas[0], datas[-1])
+    except Exception as e:
+        logger.warning(f'Erro ao obter a taxa livre de risco (SGS {codigo}): {e}')
+        return None
+
+    taxas = serie.reindex(datas).to_numpy(dtype=float)
+    if np.isnan(taxas).any():
+        return None
+    return taxas / 100
+
+
+def calcular_metricas_simulacao(dados, valores, aportes, aplicacao_inicial):
+    """
+    Calcula as métricas de risco e retorno do resultado de uma simulação automática.
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        valores (array-like): Valor total da carteira em cada mês.
+        aportes (array-like): Aporte corrigido de cada mês.
+        aplicacao_inicial (float): Aplicação inicial corrigida.
+
+    Returns:
+        dict: Métricas serializáveis (ver metricas_services.calcular_metricas) e o código da taxa livre de risco usada.
+    """
+    datas_validas = dados['datas_validas']
+    taxa_livre = taxa_livre_de_risco(datas_validas)
+    inflacao = dados['ipca_data'].loc[datas_validas, 'Valor'].to_numpy(dtype=float) / 100
+
+    metricas = calcular_metricas(valores, aportes, aplicacao_inicial, taxa_livre=taxa_livre, inflacao=inflacao)
+    return {
+        **resumir_metricas(metricas),
+        'taxa_livre': getattr(settings, 'METRICAS_CODIGO_TAXA_LIVRE', 4391) if taxa_livre is not None else None,
+    }
+
+
 def calcular_resultado_simulacao(simulacao_id):
     """
     Calcula o resultado de uma simulação automática com base nos parâmetros fornecidos.
@@ -280,32 +555,63 @@ def calcular_resultado_simulacao(simulacao_id):
     try:
         simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id)
 
-        ipca_data = get_ipca_data(simulacao)
-
-        data_inicial = pd.to_datetime(simulacao.data_inicial)
-        data_final = pd.to_datetime(simulacao.data_final)
-
-        if data_inicial is None or data_final is None:
+        dados = preparar_simulacao(simulacao)
+        if dados is None:
             return {'error': 'Formato de data inválido'}, 400
 
-        aplicacao_inicial_ajustada = adjust_initial_application(simulacao, ipca_data, data_inicial, data_final)
-        aplicacao_inicial_ajustada = arredondar_para_baixo(aplicacao_inicial_ajustada)
+        ativos = dados['ativos']
+        datas_validas = dados['datas_validas']
 
-        aplicacoes_mensais_ajustadas, datas_validas = adjust_monthly_applications(simulacao, ipca_data, data_inicial, data_final)
+        aplicacao_inicial_ajustada = adjust_initial_application(
+            simulacao, dados['indice_inflacao'], dados['data_inicial'], dados['data_final']
+        )
+        aplicacao_inicial_ajustada = arredondar_para_baixo(aplicacao_inicial_ajustada)
 
-        ativos = list(simulacao.carteira_automatica.ativos.all())
-        for ativo in ativos:
-            ativo.precos_json = json.loads(ativo.precos)
-            ativo.data_lancamento_ts = pd.Timestamp(ativo.data_lancamento) if ativo.data_lancamento else None
+        aplicacoes_mensais_ajustadas, _ = adjust_monthly_applications(
+            simulacao, dados['ipca_data'], dados['indice_inflacao'], dados['data_inicial'], dados['data_final']
+        )
 
-        adjclose_carteira = simulate_monthly_investments(ativos, aplicacoes_mensais_ajustadas, datas_validas, aplicacao_inicial_ajustada)
+        estatisticas = {'rebalanceamentos': 0, 'giro': 0.0, 'proventos': 0.0}
+        if dados['estrategia'] != SimulacaoAutomatica.SEM_REBALANCEAMENTO or dados['dividendos'] is not None:
+            if sum(ativo.peso for ativo in ativos) > 1 + 1e-9:
+                return {'error': 'A soma dos pesos não pode ser maior que 1 com rebalanceamento ou dividendos.'}, 400
+            adjclose_carteira, estatisticas = simular_com_rebalanceamento(
+                dados, aplicacoes_mensais_ajustadas, aplicacao_inicial_ajustada
+            )
+            # Com vendas ou dividendos o resultado deixa de ser linear nos aportes e nos pesos
+            simulacao.fatores_crescimento = None
+            simulacao.contribuicoes_ativos = None
+        else:
+            # Motor vetorizado por padrão; SIMULACAO_MOTOR='legado' usa o cálculo mês a mês
+            if getattr(settings, 'SIMULACAO_MOTOR', 'vetorizado') == 'legado':
+                simular = simulate_monthly_investments
+            else:
+                simular = simular_aportes_vetorizado
+            adjclose_carteira = simular(ativos, aplicacoes_mensais_ajustadas, datas_validas, aplicacao_inicial_ajustada)
+
+            # Dados para as consultas sem nova simulação (outros aportes e outros pesos)
+            if len(datas_validas):
+                precos, disponivel = montar_matriz_precos(ativos, datas_validas)
+                aportes = np.array(aplicacoes_mensais_ajustadas, dtype=float)
+                aportes[0] += aplicacao_inicial_ajustada
+                simulacao.fatores_crescimento = codificar_fatores_crescimento(dados, precos, disponivel, aportes)
+                simulacao.contribuicoes_ativos = codificar_contribuicoes_ativos(dados, precos, disponivel, aportes)
+
+        # Métricas calculadas uma vez aqui e gravadas com o resultado
+        valores = [valor for _, valor in adjclose_carteira]
+        simulacao.metricas = calcular_metricas_simulacao(
+            dados, valores, aplicacoes_mensais_ajustadas, aplicacao_inicial_ajustada
+        )
+        # Mesmos aportes investidos em cada referência, simulados juntos no motor vetorizado
+        simulacao.resultados_benchmarks = calcular_benchmarks(
+            simulacao, dados, valores, aplicacoes_mensais_ajustadas, aplicacao_inicial_ajustada
+        )
 
         df_resultado = save_simulation_results(simulacao, adjclose_carteira)
 
         ativos_info = collect_ativos_info(ativos)
 
-        for ativo in ativos:
-            ativo.save()
+        Ativo.objects.bulk_update(ativos, ['posse'])
 
         resposta = {
             'simulacao': {
@@ -313,9 +619,21 @@ def calcular_resultado_simulacao(simulacao_id):
                 'valor_mensal': simulacao.aplicacao_mensal,
                 'data_inicial': simulacao.data_inicial,
                 'data_final': simulacao.data_final,
-                'ativos': ativos_info
+                'ativos': ativos_info,
+                'rebalanceamento': {
+                    'estrategia': simulacao.estrategia_rebalanceamento,
+                    'banda': simulacao.banda_rebalanceamento,
+                    'rebalanceamentos': estatisticas['rebalanceamentos'],
+                    'giro': estatisticas['giro'],
+                },
+                'dividendos': {
+                    'tratamento': simulacao.dividendos,
+                    'total': estatisticas['proventos'],
+                }
             },
-            'resultado': df_resultado.to_dict(orient='records')
+            'metricas': simulacao.metricas,
+            'resultado': df_resultado.to_dict(orient='records'),
+            'benchmarks': simulacao.resultados_benchmarks
         }
 
         return resposta, 200
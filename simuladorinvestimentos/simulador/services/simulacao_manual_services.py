@@ -1,8 +1,9 @@
 from django.shortcuts import get_object_or_404
-from datetime import datetime
 import json
+import numpy as np
 from ..models import SimulacaoManual
 from ..utils import arredondar_para_baixo
+from ..codec_precos import decodificar_serie
 
 
 def calcular_simulacao_manual(simulacao_id):
@@ -43,27 +44,12 @@ def calcular_simulacao_manual(simulacao_id):
             # Utiliza o último preço convertido, se disponível
             ultimo_preco = ativo.ultimo_preco_convertido
         else:
-            # Verifica se há preços disponíveis no histórico do ativo
-            if ativo.precos:
-                precos_dict = ativo.precos
-                try:
-                    # Converte as chaves (datas) em objetos datetime para facilitar a manipulação
-                    date_prices = [
-                        (datetime.strptime(date_str, '%Y-%m-%d'), price)
-                        for date_str, price in precos_dict.items()
-                    ]
-                    # Filtra os preços que são anteriores ou iguais ao mês atual
-                    date_prices = [dp for dp in date_prices if dp[0] <= simulacao_manual.mes_atual]
-                    if date_prices:
-                        # Ordena os preços por data e seleciona o mais recente
-                        date_prices.sort()
-                        ultimo_preco = date_prices[-1][1]
-                    else:
-                        # Define o preço como 0 se não houver preços válidos
-                        ultimo_preco = 0
-                except Exception as e:
-                    # Em caso de erro na conversão dos preços, define o preço como 0
-                    ultimo_preco = 0
+            # Verifica se há preços disponíveis no histórico compactado do ativo
+            if ativo.precos_compactos is not None:
+                datas, colunas = decodificar_serie(ativo.precos_compactos)
+                # Último fechamento anterior ou igual ao mês atual (busca binária nas datas ordenadas)
+                posicao = np.searchsorted(datas, np.datetime64(simulacao_manual.mes_atual.date()), side='right')
+                ultimo_preco = float(colunas['Close'][posicao - 1]) if posicao > 0 else 0
             else:
                 # Define o preço como 0 se não houver histórico de preços
                 ultimo_preco = 0
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from ..models import SimulacaoAutomatica
+from ..codec_precos import decodificar_serie
+from ..utils import arredondar_para_baixo
+from .resultado_simulacao_automatica_services import preparar_simulacao
+from .varredura_simulacao_services import avaliar_variantes
+
+
+def _mes(data):
+    """
+    Converte 'AAAA-MM' ou 'AAAA-MM-DD' no primeiro dia do mês.
+
+    Args:
+        data (str): Data informada.
+
+    Returns:
+        np.datetime64: Primeiro dia do mês.
+    """
+    return np.datetime64(pd.Timestamp(data).to_period('M').start_time.date(), 'D')
+
+
+def _posicoes(datas, chaves):
+    """
+    Localiza os meses informados na série da simulação.
+
+    Args:
+        datas (np.ndarray): Meses da simulação (datetime64[D]).
+        chaves (iterable): Datas informadas.
+
+    Returns:
+        np.ndarray: Posição de cada mês na série.
+
+    Raises:
+        ValueError: Se algum mês estiver fora do período da simulação.
+    """
+    chaves = list(chaves)
+    meses = np.array([_mes(chave) for chave in chaves], dtype='datetime64[D]')
+    posicoes = np.searchsorted(datas, meses)
+    fora = [
+        chave for chave, posicao, mes in zip(chaves, posicoes, meses)
+        if posicao >= len(datas) or datas[posicao] != mes
+    ]
+    if fora:
+        raise ValueError(f'Meses fora do período da simulação: {", ".join(map(str, fora))}')
+    return posicoes
+
+
+def simular_aportes(simulacao_id, user, aportes=None, extras=None, pular=None, ajustar_inflacao=False):
+    """
+    Calcula o valor final de uma simulação automática para outro cronograma de aportes, sem simular novamente.
+
+    O valor final é o produto escalar dos aportes pelos fatores de crescimento gravados no último cálculo
+    do resultado (ver fatores_crescimento). Não considera os arredondamentos de centavos feitos a cada mês.
+    Com rebalanceamento ou dividendos creditados à parte o resultado não é linear nos aportes: o cronograma
+    é simulado no motor vetorizado, sem gravar nada no banco ('metodo' indica qual cálculo foi usado).
+
+    Args:
+        simulacao_id (int): ID da simulação automática.
+        user (User): Usuário autenticado.
+        aportes (dict, optional): Mês -> valor; substitui todo o cronograma da simulação.
+        extras (dict, optional): Mês -> valor somado ao cronograma.
+        pular (list, optional): Meses sem aporte.
+        ajustar_inflacao (bool, optional): Se os valores informados devem ser corrigidos pela inflação até a
+            data final, como os aportes da simulação. Default é False.
+
+    Returns:
+        tuple: Dicionário com o valor final do cronograma, o valor final do cronograma original e o total aportado,
+        e código de status HTTP.
+    """
+    try:
+        simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id, usuario=user)
+        nao_linear = (
+            simulacao.estrategia_rebalanceamento != SimulacaoAutomatica.SEM_REBALANCEAMENTO
+            or simulacao.dividendos != SimulacaoAutomatica.DIVIDENDOS_IGNORAR
+        )
+
+        if nao_linear:
+            # Cronograma original recalculado como em avaliar_variantes (a aplicação inicial entra no primeiro mês)
+            dados = preparar_simulacao(simulacao)
+            if dados is None or len(dados['datas_validas']) == 0:
+                return {'error': 'Não há meses de inflação no período da simulação.'}, 400
+            datas = dados['datas_validas'].values.astype('datetime64[D]')
+            inflacao = dados['indice_inflacao'].fatores(dados['datas_validas'], dados['data_final'])
+            fator_inicial = dados['indice_inflacao'].fator(dados['data_inicial'], dados['data_final'])
+            original = arredondar_para_baixo(np.nan_to_num(simulacao.aplicacao_mensal / inflacao))
+            if fator_inicial:
+                original[0] += arredondar_para_baixo(simulacao.aplicacao_inicial / fator_inicial)
+        elif simulacao.fatores_crescimento is None:
+            return {'error': 'Calcule o resultado da simulação antes de simular outros aportes.'}, 400
+        else:
+            datas, colunas = decodificar_serie(simulacao.fatores_crescimento)
+            inflacao = colunas['Inflacao']
+            original = colunas['Aporte']
+
+        divisor = inflacao if ajustar_inflacao else np.ones(len(datas))
+
+        try:
+            if aportes is not None:
+                cronograma = np.zeros(len(datas))
+                np.add.at(cronograma, _posicoes(datas, aportes), np.array(list(aportes.values()), dtype=float))
+                cronograma /= divisor
+            else:
+                cronograma = original.copy()
+            if pular:
+                cronograma[_posicoes(datas, pular)] = 0.0
+            if extras:
+                posicoes = _posicoes(datas, extras)
+                np.add.at(cronograma, posicoes, np.array(list(extras.values()), dtype=float) / divisor[posicoes])
+        except (ValueError, TypeError, AttributeError) as e:
+            return {'error': str(e)}, 400
+
+        if nao_linear:
+            # O cronograma novo e o original são simulados juntos, com os pesos atuais da carteira
+            variante = {
+                'aplicacao_inicial': 0.0,
+                'aplicacao_mensal': 0.0,
+                'pesos': {ativo.ticker: ativo.peso for ativo in dados['ativos']},
+            }
+            resultado, _, _ = avaliar_variantes(dados, [variante, variante], aportes=np.vstack([cronograma, original]))
+            valor_final, valor_final_original = resultado['valor'][:, -1]
+        else:
+            valor_final = np.dot(cronograma, colunas['Fator'])
+            valor_final_original = np.dot(original, colunas['Fator'])
+
+        return {
+            'simulacao_id': simulacao.id,
+            'valor_final': float(arredondar_para_baixo(valor_final)),
+            'valor_final_original': float(arredondar_para_baixo(valor_final_original)),
+            'total_aportado': float(arredondar_para_baixo(cronograma.sum())),
+            'metodo': 'simulacao' if nao_linear else 'linear',
+        }, 200
+
+    except SimulacaoAutomatica.DoesNotExist:
+        return {'error': 'SimulacaoAutomatica não encontrada'}, 404
+    except Exception as e:
+        return {'error': str(e)}, 500
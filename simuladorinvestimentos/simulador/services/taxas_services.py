@@ -0,0 +1,96 @@
+import logging
+import pandas as pd
+
+from datetime import date, timedelta
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from ..models import SerieTaxa, TaxaMensal
+from ..coalescencia import arrendamento
+from ..provedores import obter_provedor
+
+
+logger = logging.getLogger(__name__)
+
+# Primeiro mês buscado quando a série ainda não está no armazém
+DATA_INICIAL_TAXAS = date(1980, 1, 1)
+
+
+def garantir_taxa(codigo):
+    """
+    Garante que o armazém tenha a série mensal do SGS, buscando apenas os meses posteriores ao último gravado.
+
+    A série é consultada de novo depois de TAXAS_TTL segundos; falhas do provedor mantêm os meses já gravados.
+
+    Args:
+        codigo (int): Código da série no SGS.
+
+    Returns:
+        int: Quantidade de meses gravados.
+    """
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'TAXAS_TTL', 24 * 3600))
+
+    def vencida():
+        return not SerieTaxa.objects.filter(codigo=codigo, atualizado_em__gt=limite).exists()
+
+    if not vencida():
+        return 0
+
+    # Requisições simultâneas pela mesma série esperam a primeira consulta terminar
+    with arrendamento(f'taxa:{codigo}') as esperou:
+        if esperou and not vencida():
+            return 0
+
+        ultimo = TaxaMensal.objects.filter(codigo=codigo).aggregate(ultimo=Max('data'))['ultimo']
+        inicio = ultimo + relativedelta(months=1) if ultimo else DATA_INICIAL_TAXAS
+        if inicio > date.today():
+            SerieTaxa.objects.update_or_create(codigo=codigo)
+            return 0
+
+        try:
+            df = obter_provedor().taxa_mensal(codigo, inicio, date.today())
+        except Exception as e:
+            logger.warning(f'Erro ao buscar a série {codigo} do SGS: {e}')
+            return 0
+
+        TaxaMensal.objects.bulk_create(
+            [
+                TaxaMensal(codigo=codigo, data=pd.Timestamp(row.Data).date().replace(day=1), valor=float(row.Valor))
+                for row in df.itertuples(index=False)
+                if not pd.isna(row.Valor)
+            ],
+            ignore_conflicts=True
+        )
+        SerieTaxa.objects.update_or_create(codigo=codigo)
+
+    return len(df)
+
+
+def obter_taxa_mensal(codigo, inicio, fim):
+    """
+    Obtém do armazém local uma série mensal do SGS entre dois meses, indo à rede apenas se estiver vencida.
+
+    Args:
+        codigo (int): Código da série no SGS.
+        inicio (str, date ou datetime): Data inicial.
+        fim (str, date ou datetime): Data final (inclusiva).
+
+    Returns:
+        pd.Series: Taxas em % ao mês indexadas pelo primeiro dia do mês.
+    """
+    garantir_taxa(codigo)
+
+    linhas = list(
+        TaxaMensal.objects.filter(
+            codigo=codigo, data__gte=pd.Timestamp(inicio).date(), data__lte=pd.Timestamp(fim).date()
+        ).order_by('data').values_list('data', 'valor')
+    )
+    return pd.Series(
+        [valor for _, valor in linhas],
+        index=pd.DatetimeIndex([data for data, _ in linhas]),
+        name=codigo,
+        dtype=float
+    )
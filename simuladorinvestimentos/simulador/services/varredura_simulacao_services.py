@@ -0,0 +1,218 @@
+import math
+import itertools
+import numpy as np
+
+from django.conf import settings
+
+from ..models import SimulacaoAutomatica
+from ..utils import arredondar_para_baixo
+from .metricas_services import retornos_mensais, cagr, drawdown_maximo
+from .motor_simulacao_services import montar_matriz_precos, simular_variantes, simular_rebalanceamento
+from .resultado_simulacao_automatica_services import preparar_simulacao
+
+
+PARAMETROS = ('aplicacao_inicial', 'aplicacao_mensal', 'pesos')
+
+
+def validar_pesos(pesos, tickers):
+    """
+    Valida um conjunto de pesos por ticker: só tickers da carteira, valores numéricos, não negativos e com soma de no máximo 1.
+
+    Args:
+        pesos (dict): Ticker -> peso.
+        tickers (iterable): Tickers da carteira.
+
+    Returns:
+        dict: Ticker -> peso como float.
+
+    Raises:
+        ValueError: Se os pesos forem inválidos.
+    """
+    if not isinstance(pesos, dict):
+        raise ValueError('Os pesos devem ser um objeto ticker -> peso')
+
+    desconhecidos = set(pesos) - set(tickers)
+    if desconhecidos:
+        raise ValueError(f'Pesos para tickers fora da carteira: {", ".join(sorted(desconhecidos))}')
+
+    validados = {}
+    for ticker, peso in pesos.items():
+        if isinstance(peso, bool):
+            raise ValueError(f'Peso inválido para {ticker}: {peso}')
+        try:
+            peso = float(peso)
+        except (TypeError, ValueError):
+            raise ValueError(f'Peso inválido para {ticker}: {peso}')
+        if not math.isfinite(peso) or peso < 0:
+            raise ValueError(f'Peso inválido para {ticker}: {peso}')
+        validados[ticker] = peso
+
+    # Pequena tolerância para somas como 0.1 + 0.2 + 0.7
+    if sum(validados.values()) > 1 + 1e-9:
+        raise ValueError('A soma dos pesos não pode ser maior que 1')
+
+    return validados
+
+
+def _montar_variantes(simulacao, ativos, grade, variantes):
+    """
+    Expande a grade de parâmetros (produto cartesiano) ou valida a lista explícita de variantes.
+
+    Parâmetros omitidos usam os valores da própria simulação. O número de variantes é conferido contra
+    SIMULACAO_VARREDURA_MAX_VARIANTES antes de a grade ser expandida.
+
+    Args:
+        simulacao (SimulacaoAutomatica): Objeto da simulação automática.
+        ativos (list): Ativos da carteira.
+        grade (dict): Parâmetro -> lista de valores.
+        variantes (list): Lista de dicionários parâmetro -> valor.
+
+    Returns:
+        list: Lista de variantes completas (aplicacao_inicial, aplicacao_mensal e pesos por ticker).
+
+    Raises:
+        ValueError: Se algum parâmetro for inválido ou houver variantes demais.
+    """
+    padrao = {
+        'aplicacao_inicial': simulacao.aplicacao_inicial,
+        'aplicacao_mensal': simulacao.aplicacao_mensal,
+        'pesos': {ativo.ticker: ativo.peso for ativo in ativos},
+    }
+    maximo = getattr(settings, 'SIMULACAO_VARREDURA_MAX_VARIANTES', 10000)
+
+    if grade:
+        if not isinstance(grade, dict):
+            raise ValueError('A grade deve ser um objeto parâmetro -> lista de valores')
+        desconhecidos = set(grade) - set(PARAMETROS)
+        if desconhecidos:
+            raise ValueError(f'Parâmetros desconhecidos na grade: {", ".join(sorted(desconhecidos))}')
+        eixos = [grade.get(parametro) or [padrao[parametro]] for parametro in PARAMETROS]
+        if not all(isinstance(eixo, list) for eixo in eixos):
+            raise ValueError('Cada parâmetro da grade deve ser uma lista de valores')
+        quantidade = math.prod(len(eixo) for eixo in eixos)
+        # As combinações são geradas sob demanda, só depois de conferido o tamanho da grade
+        variantes = (dict(zip(PARAMETROS, combinacao)) for combinacao in itertools.product(*eixos))
+    elif not variantes:
+        raise ValueError('Informe uma grade ou uma lista de variantes')
+    elif not isinstance(variantes, list):
+        raise ValueError('As variantes devem ser uma lista')
+    else:
+        quantidade = len(variantes)
+
+    if quantidade > maximo:
+        raise ValueError(f'Número de variantes ({quantidade}) acima do máximo permitido ({maximo}).')
+
+    tickers = set(padrao['pesos'])
+    completas = []
+    for variante in variantes:
+        completa = {parametro: variante.get(parametro, padrao[parametro]) for parametro in PARAMETROS}
+        completa['aplicacao_inicial'] = float(completa['aplicacao_inicial'])
+        completa['aplicacao_mensal'] = float(completa['aplicacao_mensal'])
+        completa['pesos'] = validar_pesos(completa['pesos'], tickers)
+        completas.append(completa)
+
+    return completas
+
+
+def avaliar_variantes(dados, variantes, aportes=None):
+    """
+    Simula no motor vetorizado uma lista de variantes completas de uma simulação automática,
+    com a estratégia de rebalanceamento e o tratamento de dividendos da simulação.
+
+    Args:
+        dados (dict): Dados de entrada do motor, vindos de preparar_simulacao.
+        variantes (list): Variantes com 'aplicacao_inicial', 'aplicacao_mensal' e 'pesos' por ticker.
+        aportes (np.ndarray, optional): Aportes já corrigidos de cada variante (variantes x meses), usados no
+            lugar de 'aplicacao_mensal' (ex.: cronogramas com meses pulados ou aportes extras).
+
+    Returns:
+        tuple: (resultado de simular_variantes ou simular_rebalanceamento, aportes corrigidos (variantes x meses), aplicação inicial corrigida).
+    """
+    ativos = dados['ativos']
+    datas_validas = dados['datas_validas']
+
+    # Aportes corrigidos pela inflação, da mesma forma que em calcular_resultado_simulacao
+    indice_inflacao = dados['indice_inflacao']
+    fatores = indice_inflacao.fatores(datas_validas, dados['data_final'])
+    fator_inicial = indice_inflacao.fator(dados['data_inicial'], dados['data_final'])
+
+    iniciais = np.array([variante['aplicacao_inicial'] for variante in variantes], dtype=float)
+    if aportes is None:
+        mensais = np.array([variante['aplicacao_mensal'] for variante in variantes], dtype=float)
+        aportes = arredondar_para_baixo(np.nan_to_num(mensais[:, None] / fatores[None, :]))
+    else:
+        aportes = np.atleast_2d(np.asarray(aportes, dtype=float))
+    aplicacao_inicial = arredondar_para_baixo(iniciais / fator_inicial if fator_inicial else np.zeros(len(variantes)))
+    pesos = np.array([[variante['pesos'].get(ativo.ticker, 0.0) for ativo in ativos] for variante in variantes], dtype=float)
+
+    precos, disponivel = montar_matriz_precos(ativos, datas_validas)
+    if dados['estrategia'] != SimulacaoAutomatica.SEM_REBALANCEAMENTO or dados['dividendos'] is not None:
+        resultado = simular_rebalanceamento(
+            precos, disponivel, pesos, aportes, aplicacao_inicial, datas_validas, dados['estrategia'], dados['banda'],
+            dividendos=dados['dividendos'], reinvestir=dados['reinvestir']
+        )
+    else:
+        resultado = simular_variantes(precos, disponivel, pesos, aportes, aplicacao_inicial)
+    return resultado, aportes, aplicacao_inicial
+
+
+def varrer_cenarios(simulacao_id, user, grade=None, variantes=None):
+    """
+    Avalia várias variantes de uma simulação automática (aplicação inicial, mensal e pesos) em uma única execução.
+
+    Os preços são carregados e alinhados uma vez; todas as variantes são simuladas juntas no motor
+    vetorizado, sem gravar nada no banco.
+
+    Args:
+        simulacao_id (int): ID da simulação automática.
+        user (User): Usuário autenticado.
+        grade (dict, optional): Parâmetro -> lista de valores; as variantes são todas as combinações.
+        variantes (list, optional): Lista explícita de variantes (dicionários parâmetro -> valor).
+
+    Returns:
+        tuple: Dicionário com valor final, total aportado, CAGR e drawdown máximo de cada variante, e código de status HTTP.
+    """
+    try:
+        simulacao = SimulacaoAutomatica.objects.get(id=simulacao_id, usuario=user)
+
+        dados = preparar_simulacao(simulacao)
+        if dados is None:
+            return {'error': 'Formato de data inválido'}, 400
+
+        ativos = dados['ativos']
+        datas_validas = dados['datas_validas']
+        if len(datas_validas) == 0:
+            return {'error': 'Não há meses de inflação no período da simulação.'}, 400
+
+        try:
+            lista = _montar_variantes(simulacao, ativos, grade, variantes)
+        except (ValueError, TypeError, AttributeError) as e:
+            return {'error': str(e)}, 400
+
+        resultado, aportes, aplicacao_inicial = avaliar_variantes(dados, lista)
+
+        retornos = retornos_mensais(resultado['valor'], aportes, aplicacao_inicial)
+        taxas = cagr(retornos)
+        quedas = drawdown_maximo(retornos)
+        totais = aplicacao_inicial + aportes.sum(axis=1)
+
+        return {
+            'simulacao_id': simulacao.id,
+            'data_inicial': datas_validas[0].strftime('%Y-%m-%d'),
+            'data_final': datas_validas[-1].strftime('%Y-%m-%d'),
+            'variantes': [
+                {
+                    **variante,
+                    'valor_final': float(resultado['valor'][indice, -1]),
+                    'total_aportado': float(arredondar_para_baixo(totais[indice])),
+                    'cagr': round(float(taxas[indice]), 6),
+                    'drawdown_maximo': round(float(quedas[indice]), 6),
+                }
+                for indice, variante in enumerate(lista)
+            ],
+        }, 200
+
+    except SimulacaoAutomatica.DoesNotExist:
+        return {'error': 'SimulacaoAutomatica não encontrada'}, 404
+    except Exception as e:
+        return {'error': str(e)}, 500
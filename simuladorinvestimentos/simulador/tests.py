@@ -0,0 +1,627 @@
+import copy
+import numpy as np
+import pandas as pd
+
+from datetime import date, timedelta
+from unittest import mock
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.test import TestCase, SimpleTestCase
+
+from .codec_precos import codificar_serie, decodificar_serie
+from .indice_inflacao import IndiceInflacaoAcumulado
+from .models import Ativo, CarteiraAutomatica, SimulacaoAutomatica
+from .services import precos_services, cambio_services, janelas_moveis_services
+from .services.benchmarks_services import _indice_de_taxas
+from .services.motor_simulacao_services import (
+    simular_aportes_vetorizado, fatores_crescimento, contribuicoes_ativos, simular_carteira, simular_rebalanceamento,
+    valores_janelas
+)
+from .services.otimizacao_services import encolher_covariancia, fronteira_eficiente, paridade_risco, projetar_simplex
+from .services.repesar_ativos_services import repesar_ativos
+from .services.resolver_meta_services import _bissectar, _caminhos
+from .services.resultado_simulacao_automatica_services import (
+    simulate_monthly_investments, codificar_contribuicoes_ativos
+)
+
+
+class ArmazemPrecosTests(TestCase):
+    """
+    Verifica que o armazém de preços baixa só os trechos que faltam e mantém os meses sem preço.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(precos_services, '_baixar_precos', side_effect=self._baixar_precos)
+        self.baixar = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _baixar_precos(ticker, inicio, fim, intervalo):
+        """
+        Gera barras mensais de [inicio, fim) no formato do yfinance: o preço é o número do mês desde 2000 e
+        março de 2020 vem sem nenhum preço.
+        """
+        datas = pd.date_range(inicio, fim - timedelta(days=1), freq='MS')
+        precos = np.array((datas.year - 2000) * 12 + datas.month, dtype=float)
+        precos[datas == pd.Timestamp('2020-03-01')] = np.nan
+        return pd.DataFrame(
+            {coluna: precos for coluna in precos_services.COLUNAS_PRECOS},
+            index=pd.DatetimeIndex(datas, name='Date')
+        )
+
+    def test_mes_sem_precos_e_mantido(self):
+        precos_services.garantir_precos('TESTE3', '2020-01-01', '2020-07-01', intervalo='1mo')
+        df = precos_services.ler_precos('TESTE3', '2020-01-01', '2020-07-01', intervalo='1mo')
+
+        # A posição de cada mês na série continua sendo o número de meses desde o início
+        self.assertEqual(list(df.index), list(pd.date_range('2020-01-01', '2020-06-01', freq='MS')))
+        self.assertTrue(df.loc['2020-03-01'].isna().all())
+        self.assertEqual(df['Adj Close'].iloc[5], 246.0)
+
+    def test_baixa_apenas_o_que_falta(self):
+        precos_services.garantir_precos('TESTE3', '2020-01-01', '2020-07-01', intervalo='1mo')
+        self.assertEqual(
+            [chamada.args for chamada in self.baixar.call_args_list],
+            [('TESTE3', date(2020, 1, 1), date(2020, 7, 1), '1mo')]
+        )
+
+        # Pedido maior: só o começo e o fim que faltam são baixados
+        self.baixar.reset_mock()
+        precos_services.garantir_precos('TESTE3', '2019-10-01', '2020-09-01', intervalo='1mo')
+        self.assertEqual(
+            sorted(chamada.args for chamada in self.baixar.call_args_list),
+            [('TESTE3', date(2019, 10, 1), date(2020, 1, 1), '1mo'), ('TESTE3', date(2020, 7, 1), date(2020, 9, 1), '1mo')]
+        )
+
+        # Tudo em cache: nenhum download
+        self.baixar.reset_mock()
+        precos_services.garantir_precos('TESTE3', '2019-11-01', '2020-08-01', intervalo='1mo')
+        self.baixar.assert_not_called()
+
+        df = precos_services.ler_precos('TESTE3', '2019-10-01', '2020-09-01', intervalo='1mo')
+        self.assertEqual(len(df), 11)
+        self.assertEqual(df['Adj Close'].iloc[0], 238.0)
+
+
+class CambioTests(TestCase):
+    """
+    Verifica a resolução de pares de câmbio pela cotação inversa e por triangulação via USD.
+    """
+
+    COTACOES = {'USDBRL=X': 5.0, 'EURUSD=X': 1.1}
+
+    def setUp(self):
+        patcher = mock.patch.object(precos_services, '_baixar_precos', side_effect=self._baixar_precos)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cambio_services._memoria.clear()
+        cambio_services._rotas.clear()
+        self.addCleanup(cambio_services._memoria.clear)
+        self.addCleanup(cambio_services._rotas.clear)
+
+    def _baixar_precos(self, ticker, inicio, fim, intervalo):
+        """
+        Só USDBRL=X e EURUSD=X existem; a cotação sobe 1% ao mês a partir do valor base.
+        """
+        if ticker not in self.COTACOES:
+            return pd.DataFrame(columns=precos_services.COLUNAS_PRECOS)
+        datas = pd.date_range(inicio, fim - timedelta(days=1), freq='MS')
+        cotacoes = self.COTACOES[ticker] * 1.01 ** np.arange(len(datas))
+        return pd.DataFrame(
+            {coluna: cotacoes for coluna in precos_services.COLUNAS_PRECOS},
+            index=pd.DatetimeIndex(datas, name='Date')
+        )
+
+    def test_par_inverso(self):
+        serie = cambio_services.serie_cambio('BRL', 'USD', '2020-01-01', '2020-07-01', intervalo='1mo')
+
+        np.testing.assert_allclose(serie.to_numpy(), 1 / (5.0 * 1.01 ** np.arange(6)))
+        self.assertEqual(cambio_services._rotas[('BRL', 'USD')], 'inversa')
+
+    def test_par_triangulado(self):
+        serie = cambio_services.serie_cambio('EUR', 'BRL', '2020-01-01', '2020-07-01', intervalo='1mo')
+
+        np.testing.assert_allclose(serie.to_numpy(), 1.1 * 5.0 * 1.01 ** (2 * np.arange(6)))
+        self.assertEqual(list(serie.index), list(pd.date_range('2020-01-01', '2020-06-01', freq='MS')))
+        self.assertEqual(cambio_services._rotas[('EUR', 'BRL')], 'triangulada')
+
+
+class CodecPrecosTests(SimpleTestCase):
+    """
+    Verifica que a codificação colunar devolve exatamente as datas e os valores gravados.
+    """
+
+    def test_ida_e_volta(self):
+        rng = np.random.default_rng(11)
+        datas = np.datetime64('1995-01-02') + np.cumsum(rng.integers(1, 5, size=500)).astype('timedelta64[D]')
+        colunas = {'Close': rng.lognormal(3.0, 1.0, size=500), 'Volume': rng.integers(0, 10 ** 9, size=500).astype(float)}
+        colunas['Close'][rng.random(500) < 0.1] = np.nan
+
+        for comprimir in (True, False):
+            with self.subTest(comprimir=comprimir):
+                datas_lidas, colunas_lidas = decodificar_serie(codificar_serie(datas, colunas, comprimir=comprimir))
+
+                np.testing.assert_array_equal(datas_lidas, datas)
+                self.assertEqual(list(colunas_lidas), list(colunas))
+                for nome, valores in colunas.items():
+                    np.testing.assert_array_equal(colunas_lidas[nome], valores)
+
+    def test_serie_vazia(self):
+        datas, colunas = decodificar_serie(codificar_serie(np.array([], dtype='datetime64[D]'), {'Close': []}))
+
+        self.assertEqual(len(datas), 0)
+        self.assertEqual(len(colunas['Close']), 0)
+
+    def test_formato_desconhecido(self):
+        with self.assertRaises(ValueError):
+            decodificar_serie(b'XXXX' + codificar_serie(np.array(['2020-01-01'], dtype='datetime64[D]'), {'Close': [1.0]})[4:])
+
+
+class IndiceInflacaoAcumuladoTests(SimpleTestCase):
+    """
+    Compara o índice acumulado com o produto das taxas mensais de cada intervalo.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(13)
+        self.datas = pd.date_range('2010-01-01', periods=60, freq='MS')
+        self.taxas = np.round(rng.uniform(-0.5, 1.5, size=60), 2)
+
+    def test_fatores_iguais_ao_produto(self):
+        indice = IndiceInflacaoAcumulado(self.datas, self.taxas)
+        inicios, fins = np.meshgrid(np.arange(60), np.arange(60), indexing='ij')
+        inicios, fins = inicios.ravel(), fins.ravel()
+
+        fatores = indice.fatores(self.datas[inicios], self.datas[fins])
+        esperado = np.array([
+            np.prod(1 + self.taxas[inicio:fim + 1] / 100) if fim >= inicio else np.nan
+            for inicio, fim in zip(inicios, fins)
+        ])
+        np.testing.assert_allclose(fatores, esperado, rtol=1e-12)
+
+    def test_fora_da_serie(self):
+        indice = IndiceInflacaoAcumulado(self.datas, self.taxas)
+
+        self.assertIsNone(indice.fator('2020-01-01', '2020-06-01'))
+        self.assertAlmostEqual(indice.fator('2009-01-01', '2010-02-01'), (1 + self.taxas[0] / 100) * (1 + self.taxas[1] / 100))
+
+    def test_coluna_gravada_equivale_as_taxas(self):
+        # O índice gravado vem de toda a série da tabela, com outra base; o trecho lido começa depois
+        niveis = 1234.5 * np.cumprod(1 + self.taxas / 100)
+        ipca_data = pd.DataFrame({'Valor': self.taxas, 'IndiceAcumulado': niveis}, index=self.datas).iloc[10:]
+
+        gravado = IndiceInflacaoAcumulado.de_dataframe(ipca_data)
+        calculado = IndiceInflacaoAcumulado.de_dataframe(ipca_data[['Valor']])
+
+        np.testing.assert_allclose(gravado.nivel, calculado.nivel, rtol=1e-12)
+        self.assertAlmostEqual(gravado.fator('2011-01-01', '2013-12-01'), niveis[47] / niveis[11])
+
+
+class SimularAportesVetorizadoTests(SimpleTestCase):
+    """
+    Compara o motor vetorizado com o cálculo mês a mês original em carteiras geradas aleatoriamente.
+    """
+
+    def _carteira_aleatoria(self, rng, datas):
+        """
+        Gera ativos com preços aleatórios, lançados antes, durante ou depois do período (ou sem data de
+        lançamento), com séries mais curtas que o período e preços ausentes (NaN) ou zerados.
+
+        Args:
+            rng (np.random.Generator): Gerador de números aleatórios.
+            datas (pd.DatetimeIndex): Meses da simulação.
+
+        Returns:
+            list: Lista de ativos com 'ticker', 'peso', 'posse', 'precos_ajustados' e 'data_lancamento_ts'.
+        """
+        n_ativos = int(rng.integers(1, 6))
+        pesos = rng.dirichlet(np.ones(n_ativos))
+        ativos = []
+        for coluna in range(n_ativos):
+            deslocamento = int(rng.integers(-12, len(datas) + 3))
+            lancamento = None if rng.random() < 0.1 else datas[0] + pd.DateOffset(months=deslocamento)
+
+            tamanho = int(rng.integers(0, len(datas) + 12))
+            precos = np.round(rng.lognormal(mean=3.0, sigma=1.0, size=tamanho), 4)
+            precos[rng.random(tamanho) < 0.1] = np.nan
+            precos[rng.random(tamanho) < 0.05] = 0.0
+
+            ativos.append(SimpleNamespace(
+                ticker=f'ATIVO{coluna}',
+                peso=float(pesos[coluna]),
+                posse=float(rng.choice([0.0, rng.uniform(0, 10)])),
+                precos_ajustados=precos,
+                data_lancamento_ts=lancamento,
+            ))
+        return ativos
+
+    def test_equivalente_ao_calculo_mes_a_mes(self):
+        rng = np.random.default_rng(2024)
+        for caso in range(200):
+            with self.subTest(caso=caso):
+                n_meses = int(rng.integers(1, 48))
+                datas = pd.date_range('2015-01-01', periods=n_meses, freq='MS')
+                aportes = np.round(rng.uniform(0, 2000, size=n_meses), 2).tolist()
+                aplicacao_inicial = float(np.round(rng.uniform(0, 10000), 2))
+
+                ativos = self._carteira_aleatoria(rng, datas)
+                ativos_originais = copy.deepcopy(ativos)
+
+                esperado = simulate_monthly_investments(ativos_originais, aportes, list(datas), aplicacao_inicial)
+                obtido = simular_aportes_vetorizado(ativos, aportes, datas, aplicacao_inicial)
+
+                # Mesma ordem de operações e arredondamentos: os resultados devem ser idênticos
+                self.assertEqual(obtido, esperado)
+                self.assertEqual([ativo.posse for ativo in ativos], [ativo.posse for ativo in ativos_originais])
+
+
+def _simular_sem_arredondar(precos, disponivel, pesos, aportes):
+    """
+    Cálculo mês a mês de referência, sem arredondamentos: o caixa é distribuído pelos pesos entre os ativos
+    com preço e o que sobra passa para o mês seguinte.
+
+    Returns:
+        np.ndarray: Valor da carteira em cada mês.
+    """
+    n_meses, n_ativos = precos.shape
+    posses = np.zeros(n_ativos)
+    saldo = 0.0
+    valores = np.zeros(n_meses)
+    for mes in range(n_meses):
+        saldo += aportes[mes]
+        distribuido = saldo
+        for ativo in range(n_ativos):
+            if disponivel[mes, ativo] and precos[mes, ativo] > 0:
+                posses[ativo] += distribuido * pesos[ativo] / precos[mes, ativo]
+                saldo -= distribuido * pesos[ativo]
+        valores[mes] = saldo + sum(
+            posses[ativo] * precos[mes, ativo] for ativo in range(n_ativos) if disponivel[mes, ativo]
+        )
+    return valores
+
+
+def _carteira_aleatoria(rng, n_meses, n_ativos, lacunas=True):
+    """
+    Gera preços (meses x ativos), máscara de disponibilidade e pesos somando no máximo 1.
+    """
+    precos = rng.lognormal(3.0, 0.5, size=(n_meses, n_ativos))
+    disponivel = np.ones((n_meses, n_ativos), dtype=bool)
+    if lacunas:
+        disponivel = rng.random((n_meses, n_ativos)) > 0.2
+        precos[rng.random((n_meses, n_ativos)) < 0.1] = 0.0
+    precos = np.where(disponivel, precos, 0.0)
+    pesos = rng.dirichlet(np.ones(n_ativos)) * rng.choice([1.0, rng.uniform(0.5, 1.0)])
+    return precos, disponivel, pesos
+
+
+class FatoresCrescimentoTests(SimpleTestCase):
+    """
+    Verifica que o valor final de qualquer cronograma de aportes é o produto escalar pelos fatores de crescimento.
+    """
+
+    def test_produto_escalar_igual_a_simulacao(self):
+        rng = np.random.default_rng(16)
+        for caso in range(50):
+            with self.subTest(caso=caso):
+                n_meses = int(rng.integers(1, 36))
+                precos, disponivel, pesos = _carteira_aleatoria(rng, n_meses, int(rng.integers(1, 5)))
+                aportes = rng.uniform(0, 2000, size=n_meses)
+
+                fatores = fatores_crescimento(precos, disponivel, pesos)
+                esperado = _simular_sem_arredondar(precos, disponivel, pesos, aportes)[-1]
+
+                self.assertAlmostEqual(float(aportes @ fatores), esperado, delta=1e-9 * max(abs(esperado), 1.0))
+
+    def test_fator_de_cada_mes(self):
+        rng = np.random.default_rng(160)
+        precos, disponivel, pesos = _carteira_aleatoria(rng, 12, 3)
+        fatores = fatores_crescimento(precos, disponivel, pesos)
+
+        for mes in range(12):
+            unitario = np.zeros(12)
+            unitario[mes] = 1.0
+            self.assertAlmostEqual(fatores[mes], _simular_sem_arredondar(precos, disponivel, pesos, unitario)[-1])
+
+
+class ContribuicoesAtivosTests(SimpleTestCase):
+    """
+    Verifica a decomposição do valor da carteira em contribuições por unidade de peso.
+    """
+
+    def test_decomposicao_com_os_pesos_originais(self):
+        rng = np.random.default_rng(17)
+        for caso in range(50):
+            with self.subTest(caso=caso):
+                n_meses = int(rng.integers(1, 36))
+                precos, disponivel, pesos = _carteira_aleatoria(rng, n_meses, int(rng.integers(1, 5)))
+                aportes = rng.uniform(0, 2000, size=n_meses)
+
+                investido, matriz = contribuicoes_ativos(precos, disponivel, pesos, aportes)
+
+                np.testing.assert_allclose(
+                    investido + matriz @ pesos, _simular_sem_arredondar(precos, disponivel, pesos, aportes), rtol=1e-9
+                )
+
+    def test_outros_pesos_com_a_mesma_soma(self):
+        rng = np.random.default_rng(170)
+        for caso in range(50):
+            with self.subTest(caso=caso):
+                n_meses = int(rng.integers(1, 36))
+                n_ativos = int(rng.integers(2, 5))
+                precos, disponivel, pesos = _carteira_aleatoria(rng, n_meses, n_ativos, lacunas=False)
+                novos = rng.dirichlet(np.ones(n_ativos)) * pesos.sum()
+                aportes = rng.uniform(0, 2000, size=n_meses)
+
+                investido, matriz = contribuicoes_ativos(precos, disponivel, pesos, aportes)
+
+                np.testing.assert_allclose(
+                    investido + matriz @ novos, _simular_sem_arredondar(precos, disponivel, novos, aportes), rtol=1e-9
+                )
+
+
+class RepesarAtivosTests(TestCase):
+    """
+    Verifica o re-cálculo instantâneo com outros pesos a partir da matriz de contribuições gravada.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='teste', password='teste')
+        carteira = CarteiraAutomatica.objects.create(valor_em_dinheiro=0, valor_ativos=0, moeda_base='BRL')
+        ativos = [
+            Ativo.objects.create(ticker=ticker, nome=ticker, peso=peso, posse=0, ultimo_preco_convertido=0)
+            for ticker, peso in (('AAA', 0.6), ('BBB', 0.4))
+        ]
+        carteira.ativos.set(ativos)
+
+        rng = np.random.default_rng(171)
+        self.precos = rng.lognormal(3.0, 0.5, size=(24, 2))
+        self.disponivel = np.ones((24, 2), dtype=bool)
+        self.aportes = np.full(24, 500.0)
+        self.aportes[0] += 10000
+        dados = {
+            'ativos': ativos,
+            'datas_validas': pd.date_range('2015-01-01', periods=24, freq='MS'),
+        }
+        self.simulacao = SimulacaoAutomatica.objects.create(
+            nome='teste', data_inicial=date(2015, 1, 1), data_final=date(2016, 12, 1), aplicacao_inicial=10000,
+            aplicacao_mensal=500, carteira_automatica=carteira, usuario=self.user,
+            contribuicoes_ativos=codificar_contribuicoes_ativos(dados, self.precos, self.disponivel, self.aportes),
+        )
+
+    def test_pesos_com_a_mesma_soma(self):
+        resposta, status = repesar_ativos(self.simulacao.id, self.user, {'AAA': 0.25, 'BBB': 0.75})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resposta['metodo'], 'linear')
+        esperado = _simular_sem_arredondar(self.precos, self.disponivel, np.array([0.25, 0.75]), self.aportes)[-1]
+        self.assertAlmostEqual(resposta['valor_final'], esperado, delta=0.011)
+
+    def test_pesos_invalidos(self):
+        for pesos in ({'CCC': 0.5}, {'AAA': -0.1}, {'AAA': 'abc'}, {'AAA': True}, {'AAA': float('nan')}, {'AAA': 0.7}, [0.5]):
+            with self.subTest(pesos=pesos):
+                resposta, status = repesar_ativos(self.simulacao.id, self.user, pesos)
+
+                self.assertEqual(status, 400)
+                self.assertIn('error', resposta)
+
+
+class SimularRebalanceamentoTests(SimpleTestCase):
+    """
+    Verifica as estratégias de rebalanceamento do motor vetorizado.
+    """
+
+    def setUp(self):
+        self.datas = pd.date_range('2020-01-01', periods=24, freq='MS')
+        self.disponivel = np.ones((24, 2), dtype=bool)
+        self.pesos = np.array([[0.6, 0.4]])
+        self.aportes = np.full((1, 24), 100.0)
+        self.inicial = np.array([1000.0])
+
+    def _simular(self, precos, estrategia, banda=0.05):
+        return simular_rebalanceamento(
+            precos, self.disponivel, self.pesos, self.aportes, self.inicial, self.datas, estrategia, banda
+        )
+
+    def test_precos_constantes(self):
+        precos = np.tile([10.0, 25.0], (24, 1))
+
+        # Sem variação de preço as posições nunca se afastam dos pesos; a primeira compra não é rebalanceamento
+        esperados = {'bandas': 0, 'aportes': 0, 'mensal': 23, 'trimestral': 7, 'anual': 1}
+        for estrategia, rebalanceamentos in esperados.items():
+            with self.subTest(estrategia=estrategia):
+                resultado = self._simular(precos, estrategia)
+
+                self.assertEqual(resultado['rebalanceamentos'][0], rebalanceamentos)
+                self.assertAlmostEqual(resultado['giro'][0], 0.0, places=6)
+
+    def test_bandas_rebalanceia_quando_o_peso_se_afasta(self):
+        # O primeiro ativo dobra de preço no sétimo mês: 0.6 passa a 0.75 das posições
+        precos = np.tile([10.0, 25.0], (24, 1))
+        precos[6:, 0] = 20.0
+        resultado = self._simular(precos, 'bandas', banda=0.1)
+
+        self.assertEqual(resultado['rebalanceamentos'][0], 1)
+        self.assertGreater(resultado['giro'][0], 0.0)
+        valores_posicoes = resultado['posses'][0] * precos[-1]
+        np.testing.assert_allclose(valores_posicoes / valores_posicoes.sum(), [0.6, 0.4], atol=0.01)
+
+    def test_aportes_sem_vendas_igual_a_carteira_sem_rebalanceamento_com_precos_constantes(self):
+        precos = np.tile([10.0, 25.0], (24, 1))
+
+        resultado = self._simular(precos, 'aportes')
+        carteira = simular_carteira(precos, self.disponivel, self.pesos[0], self.aportes[0], self.inicial[0])
+
+        np.testing.assert_allclose(resultado['valor'][0], carteira['valor'], atol=0.02)
+
+    def test_pesos_somando_mais_que_um(self):
+        with self.assertRaises(ValueError):
+            simular_rebalanceamento(
+                np.ones((3, 2)), np.ones((3, 2), dtype=bool), [[0.7, 0.5]], np.zeros((1, 3)), [1000.0],
+                self.datas[:3], 'mensal'
+            )
+
+
+class IndiceDeTaxasTests(SimpleTestCase):
+    """
+    Verifica o índice que transforma taxas mensais de referência em preços.
+    """
+
+    def test_mes_sem_dado_mantem_o_nivel(self):
+        taxas = np.full(12, 1.0)
+        taxas[5] = np.nan
+
+        indice = _indice_de_taxas(taxas)
+
+        self.assertEqual(indice[5], indice[4])
+        np.testing.assert_allclose(indice[-1], 1.01 ** 11)
+        self.assertTrue((indice > 0).all())
+
+    def test_meses_antes_da_serie_sem_preco(self):
+        indice = _indice_de_taxas(np.array([np.nan, np.nan, 2.0, np.nan, 2.0]))
+
+        np.testing.assert_allclose(indice, [0.0, 0.0, 1.02, 1.02, 1.02 ** 2])
+
+
+class ValoresJanelasTests(SimpleTestCase):
+    """
+    Compara as janelas móveis calculadas com somas acumuladas com uma simulação de cada janela.
+    """
+
+    def test_igual_a_simulacao_de_cada_janela(self):
+        rng = np.random.default_rng(22)
+        for caso in range(30):
+            with self.subTest(caso=caso):
+                n_meses = int(rng.integers(1, 60))
+                n_ativos = int(rng.integers(1, 5))
+                horizonte = int(rng.integers(1, n_meses + 1))
+                precos = rng.lognormal(3.0, 0.5, size=(n_meses, n_ativos))
+                precos[rng.random((n_meses, n_ativos)) < 0.05] = 0.0
+                pesos = rng.dirichlet(np.ones(n_ativos))
+                inicial, mensal = rng.uniform(0, 10000), rng.uniform(0, 1000)
+
+                valores, completas = valores_janelas(precos, pesos, horizonte, inicial, mensal)
+
+                self.assertEqual(len(valores), n_meses - horizonte + 1)
+                for inicio in range(n_meses - horizonte + 1):
+                    janela = precos[inicio:inicio + horizonte]
+                    self.assertEqual(completas[inicio], bool((janela > 0).all()))
+                    if not completas[inicio]:
+                        continue
+
+                    posses = np.zeros(n_ativos)
+                    for mes in range(horizonte):
+                        aporte = mensal + (inicial if mes == 0 else 0.0)
+                        posses += aporte * pesos / janela[mes]
+                    self.assertAlmostEqual(valores[inicio], posses @ janela[-1], delta=1e-9 * max(valores[inicio], 1.0))
+
+    def test_horizonte_maior_que_o_periodo(self):
+        valores, completas = valores_janelas(np.ones((3, 2)), [0.5, 0.5], 4, 1000.0, 100.0)
+
+        self.assertEqual(len(valores), 0)
+        self.assertEqual(len(completas), 0)
+
+
+class AnalisarJanelasMoveisTests(SimpleTestCase):
+    """
+    Verifica as respostas de erro da análise de janelas móveis.
+    """
+
+    def test_ticker_desconhecido(self):
+        def obter_metadados(ticker):
+            if ticker == 'XXXX':
+                raise Exception('No data found')
+            return {'moeda': 'BRL'}
+
+        with mock.patch.object(janelas_moveis_services, 'obter_metadados_em_lote', side_effect=Exception('No data found')), \
+                mock.patch.object(janelas_moveis_services, 'obter_metadados', side_effect=obter_metadados):
+            resposta, status = janelas_moveis_services.analisar_janelas_moveis(
+                [{'ticker': 'PETR4.SA', 'peso': 0.5}, {'ticker': 'XXXX', 'peso': 0.5}], 12, '2015-01-01', '2020-12-01',
+                aplicacao_mensal=100
+            )
+
+        self.assertEqual(status, 400)
+        self.assertIn('XXXX', resposta['error'])
+
+
+class ResolverMetaTests(SimpleTestCase):
+    """
+    Compara a solução analítica da meta (fatores de crescimento) com a bisseção em lote sobre a simulação.
+    """
+
+    def test_analitico_igual_a_bissecao(self):
+        rng = np.random.default_rng(23)
+        for caso in range(20):
+            with self.subTest(caso=caso):
+                n_meses = int(rng.integers(2, 48))
+                precos, disponivel, pesos = _carteira_aleatoria(rng, n_meses, int(rng.integers(1, 5)), lacunas=False)
+                inicial = float(rng.uniform(0, 5000))
+                fatores = fatores_crescimento(precos, disponivel, pesos)
+                alvo = inicial * fatores[0] + float(rng.uniform(100, 2000)) * fatores.sum()
+
+                # Aporte mensal que leva o valor final à meta
+                analitico = (alvo - inicial * fatores[0]) / fatores.sum()
+
+                def avaliar(candidatos):
+                    aportes = np.repeat(candidatos[:, None], n_meses, axis=1)
+                    iniciais = np.full(len(candidatos), inicial)
+                    return _caminhos(None, precos, disponivel, pesos, aportes, iniciais, False)[:, -1]
+
+                encontrado = _bissectar(avaliar, alvo)
+
+                self.assertGreaterEqual(avaliar(np.array([encontrado]))[0], alvo)
+                self.assertAlmostEqual(encontrado, analitico, delta=1e-6 * alvo)
+
+    def test_meta_inatingivel(self):
+        # Carteira que perde todo o valor: nenhum aporte atinge a meta
+        with self.assertRaises(ValueError):
+            _bissectar(lambda candidatos: np.zeros(len(candidatos)), 1000.0)
+
+
+class OtimizacaoTests(SimpleTestCase):
+    """
+    Verifica a covariância encolhida e as carteiras de mínima variância e de paridade de risco.
+    """
+
+    def test_covariancia_encolhida_com_mais_ativos_que_meses(self):
+        rng = np.random.default_rng(25)
+        retornos = rng.normal(0.01, 0.05, size=(12, 40))
+
+        covariancia, intensidade = encolher_covariancia(retornos)
+
+        self.assertTrue(0 < intensidade <= 1)
+        np.testing.assert_allclose(covariancia, covariancia.T)
+        self.assertGreater(np.linalg.eigvalsh(covariancia)[0], 0)
+        # A diagonal (variâncias amostrais) não é encolhida
+        np.testing.assert_allclose(np.diag(covariancia), retornos.var(axis=0))
+
+    def test_paridade_de_risco(self):
+        rng = np.random.default_rng(250)
+        fatores = rng.normal(size=(60, 6))
+        covariancia = np.cov(fatores @ rng.normal(size=(6, 6)), rowvar=False)
+
+        pesos = paridade_risco(covariancia)
+        contribuicoes = pesos * (covariancia @ pesos)
+
+        self.assertAlmostEqual(pesos.sum(), 1.0)
+        self.assertTrue((pesos > 0).all())
+        np.testing.assert_allclose(contribuicoes, contribuicoes.mean(), rtol=1e-6)
+
+    def test_minima_variancia_sem_venda_a_descoberto(self):
+        covariancia = np.diag([0.04, 0.01, 0.09])
+
+        pesos = fronteira_eficiente(np.zeros(3), covariancia, [0.0])[0]
+
+        # Com ativos independentes os pesos são proporcionais ao inverso das variâncias
+        inversos = 1 / np.diag(covariancia)
+        np.testing.assert_allclose(pesos, inversos / inversos.sum(), atol=1e-6)
+
+    def test_projecao_na_simplex(self):
+        rng = np.random.default_rng(251)
+        valores = rng.normal(size=(100, 5))
+
+        projetados = projetar_simplex(valores)
+
+        np.testing.assert_allclose(projetados.sum(axis=1), 1.0)
+        self.assertTrue((projetados >= 0).all())
+        np.testing.assert_allclose(projetar_simplex(projetados), projetados, atol=1e-12)
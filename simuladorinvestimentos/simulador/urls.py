@@ -4,11 +4,19 @@ from . import views
 urlpatterns = [
     path('nova_simulacao_automatica/', views.nova_simulacao_automatica, name='nova_simulacao_automatica'),
     path('pesquisar_ativos/', views.pesquisar_ativos, name='pesquisar_ativos'),
+    path('buscar_simbolos/', views.buscar_simbolos, name='buscar_simbolos'),
     path('enviar_ativos/', views.enviar_ativos, name='enviar_ativos'),
     path('historico/', views.listar_historico, name='listar_historico'),
     path('excluir_simulacao_automatica/<int:simulacao_id>/', views.excluir_simulacao_automatica, name='excluir_simulacao_automatica'),
     path('excluir_simulacao_manual/<int:simulacao_id>/', views.excluir_simulacao_manual, name='excluir_simulacao_manual'),
     path('resultado_simulacao_automatica/', views.resultado_simulacao_automatica, name='resultado_simulacao_automatica'),
+    path('varrer_cenarios/', views.varrer_cenarios_simulacao, name='varrer_cenarios'),
+    path('simular_aportes/', views.simular_aportes_simulacao, name='simular_aportes'),
+    path('repesar_ativos/', views.repesar_ativos_simulacao, name='repesar_ativos'),
+    path('janelas_moveis/', views.janelas_moveis, name='janelas_moveis'),
+    path('resolver_meta/', views.resolver_meta_simulacao, name='resolver_meta'),
+    path('projetar_simulacao/', views.projetar_simulacao_automatica, name='projetar_simulacao'),
+    path('otimizar_pesos/', views.otimizar_pesos, name='otimizar_pesos'),
     path('abrir_simulacao_automatica/', views.abrir_simulacao_automatica, name='abrir_simulacao_automatica'),
 
     path('nova_simulacao_manual/', views.nova_simulacao_manual, name='nova_simulacao_manual'),
@@ -18,5 +26,7 @@ urlpatterns = [
     path('negociar_ativos_pesquisa/<int:simulacao_id>/', views.negociar_ativos_pesquisa, name='negociar_ativos_pesquisa'),
     path('negociar_ativos/<int:simulacao_id>/', views.negociar_ativos, name='negociar_ativos'),
     path('buy_sell_actives/<int:simulacao_id>/', views.buy_sell_actives, name='buy_sell_actives'),
+
+    path('estatisticas_cache/', views.estatisticas_cache, name='estatisticas_cache'),
 ]
 
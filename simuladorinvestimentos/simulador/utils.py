@@ -1,8 +1,8 @@
-from bcb import sgs
-from datetime import datetime
-import pandas as pd
 import numpy as np
-import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .indice_inflacao import IndiceInflacaoAcumulado
 
 
 def arredondar_para_baixo(valor):
@@ -18,42 +18,32 @@ def arredondar_para_baixo(valor):
     return np.floor(valor * 100) / 100
 
 
-def pegar_inflacao(start_date, end_date, max_retries=5, retry_delay=2):
+def executar_em_paralelo(funcao, itens, max_workers=8):
     """
-    Obtém os dados de inflação (IPCA) entre duas datas específicas.
+    Executa uma função de E/S (ex.: download) para vários itens em paralelo, com concorrência limitada.
 
     Args:
-        start_date (str): Data de início no formato 'YYYY-MM-DD'.
-        end_date (str): Data de término no formato 'YYYY-MM-DD'.
-        max_retries (int, optional): Número máximo de tentativas em caso de falha. Default é 5.
-        retry_delay (int, optional): Intervalo de tempo (em segundos) entre tentativas. Default é 2.
+        funcao (callable): Função que recebe um item.
+        itens (iterable): Itens a serem processados.
+        max_workers (int, optional): Número máximo de execuções simultâneas. Default é 8.
 
     Returns:
-        pd.DataFrame: DataFrame contendo as datas e valores do IPCA, ou None se falhar.
+        dict: Dicionário item -> resultado. Se a função falhar, o valor é a exceção levantada.
     """
-    codigo_ipca = 433  # Código do IPCA no SGS
-    attempt = 0  # Contador de tentativas
+    itens = list(dict.fromkeys(itens))
 
-    while attempt < max_retries:
+    def executar(item):
         try:
-            # Pegando os dados diretamente como DataFrame
-            df = sgs.get(codigo_ipca, start=start_date, end=end_date)
-
-            # Verificar se a resposta está no formato esperado
-            if df.empty:
-                return None
-
-            # Ajustar o DataFrame para ter duas colunas: Data e Valor
-            df = df.reset_index()  # Reseta o índice para que a data vire uma coluna
-            df.columns = ['Data', 'Valor']  # Renomeia as colunas
-
-            return df  # Se tudo der certo, retorna o DataFrame
-
+            return funcao(item)
         except Exception as e:
-            attempt += 1  # Incrementa o contador de tentativas
-            time.sleep(retry_delay)  # Aguarda alguns segundos antes de tentar novamente
+            return e
+
+    # Com um único item não vale a pena criar threads
+    if len(itens) <= 1:
+        return {item: executar(item) for item in itens}
 
-    return None
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(itens))) as executor:
+        return dict(zip(itens, executor.map(executar, itens)))
 
 
 def ajustar_inflacao(ipca_data, coluna_ipca, periodo_inicial, valor, data_final):
@@ -71,37 +61,10 @@ def ajustar_inflacao(ipca_data, coluna_ipca, periodo_inicial, valor, data_final)
         float: Valor ajustado pela inflação, ou None em caso de erro.
     """
     try:
-        # Converter periodo_inicial e data_final para objetos datetime se forem strings
-        if isinstance(periodo_inicial, str):
-            periodo_inicial = datetime.strptime(periodo_inicial, '%Y-%m-%d').date()
-        if isinstance(data_final, str):
-            data_final = datetime.strptime(data_final, '%Y-%m-%d').date()
-
-        # Garantir que o índice do DataFrame seja do tipo datetime
-        ipca_data.index = pd.to_datetime(ipca_data.index)
-
-        # Filtrar os dados para o período relevante
-        df_ipca = ipca_data.loc[data_final:periodo_inicial].copy()
-
-        if df_ipca.empty:
-            return None
-
-        # Calcular o fator de correção acumulado
-        df_ipca['IPCA'] = df_ipca[coluna_ipca] / 100
-        df_ipca['Fator de Correcao'] = (1 + df_ipca['IPCA']).cumprod()
-
-        # Calcular o valor equivalente
-        fator_correcao_final = df_ipca['Fator de Correcao'].iloc[-1]
-        valor_equivalente = valor / fator_correcao_final
-
-        return valor_equivalente
-    except KeyError as e:
-        pass
-    except IndexError as e:
-        pass
+        # O período é contado da data final (mês atual da simulação) até o período inicial (hoje)
+        return IndiceInflacaoAcumulado.de_dataframe(ipca_data, coluna_ipca).deflacionar(valor, data_final, periodo_inicial)
     except Exception as e:
-        pass
-    return None
+        return None
 
 
 def ajustar_inflacao_automatica(ipca_data, coluna_ipca, periodo_inicial, valor, data_final):
@@ -119,26 +82,6 @@ def ajustar_inflacao_automatica(ipca_data, coluna_ipca, periodo_inicial, valor,
         float: Valor ajustado pela inflação, ou None em caso de erro.
     """
     try:
-        # Converter período_inicial e data_final para objetos datetime se forem strings
-        if isinstance(periodo_inicial, str):
-            periodo_inicial = datetime.strptime(periodo_inicial, '%Y-%m-%d').date()
-        if isinstance(data_final, str):
-            data_final = datetime.strptime(data_final, '%Y-%m-%d').date()
-
-        # Garantir que o índice do DataFrame seja do tipo datetime
-        ipca_data.index = pd.to_datetime(ipca_data.index)
-
-        # Filtrar os dados para o período relevante
-        df_ipca = ipca_data.loc[periodo_inicial:data_final].copy()
-
-        # Calcular o fator de correção acumulado
-        df_ipca['IPCA'] = df_ipca[coluna_ipca] / 100  # Converter porcentagem para fator decimal
-        df_ipca['Fator de Correcao'] = (1 + df_ipca['IPCA']).cumprod()
-
-        # Calcular o valor equivalente
-        fator_correcao_final = df_ipca['Fator de Correcao'].iloc[-1]
-        valor_equivalente = valor / fator_correcao_final
-
-        return valor_equivalente
+        return IndiceInflacaoAcumulado.de_dataframe(ipca_data, coluna_ipca).deflacionar(valor, periodo_inicial, data_final)
     except Exception as e:
         return None
@@ -7,7 +7,10 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 
 
+from .coalescencia import estatisticas_coalescencia
 from .services.avancar_mes_services import avancar_mes
+from .services.cambio_services import estatisticas_cambio
+from .services.metadados_services import estatisticas_metadados
 from .services.negociar_ativos_services import negociar_ativo
 from .services.modificar_dinheiro_services import modificar_dinheiro
 from .services.buy_sell_actives_services import processar_compra_venda
@@ -15,11 +18,18 @@ from .services.listar_historico_services import obter_historico_usuario
 from .services.negociar_ativos_pesquisa_services import pesquisar_ativo
 from .services.enviar_ativos_services import enviar_ativos_para_carteira
 from .services.simulacao_manual_services import calcular_simulacao_manual
-from .services.pesquisar_ativos_services import pesquisar_ativo_por_ticker
+from .services.pesquisar_ativos_services import pesquisar_ativo_por_ticker, pesquisar_simbolos
 from .services.nova_simulacao_manual_services import criar_simulacao_manual
 from .services.nova_simulacao_automatica_services import criar_simulacao_automatica
 from .services.abrir_simulacao_automatica_services import processar_simulacao_automatica
 from .services.resultado_simulacao_automatica_services import calcular_resultado_simulacao
+from .services.varredura_simulacao_services import varrer_cenarios
+from .services.simular_aportes_services import simular_aportes
+from .services.repesar_ativos_services import repesar_ativos
+from .services.janelas_moveis_services import analisar_janelas_moveis
+from .services.resolver_meta_services import resolver_meta
+from .services.projecao_services import projetar_simulacao
+from .services.otimizacao_services import otimizar_carteira, estatisticas_otimizacao
 
 from .models import SimulacaoAutomatica, SimulacaoManual
 
@@ -67,7 +77,11 @@ def nova_simulacao_automatica(request):
 
         try:
             simulacao_automatica, carteira_automatica = criar_simulacao_automatica(
-                nome, data_inicial, data_final, aplicacao_inicial, aplicacao_mensal, moeda_base, request.user
+                nome, data_inicial, data_final, aplicacao_inicial, aplicacao_mensal, moeda_base, request.user,
+                estrategia_rebalanceamento=body.get('rebalanceamento'),
+                banda_rebalanceamento=body.get('banda_rebalanceamento'),
+                dividendos=body.get('dividendos'),
+                benchmarks=body.get('benchmarks')
             )
 
             return JsonResponse({
@@ -76,6 +90,8 @@ def nova_simulacao_automatica(request):
                 'carteira_id': carteira_automatica.id
             }, status=200)
 
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
@@ -108,6 +124,30 @@ def pesquisar_ativos(request):
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 
+@login_required
+@csrf_exempt
+def buscar_simbolos(request):
+    """
+    Busca tickers pelo início do ticker ou por parte do nome, para o autocompletar da pesquisa.
+
+    Args:
+        request: Objeto HttpRequest com os parâmetros 'q' e, opcionalmente, 'limite'.
+
+    Returns:
+        JsonResponse: Lista de símbolos encontrados ou mensagem de erro.
+    """
+    if request.method == 'GET':
+        try:
+            limite = min(int(request.GET.get('limite', 10)), 50)
+        except ValueError:
+            return JsonResponse({'error': 'Limite inválido.'}, status=400)
+
+        response_data, status_code = pesquisar_simbolos(request.GET.get('q', ''), limite)
+        return JsonResponse(response_data, status=status_code)
+
+    return JsonResponse({'error': 'Método inválido. Apenas GET é permitido.'}, status=405)
+
+
 @login_required()
 @csrf_exempt
 def enviar_ativos(request):
@@ -161,6 +201,265 @@ def resultado_simulacao_automatica(request):
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 
+@login_required()
+@csrf_exempt
+def varrer_cenarios_simulacao(request):
+    """
+    Avalia várias variantes (aplicação inicial, mensal e pesos) de uma simulação automática em uma única execução.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Métricas de cada variante ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            simulacao_id = data.get('simulacao_id')
+
+            if not simulacao_id:
+                return JsonResponse({'error': 'Missing simulacao_id'}, status=400)
+
+            response_data, status_code = varrer_cenarios(
+                simulacao_id, request.user, grade=data.get('grade'), variantes=data.get('variantes')
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@login_required()
+@csrf_exempt
+def simular_aportes_simulacao(request):
+    """
+    Calcula o valor final de uma simulação automática para outro cronograma de aportes, sem simular novamente.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Valor final do cronograma ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            simulacao_id = data.get('simulacao_id')
+
+            if not simulacao_id:
+                return JsonResponse({'error': 'Missing simulacao_id'}, status=400)
+
+            response_data, status_code = simular_aportes(
+                simulacao_id,
+                request.user,
+                aportes=data.get('aportes'),
+                extras=data.get('extras'),
+                pular=data.get('pular'),
+                ajustar_inflacao=data.get('ajustarInflacao', False)
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@login_required()
+@csrf_exempt
+def repesar_ativos_simulacao(request):
+    """
+    Recalcula o resultado de uma simulação automática com outros pesos, sem simular novamente.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Valor final com os novos pesos ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            simulacao_id = data.get('simulacao_id')
+
+            if not simulacao_id:
+                return JsonResponse({'error': 'Missing simulacao_id'}, status=400)
+
+            response_data, status_code = repesar_ativos(
+                simulacao_id, request.user, data.get('pesos'), serie=data.get('serie', False)
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@login_required()
+@csrf_exempt
+def janelas_moveis(request):
+    """
+    Simula uma carteira em todas as janelas de um horizonte entre duas datas, uma por mês de início.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Distribuição dos resultados das janelas ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            ativos = data.get('ativos')
+            horizonte_meses = data.get('horizonte_meses')
+            data_inicial = data.get('data_inicial')
+            data_final = data.get('data_final')
+
+            if not ativos or not horizonte_meses or not data_inicial or not data_final:
+                return JsonResponse({'error': 'Missing ativos, horizonte_meses, data_inicial or data_final'}, status=400)
+
+            response_data, status_code = analisar_janelas_moveis(
+                ativos,
+                horizonte_meses,
+                data_inicial,
+                data_final,
+                aplicacao_inicial=data.get('aplicacao_inicial', 0),
+                aplicacao_mensal=data.get('aplicacao_mensal', 0),
+                moeda_base=data.get('moeda_base', 'BRL'),
+                percentis=data.get('percentis'),
+                serie=data.get('serie', False)
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@login_required()
+@csrf_exempt
+def resolver_meta_simulacao(request):
+    """
+    Calcula o aporte mensal, a aplicação inicial ou o prazo para uma simulação automática atingir um valor alvo.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Valor encontrado ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            simulacao_id = data.get('simulacao_id')
+            valor_alvo = data.get('valor_alvo')
+
+            if not simulacao_id or valor_alvo is None:
+                return JsonResponse({'error': 'Missing simulacao_id or valor_alvo'}, status=400)
+
+            response_data, status_code = resolver_meta(
+                simulacao_id,
+                request.user,
+                valor_alvo,
+                incognita=data.get('incognita', 'aplicacao_mensal'),
+                data_alvo=data.get('data_alvo'),
+                ajustar_inflacao=data.get('ajustarInflacao', False)
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@login_required()
+@csrf_exempt
+def projetar_simulacao_automatica(request):
+    """
+    Projeta por Monte Carlo o valor futuro da carteira de uma simulação automática.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Leque de percentis e probabilidade de atingir a meta, ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            simulacao_id = data.get('simulacao_id')
+            horizonte_meses = data.get('horizonte_meses')
+
+            if not simulacao_id or not horizonte_meses:
+                return JsonResponse({'error': 'Missing simulacao_id or horizonte_meses'}, status=400)
+
+            response_data, status_code = projetar_simulacao(
+                simulacao_id,
+                request.user,
+                horizonte_meses,
+                metodo=data.get('metodo', 'bootstrap'),
+                n_caminhos=data.get('caminhos'),
+                semente=data.get('semente'),
+                bloco=data.get('bloco', 12),
+                valor_alvo=data.get('valor_alvo'),
+                valor_inicial=data.get('valor_inicial'),
+                aplicacao_mensal=data.get('aplicacao_mensal'),
+                janela_meses=data.get('janela_meses'),
+                percentis=data.get('percentis')
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
+@login_required()
+@csrf_exempt
+def otimizar_pesos(request):
+    """
+    Calcula a fronteira eficiente e os pesos de mínima variância, máximo Sharpe e paridade de risco de uma lista de ativos.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Carteiras otimizadas e fronteira eficiente, ou mensagem de erro.
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+            tickers = data.get('tickers')
+
+            if not tickers:
+                return JsonResponse({'error': 'Missing tickers'}, status=400)
+
+            response_data, status_code = otimizar_carteira(
+                tickers,
+                user=request.user,
+                simulacao_id=data.get('simulacao_id'),
+                data_inicial=data.get('data_inicial'),
+                data_final=data.get('data_final'),
+                janela_meses=data.get('janela_meses'),
+                moeda_base=data.get('moeda_base'),
+                pontos_fronteira=data.get('pontos_fronteira', 30),
+                taxa_livre=data.get('taxa_livre')
+            )
+            return JsonResponse(response_data, status=status_code)
+
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+
 @login_required()
 @csrf_exempt
 def listar_historico(request):
@@ -459,3 +758,26 @@ def buy_sell_actives(request, simulacao_id):
 
     else:
         return JsonResponse({'error': 'Método não permitido. Use POST.'}, status=405)
+
+
+@login_required
+@csrf_exempt
+def estatisticas_cache(request):
+    """
+    Retorna os contadores de acerto e falta dos caches de dados de mercado deste processo.
+
+    Args:
+        request: Objeto HttpRequest.
+
+    Returns:
+        JsonResponse: Estatísticas dos caches.
+    """
+    if request.method == 'GET':
+        return JsonResponse({
+            'metadados': estatisticas_metadados(),
+            'cambio': estatisticas_cambio(),
+            'coalescencia': estatisticas_coalescencia(),
+            'otimizacao': estatisticas_otimizacao(),
+        })
+
+    return JsonResponse({'error': 'Método inválido. Apenas GET é permitido.'}, status=405)